@@ -1,44 +1,114 @@
 import os
+import importlib
 from dotenv import load_dotenv
-from flask import Flask, send_from_directory
+from flask import Flask, jsonify, send_from_directory
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import configure_mappers
 from datetime import timedelta
+from app.utils.db_routing import RoutingSession
 
 # Load environment variables
 load_dotenv()
 
-# Initialize SQLAlchemy
-db = SQLAlchemy()
+# Initialize SQLAlchemy (reads in GET handlers go to the read-only engine)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
-def create_app():
+# (module, blueprint attribute, url prefix); imported when the app is built
+BLUEPRINTS = [
+    ('app.routes.auth', 'auth_bp', '/api/auth'),
+    ('app.routes.campaigns', 'campaigns_bp', '/api/campaigns'),
+    ('app.routes.donations', 'donations_bp', '/api/donations'),
+    ('app.routes.users', 'users_bp', '/api/users'),
+    ('app.routes.admin', 'admin_bp', '/api/admin'),
+]
+
+# Frontend origins allowed to call the API
+CORS_ORIGINS = ["http://localhost:3000", "http://localhost:3001"]
+
+def create_app(test_config=None):
     app = Flask(__name__, static_folder='static')
     
     # Configure the app
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'default-dev-key')
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URI', 'sqlite:///aksi_nyata.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_READ_DATABASE_URI'] = os.environ.get('DATABASE_READ_URI')
+    # SQLite pragma profile applied to every connection ('production' or 'default')
+    app.config['SQLITE_PRAGMA_PROFILE'] = os.environ.get('SQLITE_PRAGMA_PROFILE', 'production')
     # Use a consistent JWT secret key for debugging
     app.config['JWT_SECRET_KEY'] = '6a49dc5bf2e5cb7d8c01beb51fb20c29471745398e5abc67'
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=1)
     app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=30)
-    app.config['UPLOAD_FOLDER'] = os.path.join(app.static_folder, 'uploads')
+    app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER', os.path.join(app.static_folder, 'uploads'))
+    # Whole request body; file fields have their own limits (app.utils.uploads)
+    app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
+    # Close expired campaigns in-process every N seconds (0: use sweep_campaigns.py from cron)
+    app.config['CAMPAIGN_SWEEP_INTERVAL'] = float(os.environ.get('CAMPAIGN_SWEEP_INTERVAL', 0))
+    # Fan out notifications in-process every N seconds (0: run notification_worker.py)
+    app.config['NOTIFICATION_WORKER_INTERVAL'] = float(os.environ.get('NOTIFICATION_WORKER_INTERVAL', 0))
+    # Followers notified per transaction
+    app.config['NOTIFICATION_CHUNK_SIZE'] = int(os.environ.get('NOTIFICATION_CHUNK_SIZE', 1000))
+    # Live campaign streams per process, and how long one stays open before
+    # the browser reconnects (each one holds a thread under gunicorn)
+    app.config['SSE_MAX_SUBSCRIBERS'] = int(os.environ.get('SSE_MAX_SUBSCRIBERS', 1000))
+    app.config['SSE_STREAM_SECONDS'] = float(os.environ.get('SSE_STREAM_SECONDS', 60))
+    
+    # Overrides for scripts and tests (e.g. a throwaway database)
+    if test_config:
+        app.config.update(test_config)
     
     # Initialize extensions
     CORS(app, 
          resources={
              r"/api/*": {
-                 "origins": ["http://localhost:3000", "http://localhost:3001"],
+                 "origins": CORS_ORIGINS,
                  "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
                  "allow_headers": ["Content-Type", "Authorization", "X-Requested-With"],
                  "supports_credentials": True,
                  "expose_headers": ["Content-Type", "Authorization"]
              }
          })
+    from app.utils.db_routing import configure_read_routing, READ_BIND_KEY
+    configure_read_routing(app)
     db.init_app(app)
     jwt = JWTManager(app)
     
+    # Tune SQLite connections (WAL, busy_timeout, ...)
+    from app.utils.sqlite_tuning import setup_sqlite_pragmas, resolve_pragmas
+    pragmas = resolve_pragmas(app.config)
+    with app.app_context():
+        setup_sqlite_pragmas(db.engine, pragmas)
+        if READ_BIND_KEY in db.engines:
+            # The journal mode can only be changed by a writer
+            read_pragmas = {name: value for name, value in pragmas.items() if name != 'journal_mode'}
+            setup_sqlite_pragmas(db.engines[READ_BIND_KEY], read_pragmas)
+
+        # Per-request SQL counts, Server-Timing header and N+1 warnings
+        from app.utils.query_stats import setup_query_stats
+        setup_query_stats(app, db.engines.values())
+
+        # Statements over SLOW_QUERY_THRESHOLD_MS, with their query plan
+        from app.utils.slow_queries import setup_slow_query_log
+        setup_slow_query_log(app, db.engines.values())
+
+    # Prometheus metrics at /metrics, shared across worker processes
+    from app.utils.metrics import setup_metrics
+    setup_metrics(app)
+
+    # Opt-in sampling profiler for slow requests (PROFILER_ENABLED)
+    from app.utils.profiler import setup_profiler
+    setup_profiler(app)
+
+    # Opt-in background sweeper for campaigns past their end_date
+    from app.utils.lifecycle import setup_campaign_sweeper
+    setup_campaign_sweeper(app)
+
+    # Opt-in background fan-out of follower notifications
+    from app.utils.notifications import setup_notification_worker
+    setup_notification_worker(app)
+
     # Setup JWT error handlers
     from app.utils.jwt_utils import setup_jwt_error_handlers
     setup_jwt_error_handlers(app, jwt)
@@ -46,22 +116,23 @@ def create_app():
     # Ensure the upload directory exists
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
-    # Register blueprints
-    from app.routes.auth import auth_bp
-    from app.routes.campaigns import campaigns_bp
-    from app.routes.donations import donations_bp
-    from app.routes.users import users_bp
-    from app.routes.admin import admin_bp
+    @app.errorhandler(413)
+    def request_too_large(error):
+        return jsonify({'error': 'Request is too large'}), 413
     
-    app.register_blueprint(auth_bp, url_prefix='/api/auth')
-    app.register_blueprint(campaigns_bp, url_prefix='/api/campaigns')
-    app.register_blueprint(donations_bp, url_prefix='/api/donations')
-    app.register_blueprint(users_bp, url_prefix='/api/users')
-    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    # Register blueprints. Maintenance scripts that only need the database
+    # can skip importing the route modules with REGISTER_BLUEPRINTS=False.
+    # The schema is managed by migrate.py; building the app does no DB I/O.
+    if app.config.get('REGISTER_BLUEPRINTS', True):
+        for module_name, attribute, url_prefix in BLUEPRINTS:
+            blueprint = getattr(importlib.import_module(module_name), attribute)
+            app.register_blueprint(blueprint, url_prefix=url_prefix)
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
+    # Create the backrefs declared on the other side (Campaign.creator,
+    # Campaign.approved_by_user, ...) now: loader options that name them
+    # fail until the mappers are configured, e.g. on a worker's first request
+    from app.models import models  # noqa: F401
+    configure_mappers()
     
     # Route untuk serve static files (gambar upload)
     @app.route('/static/uploads/<path:filename>')
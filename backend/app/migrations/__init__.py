@@ -0,0 +1,140 @@
+"""
+Versioned schema migrations.
+
+Every module in app/migrations/versions named vNNNN_<name>.py defines
+VERSION, NAME and upgrade(conn), and optionally BACKFILLS, a list of
+Backfill data migrations. Applied versions are recorded in the
+schema_migrations table so each migration runs exactly once per database.
+
+Migrations are meant to run online, next to a live (WAL) database:
+the schema step is one short transaction, and backfills update rows in
+primary-key batches, one transaction per batch. Progress is checkpointed
+in schema_migration_progress, so an interrupted run resumes where it
+stopped instead of starting over.
+"""
+import importlib
+import pkgutil
+from datetime import datetime
+from sqlalchemy import inspect, text
+from app.utils.backfill import (
+    DEFAULT_BATCH_SIZE, ensure_progress_table, get_checkpoint, run_sql_backfill, save_checkpoint
+)
+
+MIGRATIONS_TABLE = 'schema_migrations'
+PROGRESS_TABLE = 'schema_migration_progress'
+
+class Backfill:
+    """
+    Data migration run in primary-key batches after the schema step.
+
+    `sql` is an UPDATE (or INSERT ... SELECT) limited to the rows with
+    id BETWEEN :start_id AND :end_id, so every batch touches a bounded range
+    (see app.utils.backfill); also a list of statements, or a function of
+    the dialect name returning them.
+    """
+    def __init__(self, name, table, sql, batch_size=DEFAULT_BATCH_SIZE):
+        self.name = name
+        self.table = table
+        self.sql = sql
+        self.batch_size = batch_size
+
+def load_migrations():
+    """Import all migration modules, ordered by VERSION"""
+    from app.migrations import versions
+
+    migrations = []
+    for module_info in pkgutil.iter_modules(versions.__path__):
+        if not module_info.name.startswith('v'):
+            continue
+        module = importlib.import_module(f'{versions.__name__}.{module_info.name}')
+        migrations.append(module)
+
+    migrations.sort(key=lambda module: module.VERSION)
+
+    seen = set()
+    for module in migrations:
+        if module.VERSION in seen:
+            raise RuntimeError(f'Duplicate migration version: {module.VERSION}')
+        seen.add(module.VERSION)
+
+    return migrations
+
+def ensure_migrations_table(conn):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} ("
+        "version INTEGER PRIMARY KEY, "
+        "name VARCHAR(200) NOT NULL, "
+        "applied_at DATETIME NOT NULL)"
+    ))
+    ensure_progress_table(conn, PROGRESS_TABLE)
+
+def applied_versions(conn):
+    ensure_migrations_table(conn)
+    rows = conn.execute(text(f"SELECT version FROM {MIGRATIONS_TABLE}")).fetchall()
+    return {row[0] for row in rows}
+
+def pending_migrations(engine):
+    with engine.begin() as conn:
+        applied = applied_versions(conn)
+    return [module for module in load_migrations() if module.VERSION not in applied]
+
+def run_migration_backfill(engine, backfill, checkpoint_name, batch_size=None, log=print):
+    """Run a backfill batch by batch, resuming from its last checkpoint"""
+    run_sql_backfill(
+        engine, checkpoint_name, backfill.table, backfill.sql,
+        batch_size=batch_size or backfill.batch_size,
+        progress_table=PROGRESS_TABLE, log=log
+    )
+
+def upgrade(engine, target=None, batch_size=None, log=print):
+    """Apply pending migrations up to and including target (all if None)"""
+    applied = []
+    for module in pending_migrations(engine):
+        if target is not None and module.VERSION > target:
+            break
+
+        log(f"Applying migration {module.VERSION:04d}: {module.NAME}")
+        prefix = f"{module.VERSION:04d}:"
+        schema_checkpoint = prefix + 'schema'
+
+        with engine.begin() as conn:
+            # The schema step of an interrupted run already committed
+            if get_checkpoint(conn, schema_checkpoint, PROGRESS_TABLE) is None:
+                module.upgrade(conn)
+                save_checkpoint(conn, schema_checkpoint, 0, PROGRESS_TABLE)
+
+        for backfill in getattr(module, 'BACKFILLS', []):
+            run_migration_backfill(engine, backfill, prefix + backfill.name, batch_size=batch_size, log=log)
+
+        with engine.begin() as conn:
+            conn.execute(
+                text(f"INSERT INTO {MIGRATIONS_TABLE} (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+                {'version': module.VERSION, 'name': module.NAME, 'applied_at': datetime.utcnow()}
+            )
+            conn.execute(text(f"DELETE FROM {PROGRESS_TABLE} WHERE name LIKE :prefix"), {'prefix': prefix + '%'})
+        applied.append(module.VERSION)
+
+    return applied
+
+def table_columns(conn, table):
+    """Column names of a table, empty if the table does not exist"""
+    inspector = inspect(conn)
+    if not inspector.has_table(table):
+        return set()
+    return {column['name'] for column in inspector.get_columns(table)}
+
+def add_missing_columns(conn, table, columns):
+    """
+    Add the (name, DDL type) columns a legacy table is missing.
+    Adding a nullable column is a metadata-only change in SQLite.
+    """
+    existing = table_columns(conn, table)
+    if not existing:
+        return []
+
+    added = []
+    for name, ddl in columns:
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+            added.append(name)
+    return added
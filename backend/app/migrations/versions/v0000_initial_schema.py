@@ -0,0 +1,15 @@
+"""
+Initial schema: create any missing tables from the models.
+
+This replaces the db.create_all() that used to run inside create_app().
+It only creates tables that do not exist yet, so it is safe on databases
+that were created by earlier versions of the app.
+"""
+VERSION = 0
+NAME = 'initial_schema'
+
+def upgrade(conn):
+    from app import db
+    import app.models.models  # noqa: F401  (registers the tables on db.metadata)
+
+    db.metadata.create_all(conn, checkfirst=True)
@@ -0,0 +1,35 @@
+"""
+Composite indexes for the hot campaign and donation queries
+"""
+from sqlalchemy import text
+from app.migrations import table_columns
+
+VERSION = 1
+NAME = 'composite_indexes'
+
+INDEXES = [
+    # get_campaigns: status filter + featured/urgent/created_at sort
+    ('campaign', 'ix_campaign_status_featured_urgent_created', ['status', 'is_featured', 'is_urgent', 'created_at']),
+    # get_campaigns / get_categories: category filter
+    ('campaign', 'ix_campaign_category_status', ['category_id', 'status']),
+    # get_my_campaigns / dashboards: creator filter sorted by date
+    ('campaign', 'ix_campaign_creator_created', ['creator_id', 'created_at']),
+    # admin dashboard: recent campaigns
+    ('campaign', 'ix_campaign_created_at', ['created_at']),
+    # campaign detail / verify / dashboards: donations of a campaign by status
+    ('donation', 'ix_donation_campaign_status_created', ['campaign_id', 'status', 'created_at']),
+    # admin dashboard / get_all_donations: donations by status
+    ('donation', 'ix_donation_status_created', ['status', 'created_at']),
+    # profile / dashboard: donations of a donor
+    ('donation', 'ix_donation_donor_created', ['donor_id', 'created_at']),
+    # admin dashboard / get_all_donations: newest donations first
+    ('donation', 'ix_donation_created_at', ['created_at']),
+]
+
+def upgrade(conn):
+    for table, name, columns in INDEXES:
+        existing = table_columns(conn, table)
+        # Legacy databases may predate some columns; the column migration adds them later
+        if not set(columns) <= existing:
+            continue
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"))
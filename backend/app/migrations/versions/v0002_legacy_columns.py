@@ -0,0 +1,69 @@
+"""
+Bring databases created by older versions of the app up to the models.
+
+Replaces the ad-hoc migrate_db.py, migrate_user_table.py,
+migrate_user_table_fixed.py, migrate_donation_table.py and
+migrate_campaign_category.py scripts, and backfills creator_id from
+organizer_id (previously fix_creator_id.py) in batches.
+"""
+from app.migrations import Backfill, add_missing_columns
+from app.migrations.versions.v0001_composite_indexes import upgrade as create_indexes
+
+VERSION = 2
+NAME = 'legacy_columns'
+
+COLUMNS = {
+    'user': [
+        ('role', "VARCHAR(20) DEFAULT 'user'"),
+        ('profile_picture', 'VARCHAR(255)'),
+        ('phone_number', 'VARCHAR(20)'),
+        ('is_active', 'BOOLEAN DEFAULT 1'),
+        ('is_verified', 'BOOLEAN DEFAULT 0'),
+        ('updated_at', 'DATETIME'),
+    ],
+    'campaign': [
+        ('category', 'VARCHAR(50)'),
+        ('category_id', 'INTEGER'),
+        ('is_featured', 'BOOLEAN DEFAULT 0'),
+        ('is_urgent', 'BOOLEAN DEFAULT 0'),
+        ('creator_id', 'INTEGER'),
+        ('approved_by', 'INTEGER'),
+        ('approved_at', 'DATETIME'),
+        ('rejection_reason', 'TEXT'),
+        ('updated_at', 'DATETIME'),
+    ],
+    'donation': [
+        ('donor_name', 'VARCHAR(100)'),
+        ('transfer_proof', 'VARCHAR(255)'),
+        ('payment_method', 'VARCHAR(50)'),
+        ('is_anonymous', 'BOOLEAN DEFAULT 0'),
+        ('verified_by', 'INTEGER'),
+        ('verified_at', 'DATETIME'),
+        ('rejection_reason', 'TEXT'),
+    ],
+}
+
+BACKFILLS = [
+    Backfill(
+        'campaign_creator_id', 'campaign',
+        "UPDATE campaign SET creator_id = organizer_id "
+        "WHERE id BETWEEN :start_id AND :end_id AND creator_id IS NULL"
+    ),
+    Backfill(
+        'campaign_updated_at', 'campaign',
+        "UPDATE campaign SET updated_at = created_at "
+        "WHERE id BETWEEN :start_id AND :end_id AND updated_at IS NULL"
+    ),
+    Backfill(
+        'user_updated_at', 'user',
+        "UPDATE user SET updated_at = created_at "
+        "WHERE id BETWEEN :start_id AND :end_id AND updated_at IS NULL"
+    ),
+]
+
+def upgrade(conn):
+    for table, columns in COLUMNS.items():
+        add_missing_columns(conn, table, columns)
+
+    # Indexes skipped by 0001 because their columns did not exist yet
+    create_indexes(conn)
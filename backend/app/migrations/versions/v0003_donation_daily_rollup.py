@@ -0,0 +1,19 @@
+"""
+Daily donation rollup table for the admin time series, filled from the
+verified donations already in the database.
+"""
+from app.migrations import Backfill
+from app.utils.rollups import REBUILD_BATCH_SIZE, replace_campaign_range_sql
+
+VERSION = 3
+NAME = 'donation_daily_rollup'
+
+BACKFILLS = [
+    # Campaign by campaign, so verifications during an online run are counted once
+    Backfill('donation_daily_rollup_by_campaign', 'campaign', replace_campaign_range_sql, batch_size=REBUILD_BATCH_SIZE),
+]
+
+def upgrade(conn):
+    from app.models.models import DonationDailyRollup
+
+    DonationDailyRollup.__table__.create(conn, checkfirst=True)
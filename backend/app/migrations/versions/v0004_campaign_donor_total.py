@@ -0,0 +1,19 @@
+"""
+Per-campaign donor totals for the top donors leaderboard, filled from the
+verified donations already in the database.
+"""
+from app.migrations import Backfill
+from app.utils.leaderboards import REBUILD_BATCH_SIZE, REPLACE_CAMPAIGN_RANGE_SQL
+
+VERSION = 4
+NAME = 'campaign_donor_total'
+
+BACKFILLS = [
+    # Campaign by campaign, so verifications during an online run are counted once
+    Backfill('campaign_donor_total_by_campaign', 'campaign', REPLACE_CAMPAIGN_RANGE_SQL, batch_size=REBUILD_BATCH_SIZE),
+]
+
+def upgrade(conn):
+    from app.models.models import CampaignDonorTotal
+
+    CampaignDonorTotal.__table__.create(conn, checkfirst=True)
@@ -0,0 +1,22 @@
+"""
+Cached next milestone threshold on campaign, filled from the pending
+milestones already in the database, and the milestone index used to
+maintain it.
+"""
+from sqlalchemy import text
+from app.migrations import Backfill, add_missing_columns
+from app.utils.milestones import NEXT_MILESTONE_RANGE_SQL
+
+VERSION = 5
+NAME = 'next_milestone_amount'
+
+BACKFILLS = [
+    Backfill('campaign_next_milestone_amount', 'campaign', NEXT_MILESTONE_RANGE_SQL),
+]
+
+def upgrade(conn):
+    add_missing_columns(conn, 'campaign', [('next_milestone_amount', 'FLOAT')])
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_milestone_campaign_status_target "
+        "ON milestone (campaign_id, status, target_amount)"
+    ))
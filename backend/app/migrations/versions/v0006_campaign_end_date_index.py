@@ -0,0 +1,10 @@
+"""
+Index for the expired campaigns sweep (app.utils.lifecycle)
+"""
+from sqlalchemy import text
+
+VERSION = 6
+NAME = 'campaign_end_date_index'
+
+def upgrade(conn):
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_campaign_status_end_date ON campaign (status, end_date)"))
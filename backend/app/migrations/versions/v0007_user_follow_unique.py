@@ -0,0 +1,29 @@
+"""
+One follow per (user, campaign), enforced by a unique index, and the
+per-campaign follower counter filled from the existing follows.
+"""
+from sqlalchemy import text
+from app.migrations import Backfill, add_missing_columns
+from app.utils.follows import FOLLOWERS_COUNT_RANGE_SQL
+
+VERSION = 7
+NAME = 'user_follow_unique'
+
+BACKFILLS = [
+    Backfill('campaign_followers_count', 'campaign', FOLLOWERS_COUNT_RANGE_SQL),
+]
+
+def upgrade(conn):
+    add_missing_columns(conn, 'campaign', [('followers_count', 'INTEGER NOT NULL DEFAULT 0')])
+
+    # Keep the oldest of duplicate follows so the unique index can be built
+    conn.execute(text(
+        "DELETE FROM user_follow WHERE id NOT IN "
+        "(SELECT MIN(id) FROM user_follow GROUP BY user_id, campaign_id)"
+    ))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_user_follow_user_campaign ON user_follow (user_id, campaign_id)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_user_follow_campaign_user ON user_follow (campaign_id, user_id)"
+    ))
@@ -0,0 +1,17 @@
+"""
+Indexes for the followed campaigns feed (app.utils.feed): updates and
+achieved milestones of one campaign, newest first.
+"""
+from sqlalchemy import text
+
+VERSION = 8
+NAME = 'feed_indexes'
+
+INDEXES = [
+    ('campaign_update', 'ix_campaign_update_campaign_created', ['campaign_id', 'created_at']),
+    ('milestone', 'ix_milestone_campaign_achieved', ['campaign_id', 'achieved_at']),
+]
+
+def upgrade(conn):
+    for table, name, columns in INDEXES:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"))
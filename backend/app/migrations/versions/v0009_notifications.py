@@ -0,0 +1,15 @@
+"""
+Notifications: the fan-out job queue, the per-user notifications and the
+unread counter on user.
+"""
+from app.migrations import add_missing_columns
+
+VERSION = 9
+NAME = 'notifications'
+
+def upgrade(conn):
+    from app.models.models import Notification, NotificationJob
+
+    add_missing_columns(conn, 'user', [('unread_notifications', 'INTEGER NOT NULL DEFAULT 0')])
+    NotificationJob.__table__.create(conn, checkfirst=True)
+    Notification.__table__.create(conn, checkfirst=True)
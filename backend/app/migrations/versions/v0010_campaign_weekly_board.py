@@ -0,0 +1,12 @@
+"""
+Weekly campaign boards (most funded this week, fastest-growing), kept up
+to date on verification. The first verification of a day fills the day's
+board from the daily rollup, so there is nothing to backfill.
+"""
+VERSION = 10
+NAME = 'campaign_weekly_board'
+
+def upgrade(conn):
+    from app.models.models import CampaignWeeklyBoard
+
+    CampaignWeeklyBoard.__table__.create(conn, checkfirst=True)
@@ -13,6 +13,7 @@ class User(db.Model):
     phone_number = db.Column(db.String(20), nullable=True)
     is_active = db.Column(db.Boolean, default=True)
     is_verified = db.Column(db.Boolean, default=False)
+    unread_notifications = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # maintained by app.utils.notifications
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -46,6 +47,7 @@ class User(db.Model):
             'phone_number': self.phone_number,
             'is_active': self.is_active,
             'is_verified': self.is_verified,
+            'unread_notifications': self.unread_notifications or 0,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -64,6 +66,8 @@ class Campaign(db.Model):
     status = db.Column(db.String(20), default='pending')  # 'pending', 'active', 'completed', 'cancelled', 'rejected'
     is_featured = db.Column(db.Boolean, default=False)  # untuk kampanye unggulan
     is_urgent = db.Column(db.Boolean, default=False)  # untuk kampanye mendesak
+    followers_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # maintained by app.utils.follows
+    next_milestone_amount = db.Column(db.Float, nullable=True)  # target of the lowest pending milestone (app.utils.milestones)
     organizer_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # required field
     creator_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     approved_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)  # admin yang menyetujui
@@ -72,6 +76,15 @@ class Campaign(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Indexes matching the list/filter queries (see migrations v0001)
+    __table_args__ = (
+        db.Index('ix_campaign_status_featured_urgent_created', 'status', 'is_featured', 'is_urgent', 'created_at'),
+        db.Index('ix_campaign_category_status', 'category_id', 'status'),
+        db.Index('ix_campaign_creator_created', 'creator_id', 'created_at'),
+        db.Index('ix_campaign_created_at', 'created_at'),
+        db.Index('ix_campaign_status_end_date', 'status', 'end_date'),
+    )
+    
     # Relationships
     donations = db.relationship('Donation', backref='campaign', lazy=True)
     milestones = db.relationship('Milestone', backref='campaign', lazy=True)
@@ -103,57 +116,12 @@ class Campaign(db.Model):
     def image_url(self, value):
         self.image = value
     
-    # Temporary property for followers (not implemented yet)
-    @property
-    def followers(self):
-        return []  # TODO: Implement followers functionality
-    
     def to_dict(self):
-        try:
-            creator_name = self.creator.full_name if self.creator else None
-        except:
-            creator_name = None
-            
-        try:
-            approved_by_name = self.approved_by_user.full_name if self.approved_by and hasattr(self, 'approved_by_user') else None
-        except:
-            approved_by_name = None
-        
-        try:
-            category_data = self.category.to_dict() if self.category else None
-        except:
-            category_data = None
-            
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'target_amount': self.target_amount,
-            'current_amount': self.current_amount,
-            'image': self.image,
-            'image_url': self.image,  # for frontend compatibility
-            'category': category_data,
-            'start_date': self.start_date.isoformat() if self.start_date else None,
-            'end_date': self.end_date.isoformat() if self.end_date else None,
-            'status': self.status,
-            'is_featured': self.is_featured,
-            'is_urgent': self.is_urgent,
-            'creator_id': self.creator_id,
-            'creator_name': creator_name,
-            'approved_by': self.approved_by,
-            'approved_by_name': approved_by_name,
-            'approved_at': self.approved_at.isoformat() if self.approved_at else None,
-            'rejection_reason': self.rejection_reason,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'progress_percentage': round((self.current_amount / self.target_amount) * 100, 2) if self.target_amount > 0 else 0,
-            'donations_count': len(self.donations) if self.donations else 0,
-            # Frontend compatibility aliases
-            'goal_amount': self.target_amount,
-            'deadline': self.end_date.isoformat() if self.end_date else None,
-            'creator': {'name': creator_name} if creator_name else None,
-            'followers_count': len(self.followers) if hasattr(self, 'followers') and self.followers else 0
-        }
+        # One campaign shape for every API (see app/utils/campaign_queries.py).
+        # Lists go through CampaignQueryService.serialize_many: one donation
+        # count query for all of them instead of one per campaign
+        from app.utils.campaign_queries import CampaignQueryService
+        return CampaignQueryService(db.session).serialize(self)
 
 class Donation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -171,6 +139,14 @@ class Donation(db.Model):
     verified_at = db.Column(db.DateTime, nullable=True)
     rejection_reason = db.Column(db.Text, nullable=True)
     
+    # Indexes matching the list/filter queries (see migrations v0001)
+    __table_args__ = (
+        db.Index('ix_donation_campaign_status_created', 'campaign_id', 'status', 'created_at'),
+        db.Index('ix_donation_status_created', 'status', 'created_at'),
+        db.Index('ix_donation_donor_created', 'donor_id', 'created_at'),
+        db.Index('ix_donation_created_at', 'created_at'),
+    )
+    
     def to_dict(self):
         try:
             donor_name = self.donor.full_name if self.donor and not self.is_anonymous else (self.donor_name or 'Hamba Allah')
@@ -216,6 +192,11 @@ class Milestone(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     achieved_at = db.Column(db.DateTime, nullable=True)
     
+    __table_args__ = (
+        db.Index('ix_milestone_campaign_status_target', 'campaign_id', 'status', 'target_amount'),
+        db.Index('ix_milestone_campaign_achieved', 'campaign_id', 'achieved_at'),
+    )
+    
     def to_dict(self):
         try:
             campaign_title = self.campaign.title if self.campaign else None
@@ -244,6 +225,11 @@ class CampaignUpdate(db.Model):
     created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Updates of a campaign, newest first (campaign detail, followed campaigns feed)
+    __table_args__ = (
+        db.Index('ix_campaign_update_campaign_created', 'campaign_id', 'created_at'),
+    )
+    
     def to_dict(self):
         try:
             created_by_name = self.creator.full_name if hasattr(self, 'creator') and self.creator else None
@@ -287,9 +273,15 @@ class UserFollow(db.Model):
     campaign_id = db.Column(db.Integer, db.ForeignKey('campaign.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Relationship
-    user = db.relationship('User', backref='followed_campaigns')
-    campaign = db.relationship('Campaign', backref='followers')
+    # One row per follow (toggled by app.utils.follows); followers of a campaign for fan-out
+    __table_args__ = (
+        db.Index('ux_user_follow_user_campaign', 'user_id', 'campaign_id', unique=True),
+        db.Index('ix_user_follow_campaign_user', 'campaign_id', 'user_id'),
+    )
+    
+    # Relationship (dynamic: a user may follow thousands of campaigns)
+    user = db.relationship('User', backref=db.backref('followed_campaigns', lazy='dynamic'))
+    campaign = db.relationship('Campaign', backref=db.backref('followers', lazy='dynamic'))
     
     def to_dict(self):
         return {
@@ -298,3 +290,101 @@ class UserFollow(db.Model):
             'campaign_id': self.campaign_id,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+
+class DonationDailyRollup(db.Model):
+    """Verified donation totals per campaign per day (see app/utils/rollups.py)"""
+    __tablename__ = 'donation_daily_rollup'
+    day = db.Column(db.Date, primary_key=True)
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaign.id'), primary_key=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=True)
+    total_amount = db.Column(db.Float, nullable=False, default=0.0)
+    donation_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_donation_daily_rollup_category_day', 'category_id', 'day'),
+        db.Index('ix_donation_daily_rollup_campaign_day', 'campaign_id', 'day'),
+    )
+
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat() if self.day else None,
+            'campaign_id': self.campaign_id,
+            'category_id': self.category_id,
+            'total_amount': self.total_amount,
+            'donation_count': self.donation_count
+        }
+
+class CampaignDonorTotal(db.Model):
+    """Verified total per donor per campaign, for the top donors leaderboard"""
+    __tablename__ = 'campaign_donor_total'
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaign.id'), primary_key=True)
+    donor_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    total_amount = db.Column(db.Float, nullable=False, default=0.0)
+    donation_count = db.Column(db.Integer, nullable=False, default=0)
+    last_donation_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        # Top donors of a campaign: index range scan, no sort
+        db.Index('ix_campaign_donor_total_campaign_amount', 'campaign_id', 'total_amount'),
+    )
+
+class CampaignWeeklyBoard(db.Model):
+    """Verified totals of the week up to week_end and of the week before, per campaign (see app/utils/leaderboards.py)"""
+    __tablename__ = 'campaign_weekly_board'
+    week_end = db.Column(db.Date, primary_key=True)
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaign.id'), primary_key=True)
+    amount = db.Column(db.Float, nullable=False, default=0.0)
+    previous_amount = db.Column(db.Float, nullable=False, default=0.0)
+    growth = db.Column(db.Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        # Most funded and fastest-growing of a week: index range scans, no sort
+        db.Index('ix_campaign_weekly_board_week_amount', 'week_end', 'amount'),
+        db.Index('ix_campaign_weekly_board_week_growth', 'week_end', 'growth'),
+    )
+
+class NotificationJob(db.Model):
+    """A campaign event waiting to be fanned out to the followers (see app/utils/notifications.py)"""
+    __tablename__ = 'notification_job'
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # 'update', 'milestone'
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaign.id'), nullable=False)
+    source_id = db.Column(db.Integer, nullable=False)  # campaign_update.id or milestone.id
+    title = db.Column(db.String(200), nullable=False)
+    last_user_id = db.Column(db.Integer, nullable=False, default=0)  # followers up to here are notified
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        # Pending jobs, oldest first
+        db.Index('ix_notification_job_finished', 'finished_at', 'id'),
+    )
+
+class Notification(db.Model):
+    """A campaign update or achieved milestone, delivered to one follower"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaign.id'), nullable=False)
+    source_id = db.Column(db.Integer, nullable=False)
+    title = db.Column(db.String(200), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    read_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        # A user's notifications, newest first (keyset pagination on id)
+        db.Index('ix_notification_user_id', 'user_id', 'id'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'type': self.kind,
+            'campaign_id': self.campaign_id,
+            'source_id': self.source_id,
+            'title': self.title,
+            'is_read': self.read_at is not None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'read_at': self.read_at.isoformat() if self.read_at else None
+        }
@@ -1,7 +1,10 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models.models import User, Campaign, Donation, Category, CampaignUpdate, db
-from datetime import datetime
+from app.models.models import User, Campaign, Donation, Category, CampaignUpdate, DonationDailyRollup, db
+from app.utils import campaign_queries
+from app.utils.rollups import GROUPINGS, timeseries
+from datetime import date, datetime, timedelta
+from sqlalchemy import func
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -22,10 +25,13 @@ def get_pending_campaigns():
     if isinstance(admin_check, tuple):  # Error response
         return admin_check
     
-    campaigns = Campaign.query.filter_by(status='pending').order_by(Campaign.created_at.desc()).all()
+    service = campaign_queries.CampaignQueryService(db.session)
+    campaigns = db.session.execute(
+        service.list_query(status='pending').order_by(None).order_by(Campaign.created_at.desc())
+    ).scalars().all()
     
     return jsonify({
-        'campaigns': [campaign.to_dict() for campaign in campaigns]
+        'campaigns': service.serialize_many(campaigns)
     }), 200
 
 @admin_bp.route('/campaigns/<int:campaign_id>/approve', methods=['PUT'])
@@ -47,6 +53,7 @@ def approve_campaign(campaign_id):
     campaign.approved_at = datetime.utcnow()
     
     db.session.commit()
+    campaign_queries.clear_cache()
     
     return jsonify({
         'message': 'Campaign approved successfully',
@@ -76,6 +83,7 @@ def reject_campaign(campaign_id):
     campaign.approved_at = datetime.utcnow()
     
     db.session.commit()
+    campaign_queries.clear_cache()
     
     return jsonify({
         'message': 'Campaign rejected successfully',
@@ -95,6 +103,7 @@ def toggle_featured_campaign(campaign_id):
     
     campaign.is_featured = not campaign.is_featured
     db.session.commit()
+    campaign_queries.clear_cache()
     
     return jsonify({
         'message': f'Campaign {"featured" if campaign.is_featured else "unfeatured"} successfully',
@@ -116,12 +125,12 @@ def admin_dashboard():
     total_donations = Donation.query.count()
     pending_donations = Donation.query.filter_by(status='pending').count()
     
-    # Total amount donated
-    verified_donations = Donation.query.filter_by(status='verified').all()
-    total_donated = sum(donation.amount for donation in verified_donations)
+    # Total amount donated, summed from the daily rollup
+    total_donated = db.session.query(func.coalesce(func.sum(DonationDailyRollup.total_amount), 0.0)).scalar()
     
     # Recent activities
-    recent_campaigns = Campaign.query.order_by(Campaign.created_at.desc()).limit(5).all()
+    recent_campaigns = Campaign.query.options(*campaign_queries.eager_options())\
+        .order_by(Campaign.created_at.desc()).limit(5).all()
     recent_donations = Donation.query.order_by(Donation.created_at.desc()).limit(5).all()
     
     return jsonify({
@@ -134,10 +143,44 @@ def admin_dashboard():
             'pending_donations': pending_donations,
             'total_donated': total_donated
         },
-        'recent_campaigns': [campaign.to_dict() for campaign in recent_campaigns],
+        'recent_campaigns': campaign_queries.CampaignQueryService(db.session).serialize_many(recent_campaigns),
         'recent_donations': [donation.to_dict() for donation in recent_donations]
     }), 200
 
+@admin_bp.route('/stats/timeseries', methods=['GET'])
+@jwt_required()
+def get_donation_timeseries():
+    """Verified donation totals per day, from the daily rollup"""
+    admin_check = require_admin()
+    if isinstance(admin_check, tuple):  # Error response
+        return admin_check
+    
+    try:
+        end = date.fromisoformat(request.args['end']) if request.args.get('end') else datetime.utcnow().date()
+        start = date.fromisoformat(request.args['start']) if request.args.get('start') else end - timedelta(days=29)
+    except ValueError:
+        return jsonify({'error': 'start and end must be dates (YYYY-MM-DD)'}), 400
+    
+    if start > end:
+        return jsonify({'error': 'start must not be after end'}), 400
+    
+    group_by = request.args.get('group_by', 'day')
+    if group_by not in GROUPINGS:
+        return jsonify({'error': f"group_by must be one of: {', '.join(GROUPINGS)}"}), 400
+    
+    series = timeseries(
+        db.session, start, end, group_by=group_by,
+        campaign_id=request.args.get('campaign_id', type=int),
+        category_id=request.args.get('category_id', type=int)
+    )
+    
+    return jsonify({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'group_by': group_by,
+        'series': series
+    }), 200
+
 @admin_bp.route('/users', methods=['GET'])
 @jwt_required()
 def get_all_users():
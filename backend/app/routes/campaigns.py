@@ -1,19 +1,22 @@
-from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import desc, func
+from flask import Blueprint, Response, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from sqlalchemy import desc
 from app import db
-from app.models.models import Campaign, User, Donation, CampaignUpdate, Category
-from datetime import datetime
-import os
-from werkzeug.utils import secure_filename
+from app.models.models import Campaign, User, CampaignUpdate
+from app.utils import feed, notifications
+from app.utils.campaign_queries import CampaignError, CampaignQueryService
+from app.utils.follows import toggle_follow
+from app.utils.leaderboards import top_donors, weekly_leaderboards
+from app.utils.pubsub import campaign_events, campaign_progress, progress_message
+from app.utils.recent_donations import recent_donations
+from app.utils.uploads import IMAGE_KINDS, MAX_IMAGE_SIZE, FileField, UploadError, receive_upload, timestamped_name
+import queue
+import time
 
 campaigns_bp = Blueprint('campaigns', __name__)
 
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
-
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
 @campaigns_bp.route('', methods=['GET'])
 def get_campaigns():
     """Get all approved campaigns with filtering and pagination"""
@@ -25,137 +28,68 @@ def get_campaigns():
     featured = request.args.get('featured', type=bool)
     urgent = request.args.get('urgent', type=bool)
     
-    query = Campaign.query
-    
-    # Filter by status (public endpoint only shows active/approved campaigns by default)
-    if status == 'active':
-        query = query.filter(Campaign.status.in_(['active', 'approved']))
-    elif status == 'all':
-        # Only show all if explicitly requested (admin feature)
-        pass
-    else:
-        query = query.filter(Campaign.status == status)
-    
-    # Filter by category
-    if category_id:
-        query = query.filter(Campaign.category_id == category_id)
-    
-    # Filter by featured/urgent
-    if featured is not None:
-        query = query.filter(Campaign.is_featured == featured)
-    if urgent is not None:
-        query = query.filter(Campaign.is_urgent == urgent)
-    
-    # Search filter
-    if search:
-        query = query.filter(
-            db.or_(
-                Campaign.title.ilike(f'%{search}%'),
-                Campaign.description.ilike(f'%{search}%')
-            )
-        )
-    
-    # Order by featured first, then by urgency, then by creation date
-    query = query.order_by(
-        desc(Campaign.is_featured),
-        desc(Campaign.is_urgent),
-        desc(Campaign.created_at)
+    result = CampaignQueryService(db.session).list_campaigns(
+        page=page,
+        per_page=per_page,
+        status=status,
+        category_id=category_id,
+        featured=featured,
+        urgent=urgent,
+        search=search
     )
-    
-    campaigns = query.paginate(
-        page=page, 
-        per_page=per_page, 
-        error_out=False
-    )
-    
-    return jsonify({
-        'campaigns': [{
-            'id': campaign.id,
-            'title': campaign.title,
-            'description': campaign.description,
-            'goal_amount': campaign.goal_amount,
-            'current_amount': campaign.current_amount,
-            'image_url': campaign.image_url,
-            'status': campaign.status,
-            'is_featured': campaign.is_featured,
-            'is_urgent': campaign.is_urgent,
-            'deadline': campaign.deadline.isoformat() if campaign.deadline else None,
-            'created_at': campaign.created_at.isoformat(),
-            'updated_at': campaign.updated_at.isoformat(),
-            'creator': {
-                'id': campaign.creator.id,
-                'name': campaign.creator.full_name or campaign.creator.username,
-                'full_name': campaign.creator.full_name or campaign.creator.username,
-                'email': campaign.creator.email
-            },
-            'category': {
-                'id': campaign.category.id,
-                'name': campaign.category.name
-            } if campaign.category else None,
-            'progress_percentage': (campaign.current_amount / campaign.goal_amount * 100) if campaign.goal_amount > 0 else 0,
-            'donations_count': len(campaign.donations or []),
-            'followers_count': len(getattr(campaign, 'followers', []))
-        } for campaign in campaigns.items],
-        'pagination': {
-            'page': campaigns.page,
-            'pages': campaigns.pages,
-            'per_page': campaigns.per_page,
-            'total': campaigns.total,
-            'has_next': campaigns.has_next,
-            'has_prev': campaigns.has_prev
-        }
-    })
+    return jsonify(result)
+
+def current_viewer():
+    """The signed-in user, or None: an expired or malformed token is an anonymous visitor"""
+    try:
+        verify_jwt_in_request(optional=True)
+    except (JWTExtendedException, PyJWTError):
+        return None
+    current_user_id = get_jwt_identity()
+    return db.session.get(User, int(current_user_id)) if current_user_id else None
 
 @campaigns_bp.route('/<int:campaign_id>', methods=['GET'])
 def get_campaign(campaign_id):
-    """Get a specific campaign with full details"""
-    campaign = Campaign.query.get_or_404(campaign_id)
+    """Get a specific campaign with full details (public)"""
+    service = CampaignQueryService(db.session)
+    user = current_viewer()
     
-    # Only show approved or active campaigns to non-admin users
-    if campaign.status not in ['approved', 'active']:
+    # Only approved or active campaigns, unless the viewer created it or is an admin
+    campaign = service.get_visible_campaign(campaign_id, user)
+    if not campaign:
         return jsonify({'error': 'Campaign not found or not approved'}), 404
     
+    updates = CampaignUpdate.query.filter_by(campaign_id=campaign_id)\
+        .order_by(desc(CampaignUpdate.created_at)).limit(5).all()  # Last 5 updates
+    
     return jsonify({
-        'id': campaign.id,
-        'title': campaign.title,
-        'description': campaign.description,
-        'goal_amount': campaign.goal_amount,
-        'current_amount': campaign.current_amount,
-        'image_url': campaign.image_url,
-        'status': campaign.status,
-        'is_featured': campaign.is_featured,
-        'is_urgent': campaign.is_urgent,
-        'deadline': campaign.deadline.isoformat() if campaign.deadline else None,
-        'created_at': campaign.created_at.isoformat(),
-        'updated_at': campaign.updated_at.isoformat(),
-        'creator': {
-            'id': campaign.creator.id,
-            'name': campaign.creator.full_name or campaign.creator.username,
-            'full_name': campaign.creator.full_name or campaign.creator.username,
-            'email': campaign.creator.email
-        } if campaign.creator else None,
-        'category': {
-            'id': campaign.category.id,
-            'name': campaign.category.name
-        } if campaign.category else None,
-        'progress_percentage': (campaign.current_amount / campaign.goal_amount * 100) if campaign.goal_amount > 0 else 0,
-        'donations_count': len(campaign.donations or []),
-        'followers_count': len(getattr(campaign, 'followers', [])),
-        'recent_donations': [{
-            'id': donation.id,
-            'amount': donation.amount,
-            'donor_name': (donation.donor.full_name if donation.donor else 'Anonymous') if not getattr(donation, 'is_anonymous', False) else 'Anonymous',
-            'message': donation.message,
-            'created_at': donation.created_at.isoformat()
-        } for donation in (campaign.donations or [])[-10:]],  # Last 10 donations
+        **service.serialize(campaign),
+        'recent_donations': recent_donations(db.session, campaign),
+        'top_donors': top_donors(db.session, campaign.id, limit=5),
         'updates': [{
             'id': update.id,
             'title': update.title,
             'content': update.content,
             'created_at': update.created_at.isoformat()
-        } for update in (campaign.updates.order_by(desc(CampaignUpdate.created_at)).limit(5) if hasattr(campaign, 'updates') else [])]  # Last 5 updates
+        } for update in updates]
+    })
+
+@campaigns_bp.route('/<int:campaign_id>/top-donors', methods=['GET'])
+def get_top_donors(campaign_id):
+    """Donors with the highest verified total for a campaign"""
+    Campaign.query.get_or_404(campaign_id)
+    limit = min(request.args.get('limit', 10, type=int), 100)
+    
+    return jsonify({
+        'top_donors': top_donors(db.session, campaign_id, limit=limit)
     })
 
+@campaigns_bp.route('/leaderboards', methods=['GET'])
+def get_leaderboards():
+    """Most funded this week and fastest-growing campaigns"""
+    limit = min(request.args.get('limit', 10, type=int), 100)
+    return jsonify(weekly_leaderboards(db.session, limit=limit))
+
 @campaigns_bp.route('', methods=['POST'])
 @jwt_required()
 def create_campaign():
@@ -167,54 +101,7 @@ def create_campaign():
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = ['title', 'description', 'goal_amount']
-        for field in required_fields:
-            if not data.get(field):
-                return jsonify({'error': f'Missing required field: {field}'}), 400
-        
-        # Validate goal amount
-        try:
-            goal_amount = float(data['goal_amount'])
-            if goal_amount <= 0:
-                return jsonify({'error': 'Goal amount must be greater than 0'}), 400
-        except (ValueError, TypeError):
-            return jsonify({'error': 'Invalid goal amount'}), 400
-        
-        # Validate deadline if provided
-        deadline = None
-        if data.get('deadline'):
-            try:
-                deadline = datetime.fromisoformat(data['deadline'].replace('Z', '+00:00'))
-                if deadline <= datetime.now():
-                    return jsonify({'error': 'Deadline must be in the future'}), 400
-            except ValueError:
-                return jsonify({'error': 'Invalid deadline format'}), 400
-        
-        # Validate category if provided
-        category = None
-        if data.get('category_id'):
-            category = Category.query.get(data['category_id'])
-            if not category:
-                return jsonify({'error': 'Invalid category'}), 400
-        
-        # Create new campaign
-        campaign = Campaign(
-            title=data['title'],
-            description=data['description'],
-            target_amount=goal_amount,
-            organizer_id=current_user_id,  # Set the required organizer_id
-            creator_id=current_user_id,
-            category_id=data.get('category_id'),
-            deadline=deadline,
-            image_url=data.get('image_url'),
-            status='pending'  # All new campaigns start as pending
-        )
-        
-        db.session.add(campaign)
-        db.session.commit()
+        campaign = CampaignQueryService(db.session).create_campaign(user, request.get_json() or {})
         
         return jsonify({
             'message': 'Campaign created successfully and is pending approval',
@@ -226,6 +113,8 @@ def create_campaign():
             }
         }), 201
         
+    except CampaignError as e:
+        return jsonify({'error': e.message}), e.status
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Error creating campaign: {str(e)}")
@@ -240,52 +129,7 @@ def update_campaign(campaign_id):
         user = User.query.get(current_user_id)
         campaign = Campaign.query.get_or_404(campaign_id)
         
-        # Check permissions
-        if campaign.creator_id != current_user_id and user.role != 'admin':
-            return jsonify({'error': 'Unauthorized to update this campaign'}), 403
-        
-        data = request.get_json()
-        
-        # Update allowed fields
-        if 'title' in data:
-            campaign.title = data['title']
-        if 'description' in data:
-            campaign.description = data['description']
-        if 'image_url' in data:
-            campaign.image_url = data['image_url']
-        
-        # Only creator can update goal amount and deadline
-        if campaign.creator_id == current_user_id:
-            if 'goal_amount' in data:
-                try:
-                    goal_amount = float(data['goal_amount'])
-                    if goal_amount <= 0:
-                        return jsonify({'error': 'Goal amount must be greater than 0'}), 400
-                    campaign.goal_amount = goal_amount
-                except (ValueError, TypeError):
-                    return jsonify({'error': 'Invalid goal amount'}), 400
-            
-            if 'deadline' in data and data['deadline']:
-                try:
-                    deadline = datetime.fromisoformat(data['deadline'].replace('Z', '+00:00'))
-                    if deadline <= datetime.now():
-                        return jsonify({'error': 'Deadline must be in the future'}), 400
-                    campaign.deadline = deadline
-                except ValueError:
-                    return jsonify({'error': 'Invalid deadline format'}), 400
-        
-        # Update category if provided
-        if 'category_id' in data:
-            if data['category_id']:
-                category = Category.query.get(data['category_id'])
-                if not category:
-                    return jsonify({'error': 'Invalid category'}), 400
-                campaign.category_id = data['category_id']
-            else:
-                campaign.category_id = None
-        
-        campaign.updated_at = datetime.utcnow()
-        db.session.commit()
+        CampaignQueryService(db.session).update_campaign(campaign, user, request.get_json() or {})
         
         return jsonify({
             'message': 'Campaign updated successfully',
@@ -298,6 +142,8 @@ def update_campaign(campaign_id):
             }
         })
         
+    except CampaignError as e:
+        return jsonify({'error': e.message}), e.status
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Error updating campaign: {str(e)}")
@@ -308,8 +154,10 @@ def update_campaign(campaign_id):
 def create_campaign_update(campaign_id):
     """Create a campaign update (only by creator)"""
     try:
-        current_user_id = get_jwt_identity()
-        campaign = Campaign.query.get_or_404(campaign_id)
+        current_user_id = int(get_jwt_identity())
+        campaign = Campaign.query.get(campaign_id)
+        if not campaign:
+            return jsonify({'error': 'Campaign not found'}), 404
         
         # Check permissions
         if campaign.creator_id != current_user_id:
@@ -325,11 +173,16 @@ def create_campaign_update(campaign_id):
         update = CampaignUpdate(
             campaign_id=campaign_id,
             title=data['title'],
-            content=data['content']
+            content=data['content'],
+            created_by=current_user_id
         )
         
         db.session.add(update)
+        db.session.flush()
+        notifications.enqueue(db.session, 'update', campaign_id, update.id, update.title)
         db.session.commit()
+        feed.clear_cache()
+        notifications.wake_worker()
         
         return jsonify({
             'message': 'Campaign update posted successfully',
@@ -346,31 +199,62 @@ def create_campaign_update(campaign_id):
         current_app.logger.error(f"Error creating campaign update: {str(e)}")
         return jsonify({'error': 'Failed to create campaign update'}), 500
 
+@campaigns_bp.route('/<int:campaign_id>/stream', methods=['GET'])
+def stream_campaign(campaign_id):
+    """
+    Server-Sent Events with the campaign progress, pushed on every verified
+    donation. A stream ends after SSE_STREAM_SECONDS and the browser
+    reconnects (getting a fresh snapshot), so a sync worker thread is only
+    held for that long.
+    """
+    campaign = Campaign.query.get_or_404(campaign_id)
+    
+    if campaign_events.subscriber_count() >= current_app.config.get('SSE_MAX_SUBSCRIBERS', 1000):
+        return jsonify({'error': 'Too many live connections, try again later'}), 503
+    
+    # Read everything up front: the stream holds no database connection
+    snapshot = campaign_progress(campaign)
+    keepalive = current_app.config.get('SSE_KEEPALIVE_SECONDS', 15)
+    closes_at = time.monotonic() + current_app.config.get('SSE_STREAM_SECONDS', 60)
+    
+    def events():
+        with campaign_events.subscribe(campaign_id) as subscriber:
+            yield progress_message(snapshot, retry=True)
+            while True:
+                remaining = closes_at - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    event = subscriber.get(timeout=min(keepalive, remaining))
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield progress_message(event)
+    
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @campaigns_bp.route('/<int:campaign_id>/follow', methods=['POST'])
 @jwt_required()
 def follow_campaign(campaign_id):
     """Follow/unfollow a campaign"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        campaign = Campaign.query.get_or_404(campaign_id)
-        
-        # Check if already following
-        if campaign in user.followed_campaigns:
-            user.followed_campaigns.remove(campaign)
-            message = 'Campaign unfollowed successfully'
-            is_following = False
-        else:
-            user.followed_campaigns.append(campaign)
-            message = 'Campaign followed successfully'
-            is_following = True
+        current_user_id = int(get_jwt_identity())
+        campaign = Campaign.query.get(campaign_id)
+        if not campaign:
+            return jsonify({'error': 'Campaign not found'}), 404
         
+        # One indexed DELETE or INSERT, however many campaigns the user follows
+        is_following = toggle_follow(db.session, current_user_id, campaign_id)
         db.session.commit()
+        feed.forget(current_user_id)
         
         return jsonify({
-            'message': message,
+            'message': 'Campaign followed successfully' if is_following else 'Campaign unfollowed successfully',
             'is_following': is_following,
-            'followers_count': len(campaign.followers)
+            'followers_count': campaign.followers_count
         })
         
     except Exception as e:
@@ -386,34 +270,13 @@ def get_my_campaigns():
     page = request.args.get('page', 1, type=int)
     per_page = min(request.args.get('per_page', 10, type=int), 100)
     
-    campaigns = Campaign.query.filter_by(creator_id=current_user_id)\
-        .order_by(desc(Campaign.created_at))\
-        .paginate(page=page, per_page=per_page, error_out=False)
-    
-    return jsonify({
-        'campaigns': [{
-            'id': campaign.id,
-            'title': campaign.title,
-            'description': campaign.description,
-            'goal_amount': campaign.goal_amount,
-            'current_amount': campaign.current_amount,
-            'status': campaign.status,
-            'is_featured': campaign.is_featured,
-            'is_urgent': campaign.is_urgent,
-            'created_at': campaign.created_at.isoformat(),
-            'updated_at': campaign.updated_at.isoformat(),
-            'progress_percentage': (campaign.current_amount / campaign.goal_amount * 100) if campaign.goal_amount > 0 else 0,
-            'donations_count': len(campaign.donations)
-        } for campaign in campaigns.items],
-        'pagination': {
-            'page': campaigns.page,
-            'pages': campaigns.pages,
-            'per_page': campaigns.per_page,
-            'total': campaigns.total,
-            'has_next': campaigns.has_next,
-            'has_prev': campaigns.has_prev
-        }
-    })
+    result = CampaignQueryService(db.session).list_campaigns(
+        page=page,
+        per_page=per_page,
+        status='all',
+        creator_id=int(current_user_id)
+    )
+    return jsonify(result)
 
 @campaigns_bp.route('/categories', methods=['GET'])
 def get_categories():
@@ -443,35 +306,22 @@ def get_categories():
 def upload_campaign_image():
     """Upload campaign image"""
     try:
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file provided'}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
-        
-        if not allowed_file(file.filename):
-            return jsonify({'error': 'Invalid file type. Only PNG, JPG, JPEG, and GIF are allowed'}), 400
-        
-        # Generate secure filename
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_')
-        filename = timestamp + filename
-        
-        # Save file
-        upload_path = os.path.join(current_app.config['UPLOAD_FOLDER'], 'campaigns')
-        os.makedirs(upload_path, exist_ok=True)
-        file_path = os.path.join(upload_path, filename)
-        file.save(file_path)
+        image = FileField(IMAGE_KINDS, MAX_IMAGE_SIZE, directory='campaigns', name=timestamped_name)
+        with receive_upload({'file': image}) as upload:
+            if 'file' not in upload.files:
+                return jsonify({'error': 'No file provided'}), 400
+            upload.keep()
         
         # Return URL
-        image_url = f"/static/uploads/campaigns/{filename}"
+        image_url = f"/static/{upload.files['file'].relative_path}"
         
         return jsonify({
             'message': 'Image uploaded successfully',
             'image_url': image_url
         })
         
+    except UploadError as e:
+        return jsonify({'error': e.message}), e.status
     except Exception as e:
         current_app.logger.error(f"Error uploading image: {str(e)}")
         return jsonify({'error': 'Failed to upload image'}), 500
@@ -1,87 +1,56 @@
-import os
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from werkzeug.utils import secure_filename
+from sqlalchemy import update
 from app.models.models import User, Campaign, Donation, Milestone, db
+from app.utils import campaign_queries, feed, leaderboards, notifications, recent_donations
+from app.utils.campaign_queries import CampaignError, CampaignQueryService
+from app.utils.milestones import milestone_added, record_progress, refresh_next_milestone
+from app.utils.pubsub import campaign_events, campaign_progress
+from app.utils.rollups import record_verified_donation
+from app.utils.uploads import IMAGE_KINDS, MAX_IMAGE_SIZE, MAX_PROOF_SIZE, PROOF_KINDS, FileField, UploadError, receive_upload
 from datetime import datetime
-import uuid
 
 donations_bp = Blueprint('donations', __name__)
 
-# Helper function to check if a file has an allowed extension
-def allowed_file(filename):
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf'}
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
-# Helper function to save file with unique name
-def save_file(file):
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        unique_filename = f"{uuid.uuid4()}_{filename}"
-        file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], unique_filename)
-        file.save(file_path)
-        return os.path.join('uploads', unique_filename)
-    return None
-
 # Campaign Routes
 @donations_bp.route('/campaigns', methods=['GET'])
 def get_campaigns():
-    status = request.args.get('status')
-    category = request.args.get('category')
-    featured = request.args.get('featured')
-    search = request.args.get('search')
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 12, type=int)
     
-    query = Campaign.query
-    
-    # Filter by status - default to only show active campaigns for public
-    if status:
-        query = query.filter_by(status=status)
-    else:
-        query = query.filter_by(status='active')
-    
-    if category:
-        query = query.filter_by(category=category)
-    
-    if featured == 'true':
-        query = query.filter_by(is_featured=True)
-    
-    if search:
-        query = query.filter(
-            Campaign.title.contains(search) |
-            Campaign.description.contains(search)
-        )
-    
-    # Order by featured campaigns first, then by creation date
-    query = query.order_by(Campaign.is_featured.desc(), Campaign.created_at.desc())
-    
-    campaigns = query.paginate(page=page, per_page=per_page, error_out=False)
+    # Same query and campaign shape as /api/campaigns, in this API's envelope
+    result = CampaignQueryService(db.session).list_campaigns(
+        page=page,
+        per_page=per_page,
+        status=request.args.get('status') or 'active',
+        category=request.args.get('category'),
+        featured=True if request.args.get('featured') == 'true' else None,
+        search=request.args.get('search')
+    )
     
     return jsonify({
-        'campaigns': [campaign.to_dict() for campaign in campaigns.items],
-        'total': campaigns.total,
-        'pages': campaigns.pages,
+        'campaigns': result['campaigns'],
+        'total': result['pagination']['total'],
+        'pages': result['pagination']['pages'],
         'current_page': page
     }), 200
 
 @donations_bp.route('/campaigns/<int:campaign_id>', methods=['GET'])
 def get_campaign(campaign_id):
-    campaign = Campaign.query.get(campaign_id)
+    service = CampaignQueryService(db.session)
+    campaign = service.get_campaign(campaign_id)
     
     if not campaign:
         return jsonify({'error': 'Campaign not found'}), 404
     
-    # Get donations for this campaign
-    donations = Donation.query.filter_by(campaign_id=campaign_id, status='verified').all()
-    
     # Get milestones for this campaign
     milestones = Milestone.query.filter_by(campaign_id=campaign_id).all()
     
+    # The newest verified donations, as on /api/campaigns/<id>; the full
+    # list is /campaigns/<id>/donations
     return jsonify({
-        'campaign': campaign.to_dict(),
-        'donations': [donation.to_dict() for donation in donations],
+        'campaign': service.serialize(campaign),
+        'donations': recent_donations.recent_donations(db.session, campaign),
         'milestones': [milestone.to_dict() for milestone in milestones]
     }), 200
 
@@ -94,53 +63,31 @@ def create_campaign():
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
-    # Process form data
-    title = request.form.get('title')
-    description = request.form.get('description')
-    target_amount = request.form.get('target_amount')
-    end_date = request.form.get('end_date')
-    category = request.form.get('category')
-    
-    # Validate required fields
-    if not title or not description or not target_amount:
-        return jsonify({'error': 'Missing required fields'}), 400
-    
     try:
-        target_amount = float(target_amount)
-        if target_amount <= 0:
-            return jsonify({'error': 'Target amount must be greater than 0'}), 400
-    except ValueError:
-        return jsonify({'error': 'Target amount must be a valid number'}), 400
-    
-    # Process campaign image
-    image_path = None
-    if 'image' in request.files:
-        image_path = save_file(request.files['image'])
-    
-    # Create new campaign with pending status
-    new_campaign = Campaign(
-        title=title,
-        description=description,
-        target_amount=target_amount,
-        image=image_path,
-        category=category,
-        creator_id=current_user_id,
-        status='pending'  # All new campaigns start as pending
-    )
-    
-    # Set end date if provided
-    if end_date:
+        upload = receive_upload({'image': FileField(IMAGE_KINDS, MAX_IMAGE_SIZE)})
+    except UploadError as e:
+        return jsonify({'error': e.message}), e.status
+    
+    with upload:
+        fields = {
+            'title': upload.form.get('title'),
+            'description': upload.form.get('description'),
+            'goal_amount': upload.form.get('target_amount'),
+            'deadline': upload.form.get('end_date'),
+            'category': upload.form.get('category')
+        }
+        if 'image' in upload.files:
+            fields['image_url'] = upload.files['image'].relative_path
+        
         try:
-            new_campaign.end_date = datetime.fromisoformat(end_date)
-        except ValueError:
-            pass
-    
-    db.session.add(new_campaign)
-    db.session.commit()
+            new_campaign = CampaignQueryService(db.session).create_campaign(user, fields)
+        except CampaignError as e:
+            return jsonify({'error': e.message}), e.status
+        upload.keep()
     
     return jsonify({
         'message': 'Campaign created successfully and is pending approval',
-        'campaign': new_campaign.to_dict()
+        'campaign': CampaignQueryService(db.session).serialize(new_campaign)
     }), 201
 
 @donations_bp.route('/campaigns/<int:campaign_id>', methods=['PUT'])
@@ -153,53 +100,33 @@ def update_campaign(campaign_id):
     if not campaign:
         return jsonify({'error': 'Campaign not found'}), 404
     
-    # Check if user is the creator or admin
-    if campaign.creator_id != current_user_id and user.role != 'admin':
+    # Check if user is the creator or admin (before receiving the upload)
+    service = CampaignQueryService(db.session)
+    if not service.can_edit(campaign, user):
         return jsonify({'error': 'Unauthorized. Only the campaign creator or admin can update it'}), 403
     
-    # Update fields if provided
-    if 'title' in request.form:
-        campaign.title = request.form.get('title')
-    
-    if 'description' in request.form:
-        campaign.description = request.form.get('description')
-    
-    if 'target_amount' in request.form:
-        try:
-            target_amount = float(request.form.get('target_amount'))
-            if target_amount <= 0:
-                return jsonify({'error': 'Target amount must be greater than 0'}), 400
-            campaign.target_amount = target_amount
-        except ValueError:
-            return jsonify({'error': 'Target amount must be a valid number'}), 400
-    
-    if 'end_date' in request.form:
+    try:
+        upload = receive_upload({'image': FileField(IMAGE_KINDS, MAX_IMAGE_SIZE)})
+    except UploadError as e:
+        return jsonify({'error': e.message}), e.status
+    
+    with upload:
+        # Form field names of this API
+        names = {'title': 'title', 'description': 'description', 'target_amount': 'goal_amount',
+                 'end_date': 'deadline', 'category': 'category', 'status': 'status'}
+        fields = {field: upload.form.get(name) for name, field in names.items() if name in upload.form}
+        if 'image' in upload.files:
+            fields['image_url'] = upload.files['image'].relative_path
+        
         try:
-            campaign.end_date = datetime.fromisoformat(request.form.get('end_date'))
-        except ValueError:
-            pass
-    
-    if 'category' in request.form:
-        campaign.category = request.form.get('category')
-    
-    # Only admin can change status
-    if 'status' in request.form and user.role == 'admin':
-        status = request.form.get('status')
-        if status in ['pending', 'active', 'completed', 'cancelled', 'rejected']:
-            campaign.status = status
-    
-    # Update image if provided
-    if 'image' in request.files:
-        image_path = save_file(request.files['image'])
-        if image_path:
-            campaign.image = image_path
-    
-    campaign.updated_at = datetime.utcnow()
-    db.session.commit()
+            service.update_campaign(campaign, user, fields)
+        except CampaignError as e:
+            return jsonify({'error': e.message}), e.status
+        upload.keep()
     
     return jsonify({
         'message': 'Campaign updated successfully',
-        'campaign': campaign.to_dict()
+        'campaign': service.serialize(campaign)
     }), 200
 
 # Donation Routes
@@ -208,62 +135,78 @@ def update_campaign(campaign_id):
 def create_donation():
     current_user_id = get_jwt_identity()
     
-    # Process form data
-    campaign_id = request.form.get('campaign_id')
-    amount = request.form.get('amount')
-    message = request.form.get('message', '')
-    donor_name = request.form.get('donor_name', '')
-    payment_method = request.form.get('payment_method', 'bank_transfer')
-    is_anonymous = request.form.get('is_anonymous', 'false').lower() == 'true'
-    
-    # Validate required fields
-    if not campaign_id or not amount:
-        return jsonify({'error': 'Campaign ID and amount are required'}), 400
-    
+    # The transfer proof is checked and stored while the body streams in
     try:
-        amount = float(amount)
-        if amount <= 0:
-            return jsonify({'error': 'Amount must be greater than 0'}), 400
-    except ValueError:
-        return jsonify({'error': 'Amount must be a valid number'}), 400
-    
-    # Check if campaign exists and is active
-    campaign = Campaign.query.get(campaign_id)
-    if not campaign:
-        return jsonify({'error': 'Campaign not found'}), 404
-    
-    if campaign.status != 'active':
-        return jsonify({'error': 'Cannot donate to inactive campaigns'}), 400
-    
-    # For anonymous donations, require donor name if not logged in
-    if not current_user_id and not donor_name:
-        return jsonify({'error': 'Donor name is required for anonymous donations'}), 400
-    
-    # Process transfer proof
-    transfer_proof = None
-    if 'transfer_proof' in request.files:
-        transfer_proof = save_file(request.files['transfer_proof'])
-    
-    # Create new donation
-    new_donation = Donation(
-        amount=amount,
-        message=message,
-        donor_name=donor_name if not current_user_id else None,
-        transfer_proof=transfer_proof,
-        payment_method=payment_method,
-        is_anonymous=is_anonymous,
-        donor_id=current_user_id,
-        campaign_id=campaign_id
-    )
-    
-    db.session.add(new_donation)
-    db.session.commit()
-    
+        upload = receive_upload({'transfer_proof': FileField(PROOF_KINDS, MAX_PROOF_SIZE)})
+    except UploadError as e:
+        return jsonify({'error': e.message}), e.status
+    
+    with upload:
+        # Process form data
+        campaign_id = upload.form.get('campaign_id')
+        amount = upload.form.get('amount')
+        message = upload.form.get('message', '')
+        donor_name = upload.form.get('donor_name', '')
+        payment_method = upload.form.get('payment_method', 'bank_transfer')
+        is_anonymous = upload.form.get('is_anonymous', 'false').lower() == 'true'
+        
+        # Validate required fields
+        if not campaign_id or not amount:
+            return jsonify({'error': 'Campaign ID and amount are required'}), 400
+        
+        try:
+            amount = float(amount)
+            if amount <= 0:
+                return jsonify({'error': 'Amount must be greater than 0'}), 400
+        except ValueError:
+            return jsonify({'error': 'Amount must be a valid number'}), 400
+        
+        # Check if campaign exists and is active
+        campaign = Campaign.query.get(campaign_id)
+        if not campaign:
+            return jsonify({'error': 'Campaign not found'}), 404
+        
+        if campaign.status != 'active':
+            return jsonify({'error': 'Cannot donate to inactive campaigns'}), 400
+        
+        # For anonymous donations, require donor name if not logged in
+        if not current_user_id and not donor_name:
+            return jsonify({'error': 'Donor name is required for anonymous donations'}), 400
+        
+        # Process transfer proof
+        transfer_proof = None
+        if 'transfer_proof' in upload.files:
+            transfer_proof = upload.files['transfer_proof'].relative_path
+        
+        # Create new donation
+        new_donation = Donation(
+            amount=amount,
+            message=message,
+            donor_name=donor_name if not current_user_id else None,
+            transfer_proof=transfer_proof,
+            payment_method=payment_method,
+            is_anonymous=is_anonymous,
+            donor_id=current_user_id,
+            campaign_id=campaign_id
+        )
+        
+        db.session.add(new_donation)
+        db.session.commit()
+        upload.keep()
+        
     return jsonify({
         'message': 'Donation created successfully. Please wait for verification.',
         'donation': new_donation.to_dict()
     }), 201
 
+def claim_unverified(donation, status):
+    """Set the status of a donation that is not verified yet; False if it already is"""
+    return db.session.execute(
+        update(Donation)
+        .where(Donation.id == donation.id, Donation.status != 'verified')
+        .values(status=status)
+    ).rowcount == 1
+
 @donations_bp.route('/<int:donation_id>/verify', methods=['PUT'])
 @jwt_required()
 def verify_donation(donation_id):
@@ -285,7 +228,11 @@ def verify_donation(donation_id):
     if status not in ['verified', 'rejected']:
         return jsonify({'error': 'Invalid status. Must be verified or rejected'}), 400
     
-    donation.status = status
+    # A verified donation is already counted in the campaign total, the
+    # rollup and the donor totals. The guarded UPDATE also stops two
+    # concurrent verifications of the same donation from counting it twice.
+    if not claim_unverified(donation, status):
+        return jsonify({'error': 'Donation is already verified'}), 409
     donation.verified_by = current_user_id
     
     if status == 'verified':
@@ -295,25 +242,31 @@ def verify_donation(donation_id):
         campaign = Campaign.query.get(donation.campaign_id)
         campaign.current_amount += donation.amount
         
-        # Check if any milestones have been achieved
-        milestones = Milestone.query.filter_by(
-            campaign_id=campaign.id, 
-            status='pending'
-        ).order_by(Milestone.target_amount.asc()).all()
-        
-        for milestone in milestones:
-            if campaign.current_amount >= milestone.target_amount:
-                milestone.status = 'achieved'
-                milestone.achieved_at = datetime.utcnow()
+        # Achieve the milestones crossed by the new total (no query unless a threshold was crossed)
+        achieved = record_progress(db.session, campaign, donation.verified_at)
+        for milestone_id, title in achieved:
+            notifications.enqueue(db.session, 'milestone', campaign.id, milestone_id, title)
         
         # Check if campaign target has been reached
         if campaign.current_amount >= campaign.target_amount and campaign.status == 'active':
             campaign.status = 'completed'
+        
+        record_verified_donation(db.session, donation, campaign)
+        leaderboards.record_verified_donation(db.session, donation)
             
     elif status == 'rejected':
         donation.rejection_reason = rejection_reason
     
     db.session.commit()
+    if status == 'verified':
+        campaign_queries.clear_cache()
+        if achieved:
+            feed.clear_cache()
+            notifications.wake_worker()
+        recent_donations.record_verified(donation, campaign, donation.donor)
+        campaign_events.publish(campaign.id, campaign_progress(campaign))
+    else:
+        recent_donations.forget(donation.campaign_id)
     
     return jsonify({
         'message': f'Donation {status} successfully',
@@ -337,11 +290,13 @@ def reject_donation(donation_id):
     data = request.json
     rejection_reason = data.get('rejection_reason', 'No reason provided')
     
-    donation.status = 'rejected'
+    if not claim_unverified(donation, 'rejected'):
+        return jsonify({'error': 'Donation is already verified'}), 409
     donation.rejection_reason = rejection_reason
     donation.verified_by = current_user_id
     
     db.session.commit()
+    recent_donations.forget(donation.campaign_id)
     
     return jsonify({
         'message': 'Donation rejected successfully',
@@ -360,7 +315,7 @@ def create_milestone(campaign_id):
         return jsonify({'error': 'Campaign not found'}), 404
     
     # Check if user is the organizer
-    if campaign.creator_id != current_user_id:
+    if campaign.creator_id != int(current_user_id):
         return jsonify({'error': 'Unauthorized. Only the campaign organizer can add milestones'}), 403
     
     data = request.json
@@ -387,8 +342,15 @@ def create_milestone(campaign_id):
         new_milestone.status = 'achieved'
         new_milestone.achieved_at = datetime.utcnow()
     
+    milestone_added(campaign, new_milestone)
     db.session.add(new_milestone)
+    if new_milestone.achieved_at:
+        db.session.flush()
+        notifications.enqueue(db.session, 'milestone', campaign_id, new_milestone.id, new_milestone.title)
     db.session.commit()
+    if new_milestone.achieved_at:
+        feed.clear_cache()
+        notifications.wake_worker()
     
     return jsonify({
         'message': 'Milestone created successfully',
@@ -405,7 +367,7 @@ def update_milestone(campaign_id, milestone_id):
         return jsonify({'error': 'Campaign not found'}), 404
     
     # Check if user is the organizer
-    if campaign.creator_id != current_user_id:
+    if campaign.creator_id != int(current_user_id):
         return jsonify({'error': 'Unauthorized. Only the campaign organizer can update milestones'}), 403
     
     milestone = Milestone.query.get(milestone_id)
@@ -422,6 +384,8 @@ def update_milestone(campaign_id, milestone_id):
             
             if status == 'completed':
                 milestone.achieved_at = datetime.utcnow()
+            
+            refresh_next_milestone(db.session, campaign)
     
     db.session.commit()
     
@@ -1,28 +1,13 @@
-import os
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from werkzeug.utils import secure_filename
 from app.models.models import User, db
-import uuid
+from app.utils import notifications
+from app.utils.campaign_queries import CampaignQueryService, eager_options
+from app.utils.feed import DEFAULT_PAGE_SIZE, user_feed
+from app.utils.uploads import IMAGE_KINDS, MAX_IMAGE_SIZE, FileField, UploadError, receive_upload
 
 users_bp = Blueprint('users', __name__)
 
-# Helper function to check if a file has an allowed extension
-def allowed_file(filename):
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
-# Helper function to save file with unique name
-def save_file(file):
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        unique_filename = f"{uuid.uuid4()}_{filename}"
-        file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], unique_filename)
-        file.save(file_path)
-        return os.path.join('uploads', unique_filename)
-    return None
-
 @users_bp.route('/profile', methods=['GET'])
 @jwt_required()
 def get_profile():
@@ -41,12 +26,12 @@ def get_profile():
         campaigns = []
         if user.role in ['creator', 'organizer']:
             from app.models.models import Campaign
-            campaigns = Campaign.query.filter_by(creator_id=current_user_id).all()
+            campaigns = Campaign.query.options(*eager_options()).filter_by(creator_id=current_user_id).all()
         
         return jsonify({
             'user': user.to_dict(),
             'donations': [donation.to_dict() for donation in donations],
-            'campaigns': [campaign.to_dict() for campaign in campaigns]
+            'campaigns': CampaignQueryService(db.session).serialize_many(campaigns)
         }), 200
     except Exception as e:
         print(f"Profile error: {str(e)}")
@@ -61,30 +46,35 @@ def update_profile():
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
-    # Update fields if provided in form data
-    if 'full_name' in request.form:
-        user.full_name = request.form.get('full_name')
-    
-    if 'email' in request.form:
-        email = request.form.get('email')
-        # Check if email already exists for another user
-        existing_user = User.query.filter_by(email=email).first()
-        if existing_user and existing_user.id != current_user_id:
-            return jsonify({'error': 'Email already exists'}), 400
-        user.email = email
-    
-    # Update password if provided
-    if 'password' in request.form:
-        user.set_password(request.form.get('password'))
-    
-    # Update profile picture if provided
-    if 'profile_picture' in request.files:
-        profile_picture = save_file(request.files['profile_picture'])
-        if profile_picture:
-            user.profile_picture = profile_picture
-    
-    db.session.commit()
-    
+    try:
+        upload = receive_upload({'profile_picture': FileField(IMAGE_KINDS, MAX_IMAGE_SIZE)})
+    except UploadError as e:
+        return jsonify({'error': e.message}), e.status
+    
+    with upload:
+        # Update fields if provided in form data
+        if 'full_name' in upload.form:
+            user.full_name = upload.form.get('full_name')
+        
+        if 'email' in upload.form:
+            email = upload.form.get('email')
+            # Check if email already exists for another user
+            existing_user = User.query.filter_by(email=email).first()
+            if existing_user and existing_user.id != current_user_id:
+                return jsonify({'error': 'Email already exists'}), 400
+            user.email = email
+        
+        # Update password if provided
+        if 'password' in upload.form:
+            user.set_password(upload.form.get('password'))
+        
+        # Update profile picture if provided
+        if 'profile_picture' in upload.files:
+            user.profile_picture = upload.files['profile_picture'].relative_path
+        
+        db.session.commit()
+        upload.keep()
+        
     return jsonify({
         'message': 'Profile updated successfully',
         'user': user.to_dict()
@@ -257,8 +247,8 @@ def get_dashboard():
         # Role-specific data
         if user.role in ['organizer', 'creator']:
             # Get campaigns created by this user
-            user_campaigns = Campaign.query.filter_by(creator_id=current_user_id).all()
-            dashboard_data['campaigns'] = [campaign.to_dict() for campaign in user_campaigns]
+            user_campaigns = Campaign.query.options(*eager_options()).filter_by(creator_id=current_user_id).all()
+            dashboard_data['campaigns'] = CampaignQueryService(db.session).serialize_many(user_campaigns)
             dashboard_data['stats']['total_campaigns'] = len(user_campaigns)
             
             # Count active campaigns
@@ -300,8 +290,9 @@ def get_dashboard():
             # Get campaigns they've donated to
             donated_campaign_ids = list(set([d.campaign_id for d in user_donations]))
             if donated_campaign_ids:
-                donated_campaigns = Campaign.query.filter(Campaign.id.in_(donated_campaign_ids)).all()
-                dashboard_data['campaigns'] = [campaign.to_dict() for campaign in donated_campaigns]
+                donated_campaigns = Campaign.query.options(*eager_options())\
+                    .filter(Campaign.id.in_(donated_campaign_ids)).all()
+                dashboard_data['campaigns'] = CampaignQueryService(db.session).serialize_many(donated_campaigns)
             
             # Additional stats for donors
             dashboard_data['stats']['campaigns_supported'] = len(donated_campaign_ids)
@@ -311,3 +302,57 @@ def get_dashboard():
     except Exception as e:
         print(f"Dashboard error: {str(e)}")
         return jsonify({'error': f'Failed to get dashboard data: {str(e)}'}), 500
+
+@users_bp.route('/feed', methods=['GET'])
+@jwt_required()
+def get_feed():
+    """Updates and achieved milestones of the campaigns the user follows, newest first"""
+    current_user_id = int(get_jwt_identity())
+    cursor = request.args.get('cursor')
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    
+    try:
+        page = user_feed(db.session, current_user_id, cursor=cursor, limit=limit)
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    return jsonify(page), 200
+
+@users_bp.route('/notifications', methods=['GET'])
+@jwt_required()
+def get_notifications():
+    """The user's notifications, newest first, with the unread count"""
+    current_user_id = int(get_jwt_identity())
+    before = request.args.get('before', type=int)
+    limit = request.args.get('limit', notifications.DEFAULT_PAGE_SIZE, type=int)
+    
+    user = db.session.get(User, current_user_id)
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    page, next_cursor = notifications.notifications_page(db.session, current_user_id, before=before, limit=limit)
+    
+    return jsonify({
+        'notifications': [notification.to_dict() for notification in page],
+        'unread_count': user.unread_notifications or 0,
+        'next_cursor': next_cursor
+    }), 200
+
+@users_bp.route('/notifications/read', methods=['PUT'])
+@jwt_required()
+def read_notifications():
+    """Mark the given notifications (or all of them) as read"""
+    current_user_id = int(get_jwt_identity())
+    ids = (request.get_json(silent=True) or {}).get('ids')
+    
+    if ids is not None and (not isinstance(ids, list) or not all(isinstance(i, int) for i in ids)):
+        return jsonify({'error': 'ids must be a list of notification ids'}), 400
+    
+    changed = notifications.mark_read(db.session, current_user_id, ids)
+    db.session.commit()
+    user = db.session.get(User, current_user_id)
+    
+    return jsonify({
+        'message': f'{changed} notification(s) marked as read',
+        'unread_count': user.unread_notifications if user else 0
+    }), 200
@@ -0,0 +1,269 @@
+"""
+ASGI serving mode (see asgi.py).
+
+Requests are handled on an asyncio event loop:
+
+- Hot public read endpoints are served natively, with async database
+  access (an AsyncEngine on the read database). They reuse the sync query
+  helpers through AsyncSession.run_sync, so the SQL stays in one place.
+- Campaign progress streams are served natively too: an idle stream is a
+  coroutine waiting on its subscriber queue, not a thread.
+- Everything else goes to the Flask app through asgiref's WSGI adapter,
+  which receives the whole request body on the event loop (spooled to a
+  temporary file past 64 KB) before handing it to a thread of a pool of
+  ASGI_WSGI_THREADS. A slow client uploading a transfer proof costs a
+  coroutine, not a thread.
+"""
+import asyncio
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgiInstance
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.utils.pubsub import campaign_events, campaign_progress, progress_message
+from app.utils.sqlite_tuning import resolve_pragmas, setup_sqlite_pragmas
+
+# Async drivers for the sync drivers the app is configured with
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'sqlite+pysqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'postgresql+psycopg2': 'postgresql+asyncpg',
+}
+
+def async_database_uri(flask_app):
+    """
+    Async driver URL of the read database. Taken from the engines
+    Flask-SQLAlchemy built, which resolve relative SQLite paths against
+    the instance folder.
+    """
+    from app import db
+    from app.utils.db_routing import READ_BIND_KEY
+
+    with flask_app.app_context():
+        url = db.engines.get(READ_BIND_KEY, db.engine).url
+    if url.drivername not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver for {url.drivername}")
+    return url.set(drivername=ASYNC_DRIVERS[url.drivername])
+
+def create_read_engine(flask_app):
+    # aiosqlite defaults to NullPool; keep connections open like the sync read bind
+    engine = create_async_engine(
+        async_database_uri(flask_app),
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=flask_app.config.get('DB_READ_POOL_SIZE', 10),
+        max_overflow=flask_app.config.get('DB_READ_MAX_OVERFLOW', 10),
+    )
+    pragmas = {name: value for name, value in resolve_pragmas(flask_app.config).items() if name != 'journal_mode'}
+    setup_sqlite_pragmas(engine.sync_engine, pragmas)
+    return engine
+
+def query_int(query, name, default, maximum=None):
+    try:
+        value = int(query.get(name, [default])[0])
+    except ValueError:
+        value = default
+    return min(value, maximum) if maximum else value
+
+class PooledWsgiInstance(WsgiToAsgiInstance):
+    """
+    One proxied request. asgiref runs WSGI apps thread-sensitively, i.e. all
+    on one shared thread; these run on the pool, concurrently.
+    """
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def run_wsgi_app(self, body):
+        await sync_to_async(self.serve, thread_sensitive=False, executor=self.executor)(body)
+
+    def serve(self, body):
+        try:
+            environ = self.build_environ(self.scope, body)
+        except ValueError:  # too many duplicate headers
+            self.sync_send({'type': 'http.response.start', 'status': 400,
+                            'headers': [(b'content-type', b'text/plain')]})
+            self.sync_send({'type': 'http.response.body', 'body': b'Bad Request'})
+            return
+
+        response = self.wsgi_application(environ, self.start_response)
+        try:
+            for output in response:
+                if not self.response_started:
+                    self.response_started = True
+                    self.sync_send(self.response_start)
+                self.sync_send({'type': 'http.response.body', 'body': output, 'more_body': True})
+        finally:
+            # Ends the request: Flask tears down the app context and session here
+            if hasattr(response, 'close'):
+                response.close()
+        if not self.response_started:
+            self.response_started = True
+            self.sync_send(self.response_start)
+        self.sync_send({'type': 'http.response.body'})
+
+class AsyncReadRoutes:
+    """Native async handlers for public, read-only GET endpoints"""
+    def __init__(self, flask_app, engine):
+        self.flask_app = flask_app
+        self.engine = engine
+        self.routes = [
+            (re.compile(r'^/api/campaigns/(\d+)/top-donors$'), self.top_donors),
+            (re.compile(r'^/api/campaigns/leaderboards$'), self.leaderboards),
+        ]
+
+    def match(self, scope):
+        if scope['type'] != 'http' or scope['method'] not in ('GET', 'HEAD'):
+            return None
+        for pattern, handler in self.routes:
+            found = pattern.match(scope['path'])
+            if found:
+                return handler, found.groups()
+        return None
+
+    async def run(self, function):
+        """Run a sync query helper on an async connection, inside the app context"""
+        def call(session):
+            with self.flask_app.app_context():
+                return function(session)
+
+        async with AsyncSession(self.engine) as session:
+            return await session.run_sync(call)
+
+    async def top_donors(self, query, campaign_id):
+        from app.models.models import Campaign
+        from app.utils.leaderboards import top_donors
+
+        limit = query_int(query, 'limit', 10, maximum=100)
+
+        def load(session):
+            if session.get(Campaign, int(campaign_id)) is None:
+                return None
+            return {'top_donors': top_donors(session, int(campaign_id), limit=limit)}
+
+        body = await self.run(load)
+        if body is None:
+            return 404, {'error': 'Campaign not found'}
+        return 200, body
+
+    async def leaderboards(self, query):
+        from app.utils.leaderboards import weekly_leaderboards
+
+        limit = query_int(query, 'limit', 10, maximum=100)
+        return 200, await self.run(lambda session: weekly_leaderboards(session, limit=limit))
+
+STREAM_PATH = re.compile(r'^/api/campaigns/(\d+)/stream$')
+
+class AsgiApp:
+    def __init__(self, flask_app, cors_origins=()):
+        self.flask_app = flask_app
+        self.executor = ThreadPoolExecutor(max_workers=flask_app.config.get('ASGI_WSGI_THREADS', 32),
+                                           thread_name_prefix='wsgi')
+        self.cors_origins = set(cors_origins)
+        self.engine = create_read_engine(flask_app)
+        self.reads = AsyncReadRoutes(flask_app, self.engine)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+
+        stream = STREAM_PATH.match(scope['path']) if scope['type'] == 'http' and scope['method'] == 'GET' else None
+        if stream:
+            return await self.stream_campaign(scope, receive, send, int(stream.group(1)))
+
+        matched = self.reads.match(scope)
+        if matched is None:
+            return await PooledWsgiInstance(self.flask_app, self.executor)(scope, receive, send)
+
+        handler, args = matched
+        query = parse_qs(scope.get('query_string', b'').decode())
+        status, body = await handler(query, *args)
+        await self.send_json(scope, send, status, body)
+
+    def cors_headers(self, scope):
+        origin = dict(scope.get('headers', [])).get(b'origin', b'').decode()
+        if origin not in self.cors_origins:
+            return []
+        return [(b'access-control-allow-origin', origin.encode()),
+                (b'access-control-allow-credentials', b'true'),
+                (b'vary', b'Origin')]
+
+    async def send_json(self, scope, send, status, body):
+        payload = json.dumps(body).encode()
+        headers = [(b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode())]
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers + self.cors_headers(scope)})
+        await send({'type': 'http.response.body', 'body': payload if scope['method'] != 'HEAD' else b''})
+
+    async def stream_campaign(self, scope, receive, send, campaign_id):
+        """
+        /api/campaigns/<id>/stream, as in the Flask route: a progress
+        snapshot, then an event per verified donation until the stream's
+        SSE_STREAM_SECONDS are up or the client goes away.
+        """
+        from app.models.models import Campaign
+
+        def load(session):
+            campaign = session.get(Campaign, campaign_id)
+            return campaign_progress(campaign) if campaign is not None else None
+
+        snapshot = await self.reads.run(load)
+        if snapshot is None:
+            return await self.send_json(scope, send, 404, {'error': 'Campaign not found'})
+
+        config = self.flask_app.config
+        if campaign_events.subscriber_count() >= config.get('SSE_MAX_SUBSCRIBERS', 1000):
+            return await self.send_json(scope, send, 503, {'error': 'Too many live connections, try again later'})
+
+        loop = asyncio.get_running_loop()
+        keepalive = config.get('SSE_KEEPALIVE_SECONDS', 15)
+        closes_at = loop.time() + config.get('SSE_STREAM_SECONDS', 60)
+        headers = [(b'content-type', b'text/event-stream; charset=utf-8'),
+                   (b'cache-control', b'no-cache'),
+                   (b'x-accel-buffering', b'no')]
+
+        async def disconnected():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+
+        with campaign_events.subscribe_async(campaign_id) as subscriber:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': headers + self.cors_headers(scope)})
+            await send({'type': 'http.response.body', 'body': progress_message(snapshot, retry=True).encode(),
+                        'more_body': True})
+            gone = asyncio.ensure_future(disconnected())
+            event = asyncio.ensure_future(subscriber.get())
+            try:
+                while True:
+                    remaining = closes_at - loop.time()
+                    if remaining <= 0:
+                        break
+                    await asyncio.wait({gone, event}, timeout=min(keepalive, remaining),
+                                       return_when=asyncio.FIRST_COMPLETED)
+                    if gone.done():
+                        return
+                    if event.done():
+                        message = progress_message(event.result())
+                        event = asyncio.ensure_future(subscriber.get())
+                    else:
+                        message = ": keep-alive\n\n"
+                    await send({'type': 'http.response.body', 'body': message.encode(), 'more_body': True})
+            finally:
+                gone.cancel()
+                event.cancel()
+            await send({'type': 'http.response.body'})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+def create_asgi_app(flask_app, cors_origins=()):
+    return AsgiApp(flask_app, cors_origins)
@@ -0,0 +1,94 @@
+import time
+from datetime import datetime
+from sqlalchemy import text
+
+PROGRESS_TABLE = 'backfill_progress'
+
+DEFAULT_BATCH_SIZE = 1000
+
+def ensure_progress_table(conn, progress_table=PROGRESS_TABLE):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {progress_table} ("
+        "name VARCHAR(200) PRIMARY KEY, "
+        "last_id INTEGER NOT NULL, "
+        "updated_at DATETIME NOT NULL)"
+    ))
+
+def get_checkpoint(conn, name, progress_table=PROGRESS_TABLE):
+    return conn.execute(
+        text(f"SELECT last_id FROM {progress_table} WHERE name = :name"),
+        {'name': name}
+    ).scalar()
+
+def save_checkpoint(conn, name, last_id, progress_table=PROGRESS_TABLE):
+    conn.execute(text(f"DELETE FROM {progress_table} WHERE name = :name"), {'name': name})
+    conn.execute(
+        text(f"INSERT INTO {progress_table} (name, last_id, updated_at) VALUES (:name, :last_id, :updated_at)"),
+        {'name': name, 'last_id': last_id, 'updated_at': datetime.utcnow()}
+    )
+
+def clear_checkpoint(conn, name, progress_table=PROGRESS_TABLE):
+    conn.execute(text(f"DELETE FROM {progress_table} WHERE name = :name"), {'name': name})
+
+def run_backfill(engine, name, table, handle_batch, columns=(), batch_size=DEFAULT_BATCH_SIZE,
+                 pause=0.0, progress_table=PROGRESS_TABLE, log=print):
+    """
+    Walk `table` in primary-key order, batch_size rows at a time, and call
+    handle_batch(conn, rows) for each chunk.
+
+    Every chunk runs in its own transaction together with its checkpoint,
+    so a crash never skips or repeats rows and a rerun with the same name
+    resumes after the last committed chunk. `pause` sleeps between chunks
+    to leave room for live traffic. Rows are selected with keyset
+    pagination (id > last_id), so each chunk costs the same no matter how
+    far into the table it is. Returns the number of rows handled.
+    """
+    select_columns = ', '.join(['id', *columns])
+    select_batch = text(
+        f"SELECT {select_columns} FROM {table} WHERE id > :last_id ORDER BY id LIMIT :batch_size"
+    )
+
+    with engine.begin() as conn:
+        ensure_progress_table(conn, progress_table)
+        last_id = get_checkpoint(conn, name, progress_table) or 0
+
+    if last_id:
+        log(f"  resuming {name} after id {last_id}")
+
+    handled = 0
+    batches = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(select_batch, {'last_id': last_id, 'batch_size': batch_size}).fetchall()
+            if not rows:
+                clear_checkpoint(conn, name, progress_table)
+                break
+
+            handle_batch(conn, rows)
+            last_id = rows[-1][0]
+            save_checkpoint(conn, name, last_id, progress_table)
+
+        handled += len(rows)
+        batches += 1
+        if pause:
+            time.sleep(pause)
+
+    log(f"  {name}: {handled} row(s) in {batches} batch(es)")
+    return handled
+
+def run_sql_backfill(engine, name, table, sql, **kwargs):
+    """
+    run_backfill for a statement limited to id BETWEEN :start_id AND
+    :end_id, executed once per chunk. `sql` may also be a list of such
+    statements, run in order in the chunk's transaction, or a function of
+    the engine's dialect name returning either.
+    """
+    if callable(sql):
+        sql = sql(engine.dialect.name)
+    statements = [text(sql)] if isinstance(sql, str) else [text(statement) for statement in sql]
+
+    def execute_range(conn, rows):
+        for statement in statements:
+            conn.execute(statement, {'start_id': rows[0][0], 'end_id': rows[-1][0]})
+
+    return run_backfill(engine, name, table, execute_range, **kwargs)
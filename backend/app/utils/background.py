@@ -0,0 +1,72 @@
+"""
+In-process background workers.
+
+PeriodicWorker runs a task in the app context every `interval` seconds
+(or as soon as wake() is called) from one daemon thread per process. The
+thread starts lazily, with the first request of each process, so it
+survives gunicorn's preload/fork and scripts that only build the app
+never start it.
+"""
+import os
+import threading
+
+class PeriodicWorker:
+    def __init__(self, app, name, interval, task):
+        self.app = app
+        self.name = name
+        self.interval = interval
+        self.task = task
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._pid = None
+
+    def ensure_started(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Threads do not survive a fork; start one per worker process
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name=self.name, daemon=True).start()
+
+    def wake(self):
+        """Run the task now instead of at the next interval"""
+        self._wake.set()
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+
+    def _run(self):
+        from app import db
+
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopped:
+                return
+            with self.app.app_context():
+                try:
+                    self.task(db.session)
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.error(f"{self.name} failed: {e}")
+                finally:
+                    db.session.remove()
+
+def setup_worker(app, name, interval, task):
+    """
+    Register a PeriodicWorker as app.extensions[name], started by the
+    first request of each process. Returns None when `interval` is 0.
+    """
+    if not interval:
+        return None
+
+    worker = PeriodicWorker(app, name, interval, task)
+    app.extensions[name] = worker
+
+    @app.before_request
+    def start_worker():
+        worker.ensure_started()
+
+    return worker
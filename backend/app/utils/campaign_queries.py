@@ -0,0 +1,300 @@
+"""
+Campaign queries shared by /api/campaigns (campaigns_bp, JSON) and
+/api/donations/campaigns (donations_bp, form data).
+
+Both APIs list, fetch, create and update campaigns through
+CampaignQueryService, so they have the same filters and search, the same
+validation and return the same campaign shape (serialize_campaign):
+
+- list pages load creator and category in the page query and the donation
+  counts of the whole page in one grouped query; follower counts are the
+  maintained Campaign.followers_count
+- public list pages are cached per process for CAMPAIGN_LIST_CACHE_SECONDS
+  (0 disables); writes through the service clear the cache
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from flask import current_app
+from sqlalchemy import desc, func, or_, select
+from sqlalchemy.orm import joinedload
+from app.utils.metrics import record_cache
+
+PUBLIC_STATUSES = ('active', 'approved')
+CAMPAIGN_STATUSES = ('pending', 'active', 'completed', 'cancelled', 'rejected')
+MAX_PER_PAGE = 100
+MAX_CACHED_PAGES = 256
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+class CampaignError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+def serialize_campaign(campaign, donations_count=0):
+    """The campaign shape returned by both campaign APIs"""
+    creator = campaign.creator
+    creator_name = (creator.full_name or creator.username) if creator else None
+    category = campaign.category
+    return {
+        'id': campaign.id,
+        'title': campaign.title,
+        'description': campaign.description,
+        'target_amount': campaign.target_amount,
+        'goal_amount': campaign.target_amount,
+        'current_amount': campaign.current_amount,
+        'progress_percentage': round(campaign.current_amount / campaign.target_amount * 100, 2) if campaign.target_amount else 0,
+        'image': campaign.image,
+        'image_url': campaign.image,
+        'status': campaign.status,
+        'is_featured': campaign.is_featured,
+        'is_urgent': campaign.is_urgent,
+        'start_date': campaign.start_date.isoformat() if campaign.start_date else None,
+        'end_date': campaign.end_date.isoformat() if campaign.end_date else None,
+        'deadline': campaign.end_date.isoformat() if campaign.end_date else None,
+        'creator_id': campaign.creator_id,
+        'creator_name': creator_name,
+        'creator': {
+            'id': creator.id,
+            'name': creator_name,
+            'full_name': creator_name,
+            'email': creator.email
+        } if creator else None,
+        'category_id': campaign.category_id,
+        'category': category.to_dict() if category else None,
+        'approved_by': campaign.approved_by,
+        'approved_by_name': campaign.approved_by_user.full_name if campaign.approved_by_user else None,
+        'approved_at': campaign.approved_at.isoformat() if campaign.approved_at else None,
+        'rejection_reason': campaign.rejection_reason,
+        'created_at': campaign.created_at.isoformat() if campaign.created_at else None,
+        'updated_at': campaign.updated_at.isoformat() if campaign.updated_at else None,
+        'donations_count': donations_count,
+        'followers_count': campaign.followers_count or 0,
+    }
+
+def eager_options():
+    """Relationships read by serialize_campaign, loaded with the campaign"""
+    from app.models.models import Campaign
+
+    return [joinedload(Campaign.creator), joinedload(Campaign.category), joinedload(Campaign.approved_by_user)]
+
+def parse_deadline(value, current=None):
+    """
+    Deadline from an ISO date, as naive UTC like every other timestamp
+    (the lifecycle sweeper compares end_date with utcnow()). Dates without
+    an offset are taken as UTC. A new deadline must be in the future.
+    """
+    try:
+        deadline = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        raise CampaignError('Invalid deadline format')
+    if deadline.tzinfo is not None:
+        deadline = deadline.astimezone(timezone.utc).replace(tzinfo=None)
+    if deadline != current and deadline <= datetime.utcnow():
+        raise CampaignError('Deadline must be in the future')
+    return deadline
+
+def parse_goal_amount(value):
+    try:
+        goal_amount = float(value)
+    except (ValueError, TypeError):
+        raise CampaignError('Invalid goal amount')
+    if goal_amount <= 0:
+        raise CampaignError('Goal amount must be greater than 0')
+    return goal_amount
+
+class CampaignQueryService:
+    def __init__(self, session):
+        self.session = session
+
+    def list_query(self, status='active', category_id=None, category=None, featured=None, urgent=None,
+                   search=None, creator_id=None):
+        """
+        Campaigns matching the filters, featured and urgent first, newest
+        first (the order of ix_campaign_status_featured_urgent_created).
+        `category` is a category name, for the legacy form API.
+        """
+        from app.models.models import Campaign, Category
+
+        query = select(Campaign).options(*eager_options())
+        if status == 'active':
+            query = query.where(Campaign.status.in_(PUBLIC_STATUSES))
+        elif status != 'all':
+            query = query.where(Campaign.status == status)
+        if category_id:
+            query = query.where(Campaign.category_id == category_id)
+        elif category:
+            query = query.where(Campaign.category_id.in_(select(Category.id).where(Category.name == category)))
+        if featured is not None:
+            query = query.where(Campaign.is_featured == featured)
+        if urgent is not None:
+            query = query.where(Campaign.is_urgent == urgent)
+        if creator_id is not None:
+            query = query.where(Campaign.creator_id == creator_id)
+        if search:
+            query = query.where(or_(Campaign.title.ilike(f'%{search}%'), Campaign.description.ilike(f'%{search}%')))
+        return query.order_by(desc(Campaign.is_featured), desc(Campaign.is_urgent), desc(Campaign.created_at))
+
+    def donation_counts(self, campaign_ids):
+        """{campaign id: donations count} in one grouped query"""
+        from app.models.models import Donation
+
+        if not campaign_ids:
+            return {}
+        return dict(self.session.execute(
+            select(Donation.campaign_id, func.count(Donation.id))
+            .where(Donation.campaign_id.in_(campaign_ids))
+            .group_by(Donation.campaign_id)
+        ).all())
+
+    def serialize_many(self, campaigns):
+        counts = self.donation_counts([campaign.id for campaign in campaigns])
+        return [serialize_campaign(campaign, counts.get(campaign.id, 0)) for campaign in campaigns]
+
+    def serialize(self, campaign):
+        return self.serialize_many([campaign])[0]
+
+    def list_campaigns(self, page=1, per_page=10, **filters):
+        """A page of serialized campaigns and its pagination"""
+        from app import db
+
+        page = max(page, 1)
+        per_page = max(min(per_page, MAX_PER_PAGE), 1)
+        cacheable = filters.get('status', 'active') == 'active' and filters.get('creator_id') is None
+        ttl = current_app.config.get('CAMPAIGN_LIST_CACHE_SECONDS', 30)
+        key = (page, per_page, tuple(sorted(filters.items())))
+
+        if cacheable and ttl:
+            with _cache_lock:
+                cached = _cache.get(key)
+            hit = cached is not None and cached[0] > time.monotonic()
+            record_cache('campaign_list', hit)
+            if hit:
+                return cached[1]
+
+        pagination = db.paginate(self.list_query(**filters), page=page, per_page=per_page, error_out=False)
+        result = {
+            'campaigns': self.serialize_many(pagination.items),
+            'pagination': {
+                'page': pagination.page,
+                'pages': pagination.pages,
+                'per_page': pagination.per_page,
+                'total': pagination.total,
+                'has_next': pagination.has_next,
+                'has_prev': pagination.has_prev
+            }
+        }
+        if cacheable and ttl:
+            with _cache_lock:
+                _cache[key] = (time.monotonic() + ttl, result)
+                _cache.move_to_end(key)
+                while len(_cache) > MAX_CACHED_PAGES:
+                    _cache.popitem(last=False)
+        return result
+
+    def get_campaign(self, campaign_id):
+        from app.models.models import Campaign
+
+        return self.session.get(Campaign, campaign_id, options=eager_options())
+
+    def get_visible_campaign(self, campaign_id, user=None):
+        """The campaign if it is public, or if `user` created it or is an admin"""
+        campaign = self.get_campaign(campaign_id)
+        if campaign is None:
+            return None
+        if campaign.status in PUBLIC_STATUSES or self.can_edit(campaign, user):
+            return campaign
+        return None
+
+    def category_id(self, fields):
+        """Category id from `category_id`, or from a `category` name (form API)"""
+        from app.models.models import Category
+
+        if fields.get('category_id'):
+            category = self.session.get(Category, fields['category_id'])
+        elif fields.get('category'):
+            category = self.session.execute(select(Category).where(Category.name == fields['category'])).scalar()
+        else:
+            return None
+        if category is None:
+            raise CampaignError('Invalid category')
+        return category.id
+
+    def create_campaign(self, user, fields):
+        """
+        Create a pending campaign from `fields` (title, description,
+        goal_amount, deadline, category_id or category, image_url). Raises
+        CampaignError.
+        """
+        from app.models.models import Campaign
+
+        for field in ('title', 'description', 'goal_amount'):
+            if not fields.get(field):
+                raise CampaignError(f'Missing required field: {field}')
+        goal_amount = parse_goal_amount(fields['goal_amount'])
+        deadline = parse_deadline(fields['deadline']) if fields.get('deadline') else None
+        category_id = self.category_id(fields)
+
+        campaign = Campaign(
+            title=fields['title'],
+            description=fields['description'],
+            target_amount=goal_amount,
+            organizer_id=user.id,
+            creator_id=user.id,
+            category_id=category_id or None,
+            end_date=deadline,
+            image=fields.get('image_url'),
+            status='pending'  # All new campaigns start as pending
+        )
+        self.session.add(campaign)
+        self.session.commit()
+        clear_cache()
+        return campaign
+
+    def can_edit(self, campaign, user):
+        return user is not None and (user.role == 'admin' or campaign.creator_id == user.id)
+
+    def update_campaign(self, campaign, user, fields):
+        """
+        Apply `fields` to a campaign as `user`: the creator or an admin may
+        edit it, only the creator changes the goal and deadline and only an
+        admin changes the status. Raises CampaignError.
+        """
+        if not self.can_edit(campaign, user):
+            raise CampaignError('Unauthorized to update this campaign', 403)
+        is_admin = user.role == 'admin'
+        is_creator = campaign.creator_id == user.id
+
+        try:
+            if 'title' in fields:
+                campaign.title = fields['title']
+            if 'description' in fields:
+                campaign.description = fields['description']
+            if 'image_url' in fields:
+                campaign.image = fields['image_url']
+            if is_creator:
+                if 'goal_amount' in fields:
+                    campaign.target_amount = parse_goal_amount(fields['goal_amount'])
+                if fields.get('deadline'):
+                    campaign.end_date = parse_deadline(fields['deadline'], campaign.end_date)
+            if 'category_id' in fields or 'category' in fields:
+                campaign.category_id = self.category_id(fields)
+            if is_admin and fields.get('status') in CAMPAIGN_STATUSES:
+                campaign.status = fields['status']
+
+        except CampaignError:
+            self.session.rollback()
+            raise
+
+        campaign.updated_at = datetime.utcnow()
+        self.session.commit()
+        clear_cache()
+        return campaign
@@ -0,0 +1,268 @@
+"""
+Synthetic data generator for production-scale datasets.
+
+Rows are built as plain dicts and written with Core executemany inserts
+in batches, skipping the ORM, so hundreds of thousands of donations load
+in seconds. Campaign popularity follows a Zipf-like distribution: a few
+campaigns receive most donations and follows, like in production.
+"""
+import random
+import time
+from itertools import accumulate
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, func, select, text, update
+from werkzeug.security import generate_password_hash
+from app.utils import leaderboards, milestones, rollups
+from app.utils.follows import FOLLOWERS_COUNT_RANGE_SQL
+
+DEFAULT_PASSWORD = 'password123'
+
+CATEGORIES = [
+    ('Kesehatan', 'Kampanye untuk bantuan medis, pengobatan, dan kesehatan masyarakat', 'fas fa-heartbeat'),
+    ('Pendidikan', 'Bantuan untuk sekolah, beasiswa, dan program pendidikan', 'fas fa-graduation-cap'),
+    ('Bencana Alam', 'Bantuan untuk korban bencana alam dan pemulihan', 'fas fa-house-damage'),
+    ('Sosial', 'Program sosial untuk membantu masyarakat kurang mampu', 'fas fa-hands-helping'),
+    ('Lingkungan', 'Kampanye untuk pelestarian lingkungan dan sustainability', 'fas fa-leaf'),
+    ('Keagamaan', 'Pembangunan dan renovasi tempat ibadah', 'fas fa-mosque'),
+]
+
+# (value, weight) mixes
+USER_ROLES = [('user', 70), ('donor', 15), ('creator', 10), ('organizer', 5)]
+CAMPAIGN_STATUSES = [('active', 70), ('pending', 10), ('completed', 12), ('rejected', 5), ('cancelled', 3)]
+DONATION_STATUSES = [('verified', 75), ('pending', 15), ('rejected', 10)]
+PAYMENT_METHODS = [('bank_transfer', 60), ('e_wallet', 35), ('cash', 5)]
+DONATION_AMOUNTS = [10000, 20000, 25000, 50000, 100000, 150000, 250000, 500000, 1000000, 5000000]
+DONATION_AMOUNT_WEIGHTS = [10, 12, 10, 25, 20, 6, 8, 5, 3, 1]
+
+def weighted_choices(rng, mix, k):
+    values, weights = zip(*mix)
+    return rng.choices(values, weights=weights, k=k)
+
+def weighted_sampler(rng, values, weights):
+    """Single-draw sampler with precomputed cumulative weights (O(log n) per draw)"""
+    values = list(values)
+    cum_weights = list(accumulate(weights))
+    return lambda: rng.choices(values, cum_weights=cum_weights)[0]
+
+def popularity_weights(count, skew):
+    """Zipf-like weights: the campaign at rank r gets 1 / r**skew"""
+    return [1.0 / (rank ** skew) for rank in range(1, count + 1)]
+
+def next_id(conn, table):
+    return (conn.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+def insert_batches(conn, table, rows, batch_size):
+    """executemany insert in chunks; `rows` may be any iterable of dicts"""
+    batch = []
+    count = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            conn.execute(table.insert(), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        conn.execute(table.insert(), batch)
+        count += len(batch)
+    return count
+
+def generate(engine, users=1000, campaigns=200, donations=20000, follows=5000, updates=500,
+             milestones_per_campaign=3, skew=1.1, seed=42, batch_size=5000, now=None, log=print):
+    """
+    Bulk-generate a dataset into an already migrated database. New rows
+    get ids after the current maximum, so existing data is left alone.
+    Returns a dict of row counts per table.
+    """
+    from app.models.models import User, Campaign, Donation, Milestone, CampaignUpdate, Category, UserFollow
+
+    rng = random.Random(seed)
+    now = now or datetime.utcnow()
+    counts = {}
+    started = time.perf_counter()
+
+    user_table = User.__table__
+    campaign_table = Campaign.__table__
+    donation_table = Donation.__table__
+    milestone_table = Milestone.__table__
+    update_table = CampaignUpdate.__table__
+    category_table = Category.__table__
+    follow_table = UserFollow.__table__
+
+    with engine.begin() as conn:
+        # Categories: reuse existing ones, add the defaults that are missing
+        existing = {row.name: row.id for row in conn.execute(select(category_table.c.id, category_table.c.name))}
+        new_categories = [
+            {'name': name, 'description': description, 'icon': icon, 'is_active': True, 'created_at': now}
+            for name, description, icon in CATEGORIES if name not in existing
+        ]
+        if new_categories:
+            conn.execute(category_table.insert(), new_categories)
+        category_ids = [row.id for row in conn.execute(select(category_table.c.id))]
+        counts['category'] = len(new_categories)
+
+        # Users: one password hash for everyone, hashing is deliberately slow
+        first_user_id = next_id(conn, user_table)
+        password_hash = generate_password_hash(DEFAULT_PASSWORD)
+        roles = weighted_choices(rng, USER_ROLES, users)
+        user_rows = (
+            {
+                'id': first_user_id + index,
+                'username': f'gen_user_{first_user_id + index}',
+                'email': f'gen_user_{first_user_id + index}@example.com',
+                'password_hash': password_hash,
+                'full_name': f'Generated User {first_user_id + index}',
+                'role': roles[index],
+                'is_active': True,
+                'is_verified': rng.random() < 0.6,
+                'created_at': now - timedelta(days=rng.randint(0, 730)),
+                'updated_at': now,
+            }
+            for index in range(users)
+        )
+        counts['user'] = insert_batches(conn, user_table, user_rows, batch_size)
+        user_ids = list(range(first_user_id, first_user_id + users))
+        creator_ids = [
+            user_id for user_id, role in zip(user_ids, roles) if role in ('creator', 'organizer')
+        ] or user_ids
+
+        # Campaigns: shuffled ids get the popularity ranks, so popular
+        # campaigns are spread over the whole id range
+        first_campaign_id = next_id(conn, campaign_table)
+        campaign_ids = list(range(first_campaign_id, first_campaign_id + campaigns))
+        statuses = weighted_choices(rng, CAMPAIGN_STATUSES, campaigns)
+        campaign_info = {}
+        for index, campaign_id in enumerate(campaign_ids):
+            creator_id = rng.choice(creator_ids)
+            created_at = now - timedelta(days=rng.randint(1, 365), seconds=rng.randint(0, 86399))
+            campaign_info[campaign_id] = {
+                'id': campaign_id,
+                'title': f'Kampanye {campaign_id}',
+                'description': f'Deskripsi kampanye sintetis nomor {campaign_id}',
+                'target_amount': float(rng.choice([5, 10, 25, 50, 100, 250]) * 1000000),
+                'current_amount': 0.0,
+                'category_id': rng.choice(category_ids) if category_ids else None,
+                'start_date': created_at,
+                'end_date': created_at + timedelta(days=rng.randint(30, 365)),
+                'status': statuses[index],
+                'is_featured': rng.random() < 0.05,
+                'is_urgent': rng.random() < 0.10,
+                'organizer_id': creator_id,
+                'creator_id': creator_id,
+                'created_at': created_at,
+                'updated_at': created_at,
+            }
+
+        popular_order = campaign_ids[:]
+        rng.shuffle(popular_order)
+        weights = popularity_weights(campaigns, skew)
+        pick_popular = weighted_sampler(rng, popular_order, weights) if campaign_ids else None
+        # Only live or finished campaigns receive donations
+        donatable = [(cid, w) for cid, w in zip(popular_order, weights)
+                     if campaign_info[cid]['status'] in ('active', 'completed')]
+
+        counts['campaign'] = insert_batches(conn, campaign_table, campaign_info.values(), batch_size)
+
+        # Donations, streamed in batches; verified totals feed current_amount
+        totals = {}
+        first_donation_id = next_id(conn, donation_table)
+
+        def donation_rows():
+            if not donatable or not user_ids:
+                return
+            pick_campaign = weighted_sampler(rng, *zip(*donatable))
+            pick_status = weighted_sampler(rng, *zip(*DONATION_STATUSES))
+            pick_amount = weighted_sampler(rng, DONATION_AMOUNTS, DONATION_AMOUNT_WEIGHTS)
+            pick_payment_method = weighted_sampler(rng, *zip(*PAYMENT_METHODS))
+            for index in range(donations):
+                campaign_id = pick_campaign()
+                campaign = campaign_info[campaign_id]
+                status = pick_status()
+                amount = float(pick_amount())
+                is_anonymous = rng.random() < 0.1
+                age = max((now - campaign['created_at']).total_seconds(), 1)
+                created_at = campaign['created_at'] + timedelta(seconds=rng.uniform(0, age))
+                if status == 'verified':
+                    totals[campaign_id] = totals.get(campaign_id, 0.0) + amount
+                yield {
+                    'id': first_donation_id + index,
+                    'amount': amount,
+                    'message': 'Semoga bermanfaat' if rng.random() < 0.3 else None,
+                    'donor_name': 'Hamba Allah' if is_anonymous else None,
+                    'payment_method': pick_payment_method(),
+                    'status': status,
+                    'is_anonymous': is_anonymous,
+                    'donor_id': rng.choice(user_ids),
+                    'campaign_id': campaign_id,
+                    'created_at': created_at,
+                    'verified_at': created_at + timedelta(hours=rng.randint(1, 72)) if status == 'verified' else None,
+                }
+
+        counts['donation'] = insert_batches(conn, donation_table, donation_rows(), batch_size)
+
+        if totals:
+            conn.execute(
+                update(campaign_table)
+                .where(campaign_table.c.id == bindparam('b_id'))
+                .values(current_amount=bindparam('b_amount')),
+                [{'b_id': campaign_id, 'b_amount': amount} for campaign_id, amount in totals.items()]
+            )
+            # Keep the daily rollup and donor totals in step with the new verified donations
+            donation_range = {'start_id': first_donation_id, 'end_id': first_donation_id + counts['donation'] - 1}
+            conn.execute(text(rollups.add_donation_range_sql(conn.dialect.name)), donation_range)
+            conn.execute(text(leaderboards.ADD_DONATION_RANGE_SQL), donation_range)
+
+        # Milestones at even fractions of the target
+        milestone_rows = []
+        for campaign_id in campaign_ids:
+            target = campaign_info[campaign_id]['target_amount']
+            current = totals.get(campaign_id, 0.0)
+            for step in range(1, milestones_per_campaign + 1):
+                milestone_target = target * step / milestones_per_campaign
+                achieved = current >= milestone_target
+                milestone_rows.append({
+                    'title': f'Milestone {step}',
+                    'description': f'Tahap {step} dari {milestones_per_campaign}',
+                    'target_amount': milestone_target,
+                    'status': 'achieved' if achieved else 'pending',
+                    'campaign_id': campaign_id,
+                    'created_at': campaign_info[campaign_id]['created_at'],
+                    'achieved_at': now if achieved else None,
+                })
+        counts['milestone'] = insert_batches(conn, milestone_table, milestone_rows, batch_size)
+        if campaign_ids:
+            conn.execute(text(milestones.NEXT_MILESTONE_RANGE_SQL),
+                         {'start_id': min(campaign_ids), 'end_id': max(campaign_ids)})
+
+        # Campaign updates, posted by the campaign creator
+        update_rows = []
+        for _ in range(updates if campaign_ids else 0):
+            campaign_id = pick_popular()
+            campaign = campaign_info[campaign_id]
+            age = max((now - campaign['created_at']).total_seconds(), 1)
+            update_rows.append({
+                'title': f'Kabar terbaru kampanye {campaign_id}',
+                'content': 'Terima kasih atas dukungan para donatur.',
+                'campaign_id': campaign_id,
+                'created_by': campaign['creator_id'],
+                'created_at': campaign['created_at'] + timedelta(seconds=rng.uniform(0, age)),
+            })
+        counts['campaign_update'] = insert_batches(conn, update_table, update_rows, batch_size)
+
+        # Follows: unique (user, campaign) pairs, skewed towards popular campaigns
+        follow_pairs = set()
+        max_follows = min(follows, len(user_ids) * len(campaign_ids))
+        attempts = 0
+        while len(follow_pairs) < max_follows and attempts < max_follows * 10:
+            attempts += 1
+            follow_pairs.add((rng.choice(user_ids), pick_popular()))
+        follow_rows = (
+            {'user_id': user_id, 'campaign_id': campaign_id, 'created_at': now - timedelta(days=rng.randint(0, 365))}
+            for user_id, campaign_id in follow_pairs
+        )
+        counts['user_follow'] = insert_batches(conn, follow_table, follow_rows, batch_size)
+        if campaign_ids:
+            conn.execute(text(FOLLOWERS_COUNT_RANGE_SQL),
+                         {'start_id': min(campaign_ids), 'end_id': max(campaign_ids)})
+
+    log(f"Generated {sum(counts.values())} rows in {time.perf_counter() - started:.2f}s: {counts}")
+    return counts
@@ -0,0 +1,75 @@
+from flask import g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.engine import make_url
+
+# Bind key of the read-only engine in SQLALCHEMY_BINDS
+READ_BIND_KEY = 'read_only'
+
+# Request methods that never write and can be served from the read engine
+READ_ONLY_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+class RoutingSession(Session):
+    """
+    Session that sends queries to the read-only engine while the current
+    request is marked read-only, and everything else (including every
+    flush) to the primary engine.
+    """
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and use_read_engine():
+            engine = self._db.engines.get(READ_BIND_KEY)
+            if engine is not None:
+                return engine
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def use_read_engine():
+    return has_app_context() and g.get('db_read_only', False)
+
+def read_only_sqlite_uri(uri):
+    """SQLite URI that opens the same database file with mode=ro, or None"""
+    url = make_url(uri)
+    if not url.drivername.startswith('sqlite') or url.database in (None, '', ':memory:'):
+        return None
+    if url.query.get('uri'):
+        # Already a driver-level URI, just force read-only mode
+        return url.update_query_dict({'mode': 'ro'}).render_as_string(hide_password=False)
+    return url.set(
+        database=f'file:{url.database}',
+        query={**url.query, 'mode': 'ro', 'uri': 'true'}
+    ).render_as_string(hide_password=False)
+
+def configure_read_routing(app):
+    """
+    Set up the read-only bind and a small primary pool. Must run before
+    db.init_app(app).
+
+    SQLALCHEMY_READ_DATABASE_URI points at a replica (e.g. a Postgres read
+    replica); for SQLite it defaults to the primary file opened read-only,
+    which under WAL lets readers run alongside the single writer.
+    """
+    if not app.config.get('SQLALCHEMY_READ_ROUTING', True):
+        return
+
+    primary_uri = app.config['SQLALCHEMY_DATABASE_URI']
+    read_uri = app.config.get('SQLALCHEMY_READ_DATABASE_URI') or read_only_sqlite_uri(primary_uri)
+
+    primary_url = make_url(primary_uri)
+    if primary_url.database not in (None, '', ':memory:'):
+        # Writes are serialized by the database anyway; keep the writer pool small
+        engine_options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        engine_options.setdefault('pool_size', app.config.get('DB_PRIMARY_POOL_SIZE', 2))
+        engine_options.setdefault('max_overflow', app.config.get('DB_PRIMARY_MAX_OVERFLOW', 2))
+
+    if not read_uri:
+        return
+
+    binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+    binds.setdefault(READ_BIND_KEY, {
+        'url': read_uri,
+        'pool_size': app.config.get('DB_READ_POOL_SIZE', 10),
+        'max_overflow': app.config.get('DB_READ_MAX_OVERFLOW', 10),
+    })
+
+    @app.before_request
+    def route_reads_to_read_engine():
+        g.db_read_only = request.method in READ_ONLY_METHODS
@@ -0,0 +1,170 @@
+"""
+Followed campaigns feed (/api/users/feed): campaign updates and achieved
+milestones of the campaigns a user follows, newest first.
+
+The feed is assembled on read (fan-out on read):
+
+- every followed campaign is one indexed range per source, newest first,
+  limited to one page (ix_campaign_update_campaign_created,
+  ix_milestone_campaign_achieved); the ranges of up to
+  CAMPAIGNS_PER_QUERY campaigns are fetched with one UNION ALL statement
+- the per-campaign runs are k-way merged (heapq.merge) and cut at the
+  page size, so no campaign contributes more rows than one page
+- pages continue from an opaque keyset cursor (timestamp, kind, id)
+  instead of an offset
+
+The head page (no cursor) is cached per user for FEED_CACHE_SECONDS
+(0 disables); following or unfollowing a campaign drops the user's entry,
+and new updates or milestones clear the cache.
+"""
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from itertools import islice
+from flask import current_app
+from sqlalchemy import DateTime, Integer, String, Text, bindparam, select, text
+from app.utils.metrics import record_cache
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+CAMPAIGNS_PER_QUERY = 100  # two terms each; SQLite allows 500 terms per compound SELECT
+MAX_CACHED_FEEDS = 1024
+
+# Sources, in tie-break order for items with the same timestamp
+KINDS = ('milestone', 'update')
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+def forget(user_id):
+    with _cache_lock:
+        _cache.pop(user_id, None)
+
+def encode_cursor(item):
+    return f"{item['created_at']}|{item['type']}|{item['id']}"
+
+def decode_cursor(cursor):
+    """(timestamp, kind, id) from a cursor; raises ValueError"""
+    timestamp, kind, item_id = cursor.split('|')
+    if kind not in KINDS:
+        raise ValueError(f'Unknown feed item type: {kind}')
+    return datetime.fromisoformat(timestamp), kind, int(item_id)
+
+# One campaign's newest rows of each source; {campaign} is the campaign id
+# parameter and {before} the keyset condition (_before). The derived tables
+# are aliased, as PostgreSQL and MySQL require.
+_TERMS = (
+    "SELECT * FROM (SELECT 'update' AS kind, id, campaign_id, created_at, title, content "
+    "FROM campaign_update WHERE campaign_id = :{campaign}{before} "
+    "ORDER BY created_at DESC, id DESC LIMIT :limit) AS updates",
+    "SELECT * FROM (SELECT 'milestone' AS kind, id, campaign_id, achieved_at AS created_at, title, "
+    "description AS content FROM milestone WHERE campaign_id = :{campaign} AND achieved_at IS NOT NULL{before} "
+    "ORDER BY achieved_at DESC, id DESC LIMIT :limit) AS milestones",
+)
+
+def _before(column, kind, cursor):
+    """SQL condition for the rows of `kind` that sort after the cursor"""
+    if cursor is None:
+        return ''
+    _, cursor_kind, _ = cursor
+    if kind < cursor_kind:
+        return f" AND {column} <= :cursor_time"
+    if kind == cursor_kind:
+        return f" AND ({column} < :cursor_time OR ({column} = :cursor_time AND id < :cursor_id))"
+    return f" AND {column} < :cursor_time"
+
+def _statement(count, cursor):
+    """UNION ALL of the ranges of `count` campaigns (:c0, :c1, ...)"""
+    update_term, milestone_term = _TERMS
+    update_before = _before('created_at', 'update', cursor)
+    milestone_before = _before('achieved_at', 'milestone', cursor)
+    terms = []
+    for index in range(count):
+        terms.append(update_term.format(campaign=f'c{index}', before=update_before))
+        terms.append(milestone_term.format(campaign=f'c{index}', before=milestone_before))
+    statement = text(' UNION ALL '.join(terms)).columns(
+        kind=String, id=Integer, campaign_id=Integer, created_at=DateTime, title=String, content=Text
+    )
+    if cursor is not None:
+        statement = statement.bindparams(bindparam('cursor_time', type_=DateTime))
+    return statement
+
+def _sort_key(row):
+    return (row.created_at, row.kind, row.id)
+
+def _runs(session, campaign_ids, cursor, limit):
+    """Newest-first runs of feed rows, one per campaign and source"""
+    runs = {}
+    for start in range(0, len(campaign_ids), CAMPAIGNS_PER_QUERY):
+        batch = campaign_ids[start:start + CAMPAIGNS_PER_QUERY]
+        params = {f'c{index}': campaign_id for index, campaign_id in enumerate(batch)}
+        params['limit'] = limit
+        if cursor is not None:
+            params['cursor_time'], _, params['cursor_id'] = cursor
+        for row in session.execute(_statement(len(batch), cursor), params):
+            runs.setdefault((row.campaign_id, row.kind), []).append(row)
+    return [sorted(run, key=_sort_key, reverse=True) for run in runs.values()]
+
+def feed_page(session, user_id, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    One page of the user's feed: {'items', 'next_cursor'}. `cursor` is
+    the next_cursor of the previous page. Raises ValueError for a bad
+    cursor.
+    """
+    from app.models.models import Campaign, UserFollow
+
+    limit = max(min(limit, MAX_PAGE_SIZE), 1)
+    position = decode_cursor(cursor) if cursor else None
+
+    campaign_ids = [campaign_id for campaign_id, in session.execute(
+        select(UserFollow.campaign_id).where(UserFollow.user_id == user_id).order_by(UserFollow.campaign_id)
+    ).all()]
+    runs = _runs(session, campaign_ids, position, limit + 1) if campaign_ids else []
+    rows = list(islice(heapq.merge(*runs, key=_sort_key, reverse=True), limit + 1))
+
+    page_ids = {row.campaign_id for row in rows}
+    titles = dict(session.execute(
+        select(Campaign.id, Campaign.title).where(Campaign.id.in_(page_ids))
+    ).all()) if page_ids else {}
+
+    items = [{
+        'type': row.kind,
+        'id': row.id,
+        'campaign_id': row.campaign_id,
+        'campaign_title': titles.get(row.campaign_id),
+        'title': row.title,
+        'content': row.content,
+        'created_at': row.created_at.isoformat(),
+    } for row in rows[:limit]]
+    return {
+        'items': items,
+        'next_cursor': encode_cursor(items[-1]) if len(rows) > limit else None,
+    }
+
+def user_feed(session, user_id, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """feed_page(), with the head page cached per user"""
+    ttl = current_app.config.get('FEED_CACHE_SECONDS', 30)
+    if cursor or not ttl:
+        return feed_page(session, user_id, cursor, limit)
+
+    key = user_id
+    with _cache_lock:
+        cached = _cache.get(key)
+    hit = cached is not None and cached[0] > time.monotonic() and cached[1] == limit
+    record_cache('feed', hit)
+    if hit:
+        return cached[2]
+
+    page = feed_page(session, user_id, None, limit)
+    with _cache_lock:
+        _cache[key] = (time.monotonic() + ttl, limit, page)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED_FEEDS:
+            _cache.popitem(last=False)
+    return page
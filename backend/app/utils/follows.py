@@ -0,0 +1,57 @@
+"""
+Campaign follows (user_follow) and the per-campaign follower counter.
+
+A follow is one user_follow row, unique per (user_id, campaign_id)
+(ux_user_follow_user_campaign). toggle_follow() flips it with one DELETE
+or one INSERT ... ON CONFLICT DO NOTHING on that index, and adjusts
+Campaign.followers_count in the same transaction, so the cost does not
+depend on how many campaigns the user follows or how many followers the
+campaign has.
+"""
+from datetime import datetime
+from sqlalchemy import DateTime, bindparam, text
+
+# Recounts followers_count for the campaigns with id BETWEEN :start_id AND :end_id
+FOLLOWERS_COUNT_RANGE_SQL = """
+UPDATE campaign SET followers_count = (
+    SELECT COUNT(*) FROM user_follow WHERE user_follow.campaign_id = campaign.id
+)
+WHERE id BETWEEN :start_id AND :end_id
+"""
+
+_FOLLOW_SQL = text("""
+INSERT INTO user_follow (user_id, campaign_id, created_at) VALUES (:user_id, :campaign_id, :created_at)
+ON CONFLICT (user_id, campaign_id) DO NOTHING
+""").bindparams(bindparam('created_at', type_=DateTime))
+
+_UNFOLLOW_SQL = text("DELETE FROM user_follow WHERE user_id = :user_id AND campaign_id = :campaign_id")
+
+_ADD_FOLLOWERS_SQL = text(
+    "UPDATE campaign SET followers_count = COALESCE(followers_count, 0) + :delta WHERE id = :campaign_id"
+)
+
+def _add_followers(session, campaign_id, delta):
+    session.execute(_ADD_FOLLOWERS_SQL, {'campaign_id': campaign_id, 'delta': delta})
+
+def follow(session, user_id, campaign_id):
+    """Follow a campaign; returns False if the user already followed it"""
+    result = session.execute(_FOLLOW_SQL, {
+        'user_id': user_id, 'campaign_id': campaign_id, 'created_at': datetime.utcnow()
+    })
+    if result.rowcount:
+        _add_followers(session, campaign_id, 1)
+    return bool(result.rowcount)
+
+def unfollow(session, user_id, campaign_id):
+    """Unfollow a campaign; returns False if the user did not follow it"""
+    result = session.execute(_UNFOLLOW_SQL, {'user_id': user_id, 'campaign_id': campaign_id})
+    if result.rowcount:
+        _add_followers(session, campaign_id, -1)
+    return bool(result.rowcount)
+
+def toggle_follow(session, user_id, campaign_id):
+    """Unfollow if following, follow otherwise; returns whether the user now follows"""
+    if unfollow(session, user_id, campaign_id):
+        return False
+    follow(session, user_id, campaign_id)
+    return True
@@ -0,0 +1,301 @@
+"""
+Campaign leaderboards.
+
+Top donors per campaign come from campaign_donor_total, which
+verify_donation keeps up to date and whose (campaign_id, total_amount)
+index serves the top N without sorting.
+
+The weekly boards (most funded this week, fastest-growing) come from
+campaign_weekly_board: per week_end day and campaign, the verified
+amount of the 7 days up to that day, of the 7 days before, and the
+growth between them, with (week_end, amount) and (week_end, growth)
+indexes serving each board's top N. A verification refreshes its
+campaign's row from the campaign's last 14 rollup rows; the first
+verification of a day fills that day's board for every campaign. Until
+then (a day without verifications yet) the boards are ranked from the
+rollup with bounded heaps and cached per process for
+LEADERBOARD_CACHE_SECONDS.
+
+Rows are recomputed from the rollup rather than incremented, so a
+refresh is idempotent and a board filled concurrently with a
+verification counts its donation once.
+"""
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import Date, DateTime, bindparam, func, select, text
+from app.utils.backfill import run_sql_backfill
+from app.utils.metrics import record_cache
+from app.utils.rollups import ROLLUP_TABLE
+
+DONOR_TOTAL_TABLE = 'campaign_donor_total'
+REBUILD_NAME = 'rebuild_campaign_donor_total_by_campaign'
+WEEKLY_BOARD_TABLE = 'campaign_weekly_board'
+REBUILD_BATCH_SIZE = 100  # campaigns per transaction
+
+_ON_CONFLICT = f"""
+ON CONFLICT (campaign_id, donor_id) DO UPDATE SET
+    total_amount = {DONOR_TOTAL_TABLE}.total_amount + excluded.total_amount,
+    donation_count = {DONOR_TOTAL_TABLE}.donation_count + excluded.donation_count,
+    last_donation_at = CASE
+        WHEN {DONOR_TOTAL_TABLE}.last_donation_at > excluded.last_donation_at THEN {DONOR_TOTAL_TABLE}.last_donation_at
+        ELSE excluded.last_donation_at
+    END
+"""
+
+# Anonymous donations are left out of the donor rankings
+_COUNTED = (
+    "donation.status = 'verified' AND donation.donor_id IS NOT NULL "
+    "AND COALESCE(donation.is_anonymous, FALSE) = FALSE"
+)
+
+# Totals per (campaign, donor) of the counted donations matching {where}
+_DONOR_TOTALS = f"""
+SELECT donation.campaign_id, donation.donor_id, SUM(donation.amount), COUNT(*),
+       MAX(COALESCE(donation.verified_at, donation.created_at))
+FROM donation
+WHERE {{where}} AND {_COUNTED}
+GROUP BY 1, 2
+"""
+
+# Adds the verified donations with id BETWEEN :start_id AND :end_id
+ADD_DONATION_RANGE_SQL = f"""
+INSERT INTO {DONOR_TOTAL_TABLE} (campaign_id, donor_id, total_amount, donation_count, last_donation_at)
+{_DONOR_TOTALS.format(where='donation.id BETWEEN :start_id AND :end_id')}
+{_ON_CONFLICT}
+"""
+
+# Replaces the totals of the campaigns with id BETWEEN :start_id AND :end_id
+# (see rebuild_donor_totals). The upsert overwrites a row a concurrent
+# verification inserted after the DELETE: the totals selected afterwards
+# already include its donation.
+REPLACE_CAMPAIGN_RANGE_SQL = [
+    f"DELETE FROM {DONOR_TOTAL_TABLE} WHERE campaign_id BETWEEN :start_id AND :end_id",
+    f"""
+INSERT INTO {DONOR_TOTAL_TABLE} (campaign_id, donor_id, total_amount, donation_count, last_donation_at)
+{_DONOR_TOTALS.format(where='donation.campaign_id BETWEEN :start_id AND :end_id')}
+ON CONFLICT (campaign_id, donor_id) DO UPDATE SET
+    total_amount = excluded.total_amount,
+    donation_count = excluded.donation_count,
+    last_donation_at = excluded.last_donation_at
+""",
+]
+
+_ADD_DONATION_SQL = text(f"""
+INSERT INTO {DONOR_TOTAL_TABLE} (campaign_id, donor_id, total_amount, donation_count, last_donation_at)
+VALUES (:campaign_id, :donor_id, :amount, 1, :donated_at)
+{_ON_CONFLICT}
+""").bindparams(bindparam('donated_at', type_=DateTime))
+
+def _weekly_board_sql(where, on_conflict):
+    """The board ending :week_end from the rollup rows matching `where` (campaigns with none this week left out)"""
+    return text(f"""
+INSERT INTO {WEEKLY_BOARD_TABLE} (week_end, campaign_id, amount, previous_amount, growth)
+SELECT :week_end, totals.campaign_id, totals.amount, totals.previous_amount,
+       totals.amount - totals.previous_amount
+FROM (
+    SELECT campaign_id,
+           SUM(CASE WHEN day >= :week_start THEN total_amount ELSE 0 END) AS amount,
+           SUM(CASE WHEN day < :week_start THEN total_amount ELSE 0 END) AS previous_amount
+    FROM {ROLLUP_TABLE}
+    WHERE day BETWEEN :previous_start AND :week_end{where}
+    GROUP BY campaign_id
+) AS totals
+WHERE totals.amount > 0
+{on_conflict}
+""").bindparams(*(bindparam(name, type_=Date) for name in ('week_end', 'week_start', 'previous_start')))
+
+# One campaign's row, through ix_donation_daily_rollup_campaign_day
+_REFRESH_CAMPAIGN_SQL = _weekly_board_sql(' AND campaign_id = :campaign_id', """
+ON CONFLICT (week_end, campaign_id) DO UPDATE SET
+    amount = excluded.amount,
+    previous_amount = excluded.previous_amount,
+    growth = excluded.growth
+""")
+
+# Every campaign's row; rows a verification already refreshed are kept
+_FILL_BOARD_SQL = _weekly_board_sql('', 'ON CONFLICT (week_end, campaign_id) DO NOTHING')
+
+def week_bounds(week_end):
+    """{week_end, week_start, previous_start} of the board ending `week_end`"""
+    week_start = week_end - timedelta(days=6)
+    return {'week_end': week_end, 'week_start': week_start, 'previous_start': week_start - timedelta(days=7)}
+
+def board_filled(session, week_end):
+    from app.models.models import CampaignWeeklyBoard as Board
+
+    return session.execute(select(Board.campaign_id).where(Board.week_end == week_end).limit(1)).first() is not None
+
+def fill_weekly_board(conn, week_end):
+    """Fill the board ending `week_end` from the rollup and drop older boards"""
+    from app.models.models import CampaignWeeklyBoard as Board
+
+    conn.execute(Board.__table__.delete().where(Board.week_end < week_end))
+    conn.execute(_FILL_BOARD_SQL, week_bounds(week_end))
+
+def rebuild_weekly_board(engine, week_end=None):
+    """Refill this week's board from the rollup, e.g. after rebuild_rollups()"""
+    from app.models.models import CampaignWeeklyBoard as Board
+
+    week_end = week_end or datetime.utcnow().date()
+    with engine.begin() as conn:
+        conn.execute(Board.__table__.delete().where(Board.week_end == week_end))
+        fill_weekly_board(conn, week_end)
+
+def record_verified_donation(session, donation):
+    """
+    Add a just-verified donation to its donor's total and refresh its
+    campaign on this week's board, in the caller's transaction. Runs after
+    rollups.record_verified_donation: the board is read from the rollup.
+    """
+    if donation.donor_id is not None and not donation.is_anonymous:
+        session.execute(_ADD_DONATION_SQL, {
+            'campaign_id': donation.campaign_id,
+            'donor_id': donation.donor_id,
+            'amount': donation.amount,
+            'donated_at': donation.verified_at or datetime.utcnow(),
+        })
+
+    week_end = (donation.verified_at or datetime.utcnow()).date()
+    if board_filled(session, week_end):
+        session.execute(_REFRESH_CAMPAIGN_SQL, {**week_bounds(week_end), 'campaign_id': donation.campaign_id})
+    else:
+        fill_weekly_board(session, week_end)
+
+def rebuild_donor_totals(engine, batch_size=REBUILD_BATCH_SIZE, pause=0.0, log=print):
+    """
+    Recompute campaign_donor_total from the donation table while donations
+    keep being verified: like rebuild_rollups(), each transaction replaces
+    the totals of a chunk of campaigns, so no donation is counted twice.
+    Resumable; returns the number of campaigns.
+    """
+    with engine.begin() as conn:
+        conn.execute(text(f"DELETE FROM {DONOR_TOTAL_TABLE} WHERE campaign_id NOT IN (SELECT id FROM campaign)"))
+    return run_sql_backfill(engine, REBUILD_NAME, 'campaign', REPLACE_CAMPAIGN_RANGE_SQL,
+                            batch_size=batch_size, pause=pause, log=log)
+
+def top_donors(session, campaign_id, limit=10):
+    from app.models.models import CampaignDonorTotal, User
+
+    rows = session.execute(
+        select(CampaignDonorTotal, User.full_name, User.username)
+        .join(User, User.id == CampaignDonorTotal.donor_id)
+        .where(CampaignDonorTotal.campaign_id == campaign_id)
+        .order_by(CampaignDonorTotal.total_amount.desc())
+        .limit(limit)
+    )
+    return [{
+        'donor_id': total.donor_id,
+        'donor_name': full_name or username,
+        'total_amount': total.total_amount,
+        'donation_count': total.donation_count,
+    } for total, full_name, username in rows]
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def weekly_leaderboards(session, limit=10, today=None):
+    """
+    'most_funded_this_week': campaigns by verified amount over the last
+    7 days; 'fastest_growing': campaigns by increase over the 7 days before.
+    """
+    today = today or datetime.utcnow().date()
+    boards = read_weekly_board(session, limit, today)
+    if boards is not None:
+        return boards
+
+    # Nothing verified today yet: the board is filled with the first verification
+    key = (limit, today)
+    ttl = current_app.config.get('LEADERBOARD_CACHE_SECONDS', 60)
+    with _cache_lock:
+        cached = _cache.get(key)
+    hit = cached is not None and cached[0] > time.monotonic()
+    record_cache('leaderboards', hit)
+    if hit:
+        return cached[1]
+
+    boards = compute_weekly_leaderboards(session, limit, today)
+    with _cache_lock:
+        _cache[key] = (time.monotonic() + ttl, boards)
+    return boards
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+def _boards(week_start, today, most_funded, fastest):
+    return {
+        'week_start': week_start.isoformat(),
+        'week_end': today.isoformat(),
+        'most_funded_this_week': most_funded,
+        'fastest_growing': fastest,
+    }
+
+def read_weekly_board(session, limit=10, today=None):
+    """The weekly boards from campaign_weekly_board, or None if today's board is not filled"""
+    from app.models.models import Campaign, CampaignWeeklyBoard as Board
+
+    today = today or datetime.utcnow().date()
+    query = (
+        select(Board, Campaign.title)
+        .join(Campaign, Campaign.id == Board.campaign_id)
+        .where(Board.week_end == today)
+        .limit(limit)
+    )
+    most_funded = session.execute(
+        query.order_by(Board.amount.desc())
+    ).all()
+    if not most_funded:
+        # Any verification fills the board with at least its campaign
+        return None
+    fastest = session.execute(
+        query.where(Board.growth > 0).order_by(Board.growth.desc())
+    ).all()
+
+    return _boards(today - timedelta(days=6), today, [
+        {'campaign_id': row.campaign_id, 'title': title, 'amount': row.amount}
+        for row, title in most_funded
+    ], [
+        {'campaign_id': row.campaign_id, 'title': title, 'amount': row.amount,
+         'previous_amount': row.previous_amount, 'growth': row.growth}
+        for row, title in fastest
+    ])
+
+def compute_weekly_leaderboards(session, limit=10, today=None):
+    """The weekly boards ranked from the last two weeks of the daily rollup"""
+    from app.models.models import Campaign, DonationDailyRollup as Rollup
+
+    today = today or datetime.utcnow().date()
+    bounds = week_bounds(today)
+    week_start, previous_start = bounds['week_start'], bounds['previous_start']
+
+    this_week = {}
+    previous_week = {}
+    rows = session.execute(
+        select(Rollup.campaign_id, Rollup.day >= week_start, func.sum(Rollup.total_amount))
+        .where(Rollup.day.between(previous_start, today))
+        .group_by(Rollup.campaign_id, Rollup.day >= week_start)
+    )
+    for campaign_id, in_this_week, amount in rows:
+        (this_week if in_this_week else previous_week)[campaign_id] = amount or 0.0
+
+    # Bounded heaps: O(n log limit) over the campaigns with activity
+    most_funded = heapq.nlargest(limit, this_week.items(), key=lambda item: item[1])
+    growth = ((campaign_id, amount - previous_week.get(campaign_id, 0.0)) for campaign_id, amount in this_week.items())
+    fastest = heapq.nlargest(limit, (item for item in growth if item[1] > 0), key=lambda item: item[1])
+
+    ids = {campaign_id for campaign_id, _ in most_funded + fastest}
+    titles = dict(session.execute(select(Campaign.id, Campaign.title).where(Campaign.id.in_(ids))).all()) if ids else {}
+
+    def entry(campaign_id, **values):
+        return {'campaign_id': campaign_id, 'title': titles.get(campaign_id), **values}
+
+    return _boards(week_start, today, [
+        entry(campaign_id, amount=amount) for campaign_id, amount in most_funded
+    ], [
+        entry(campaign_id, amount=this_week[campaign_id], previous_amount=previous_week.get(campaign_id, 0.0),
+              growth=increase)
+        for campaign_id, increase in fastest
+    ])
@@ -0,0 +1,69 @@
+"""
+Campaign lifecycle: closes public campaigns whose end_date has passed.
+
+sweep_expired_campaigns() finds them through ix_campaign_status_end_date
+and completes them with one UPDATE per batch, so the public list queries
+can filter on status alone. Each closed campaign is published to its live
+progress stream and the cached campaign list pages are cleared.
+
+Run it from cron with sweep_campaigns.py, or in-process every
+CAMPAIGN_SWEEP_INTERVAL seconds (setup_campaign_sweeper). Sweeps are
+idempotent, so several processes sweeping the same database only repeat
+an empty query.
+"""
+from datetime import datetime
+from sqlalchemy import select, update
+from app.utils import campaign_queries
+from app.utils.background import setup_worker
+from app.utils.campaign_queries import PUBLIC_STATUSES
+from app.utils.pubsub import campaign_events, campaign_progress
+
+DEFAULT_SWEEP_BATCH_SIZE = 500
+EXPIRED_STATUS = 'completed'
+
+def expired_campaigns_query(now, limit=None):
+    from app.models.models import Campaign
+
+    query = (
+        select(Campaign)
+        .where(Campaign.status.in_(PUBLIC_STATUSES), Campaign.end_date <= now)
+        .order_by(Campaign.end_date)
+    )
+    return query.limit(limit) if limit else query
+
+def sweep_expired_campaigns(session, now=None, batch_size=DEFAULT_SWEEP_BATCH_SIZE, log=None):
+    """
+    Complete the public campaigns with end_date <= now, one transaction
+    per batch. Returns how many campaigns were closed.
+    """
+    from app.models.models import Campaign
+
+    now = now or datetime.utcnow()
+    swept = 0
+    while True:
+        campaigns = session.execute(expired_campaigns_query(now, batch_size)).scalars().all()
+        if not campaigns:
+            break
+
+        # The status condition skips campaigns a request changed in the meantime
+        session.execute(
+            update(Campaign)
+            .where(Campaign.id.in_([campaign.id for campaign in campaigns]), Campaign.status.in_(PUBLIC_STATUSES))
+            .values(status=EXPIRED_STATUS, updated_at=now)
+        )
+        events = [campaign_progress(campaign) for campaign in campaigns]
+        session.commit()
+
+        for event in events:
+            campaign_events.publish(event['campaign_id'], event)
+        swept += len(campaigns)
+        if log:
+            log(f"Closed {swept} expired campaign(s)")
+
+    if swept:
+        campaign_queries.clear_cache()
+    return swept
+
+def setup_campaign_sweeper(app):
+    """Opt-in in-process sweeper, every CAMPAIGN_SWEEP_INTERVAL seconds (0 disables)"""
+    setup_worker(app, 'campaign_sweeper', app.config.get('CAMPAIGN_SWEEP_INTERVAL', 0), sweep_expired_campaigns)
@@ -0,0 +1,263 @@
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from flask import Response, current_app, g, request
+
+# Histogram buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name -> (type, help); every sample written must belong to one of these
+METRICS = {
+    'aksi_nyata_requests_total': ('counter', 'HTTP requests by endpoint, method and status'),
+    'aksi_nyata_request_duration_seconds': ('histogram', 'HTTP request latency by endpoint'),
+    'aksi_nyata_db_queries_total': ('counter', 'SQL statements executed by endpoint'),
+    'aksi_nyata_db_duration_seconds': ('histogram', 'Time spent in SQL per request by endpoint'),
+    'aksi_nyata_upload_bytes_total': ('counter', 'Bytes received in multipart uploads by endpoint'),
+    'aksi_nyata_cache_requests_total': ('counter', 'Cache lookups by cache and result (hit/miss)'),
+}
+
+_HEADER = struct.Struct('q')
+_KEY_LENGTH = struct.Struct('i')
+_VALUE = struct.Struct('d')
+
+def _padded(length):
+    return (length + 7) // 8 * 8
+
+def read_entries(data, used):
+    """Yield (key, value, value offset) from a metrics file's bytes"""
+    offset = _HEADER.size
+    while offset < used:
+        length = _KEY_LENGTH.unpack_from(data, offset)[0]
+        key = bytes(data[offset + _KEY_LENGTH.size:offset + _KEY_LENGTH.size + length]).decode('utf-8')
+        value_offset = offset + _padded(_KEY_LENGTH.size + length)
+        yield key, _VALUE.unpack_from(data, value_offset)[0], value_offset
+        offset = value_offset + _VALUE.size
+
+class MmapValues:
+    """
+    key -> float64 store in an mmap'd file, written by one process only.
+
+    Layout: 8-byte used length, then entries of [4-byte key length]
+    [key, padded to 8 bytes][8-byte double]. New entries are written
+    before the used length is bumped, so readers in other processes only
+    ever see complete entries.
+    """
+    def __init__(self, path, initial_size=64 * 1024):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+        if os.path.getsize(path) < initial_size:
+            self._file.truncate(initial_size)
+        self._capacity = os.path.getsize(path)
+        self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+        self._used = _HEADER.unpack_from(self._mmap, 0)[0] or _HEADER.size
+        self._positions = {key: offset for key, value, offset in read_entries(self._mmap, self._used)}
+
+    def _add_entry(self, key):
+        encoded = key.encode('utf-8')
+        value_offset = self._used + _padded(_KEY_LENGTH.size + len(encoded))
+        end = value_offset + _VALUE.size
+        if end > self._capacity:
+            while end > self._capacity:
+                self._capacity *= 2
+            self._mmap.close()
+            self._file.truncate(self._capacity)
+            self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+
+        _KEY_LENGTH.pack_into(self._mmap, self._used, len(encoded))
+        self._mmap[self._used + _KEY_LENGTH.size:self._used + _KEY_LENGTH.size + len(encoded)] = encoded
+        _VALUE.pack_into(self._mmap, value_offset, 0.0)
+        self._used = end
+        _HEADER.pack_into(self._mmap, 0, self._used)
+        self._positions[key] = value_offset
+        return value_offset
+
+    def inc(self, key, amount=1.0):
+        with self._lock:
+            offset = self._positions.get(key)
+            if offset is None:
+                offset = self._add_entry(key)
+            _VALUE.pack_into(self._mmap, offset, _VALUE.unpack_from(self._mmap, offset)[0] + amount)
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        return {}
+    used = _HEADER.unpack_from(data, 0)[0]
+    return {key: value for key, value, offset in read_entries(data, used)}
+
+def sample_key(name, labels):
+    return json.dumps([name, sorted(labels.items())])
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+def format_sample(name, labels, value):
+    if labels:
+        label_text = ','.join(f'{k}="{v}"' for k, v in labels)
+        return f'{name}{{{label_text}}} {format_value(value)}'
+    return f'{name} {format_value(value)}'
+
+class Metrics:
+    """
+    Counters and histograms shared by all worker processes.
+
+    Every process writes its own file (metrics_<pid>.db) in `directory`;
+    collect() sums the files of all processes, so any worker can serve
+    /metrics. Files are opened on first write and reopened after a fork.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self._values = None
+        self._pid = None
+
+    def _store(self):
+        if self._pid != os.getpid():
+            os.makedirs(self.directory, exist_ok=True)
+            self._pid = os.getpid()
+            self._values = MmapValues(os.path.join(self.directory, f'metrics_{self._pid}.db'))
+        return self._values
+
+    def inc(self, name, labels=None, amount=1.0):
+        self._store().inc(sample_key(name, labels or {}), amount)
+
+    def observe(self, name, labels, value, buckets=DEFAULT_BUCKETS):
+        store = self._store()
+        for bound in buckets:
+            if value <= bound:
+                store.inc(sample_key(f'{name}_bucket', {**labels, 'le': format_value(bound)}))
+        store.inc(sample_key(f'{name}_bucket', {**labels, 'le': '+Inf'}))
+        store.inc(sample_key(f'{name}_sum', labels), value)
+        store.inc(sample_key(f'{name}_count', labels))
+
+    def collect(self):
+        """Sample key -> value summed over every process file"""
+        totals = {}
+        if not os.path.isdir(self.directory):
+            return totals
+        for filename in os.listdir(self.directory):
+            if filename.startswith('metrics_') and filename.endswith('.db'):
+                for key, value in read_file(os.path.join(self.directory, filename)).items():
+                    totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+    def render(self, totals=None, gauges=()):
+        """
+        Text exposition format of `totals` (default: collect()). `gauges`
+        are (name, help, [(labels, value)]) computed at scrape time.
+        """
+        samples = {}
+        for key, value in (self.collect() if totals is None else totals).items():
+            name, labels = json.loads(key)
+            family = name
+            for suffix in ('_bucket', '_sum', '_count'):
+                if name.endswith(suffix) and name[:-len(suffix)] in METRICS:
+                    family = name[:-len(suffix)]
+            samples.setdefault(family, []).append((name, [tuple(label) for label in labels], value))
+
+        def order(sample):
+            name, labels, value = sample
+            plain = [label for label in labels if label[0] != 'le']
+            le = dict(labels).get('le')
+            return (plain, name, float(le) if le is not None else 0.0)
+
+        lines = []
+        for family, (kind, help_text) in METRICS.items():
+            if family not in samples:
+                continue
+            lines.append(f'# HELP {family} {help_text}')
+            lines.append(f'# TYPE {family} {kind}')
+            lines.extend(format_sample(*sample) for sample in sorted(samples[family], key=order))
+        for name, help_text, values in gauges:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} gauge')
+            lines.extend(format_sample(name, sorted(labels.items()), value) for labels, value in values)
+        return '\n'.join(lines) + '\n'
+
+def clear_metrics_dir(directory):
+    """Remove the files of previous runs; call once before workers start"""
+    if os.path.isdir(directory):
+        for filename in os.listdir(directory):
+            if filename.startswith('metrics_') and filename.endswith('.db'):
+                os.remove(os.path.join(directory, filename))
+
+def record_cache(cache, hit):
+    """Count a cache lookup, for the cache hit ratio"""
+    metrics = current_app.extensions.get('metrics')
+    if metrics is not None:
+        metrics.inc('aksi_nyata_cache_requests_total', {'cache': cache, 'result': 'hit' if hit else 'miss'})
+
+def cache_hit_ratios(totals):
+    counts = {}
+    for key, value in totals.items():
+        name, labels = json.loads(key)
+        if name == 'aksi_nyata_cache_requests_total':
+            labels = dict(labels)
+            counts.setdefault(labels['cache'], {'hit': 0.0, 'miss': 0.0})[labels['result']] += value
+    return [
+        ({'cache': cache}, c['hit'] / (c['hit'] + c['miss']))
+        for cache, c in sorted(counts.items()) if c['hit'] + c['miss']
+    ]
+
+def pending_donations():
+    from app import db
+    from app.models.models import Donation
+    from sqlalchemy import func, select
+
+    return db.session.execute(select(func.count(Donation.id)).where(Donation.status == 'pending')).scalar()
+
+def setup_metrics(app):
+    """
+    Record request metrics and serve them at /metrics in the Prometheus
+    text format. METRICS_DIR must be shared by all gunicorn workers.
+    Disabled with METRICS_ENABLED=False.
+    """
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    directory = app.config.get('METRICS_DIR') or os.path.join(tempfile.gettempdir(), 'aksi_nyata_metrics')
+    metrics = app.extensions['metrics'] = Metrics(directory)
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.get('metrics_started')
+        if started is None or request.endpoint == 'metrics':
+            return response
+
+        endpoint = request.endpoint or 'unmatched'
+        labels = {'endpoint': endpoint, 'method': request.method}
+        metrics.inc('aksi_nyata_requests_total', {**labels, 'status': str(response.status_code)})
+        metrics.observe('aksi_nyata_request_duration_seconds', labels, time.perf_counter() - started)
+
+        stats = g.get('query_stats')
+        if stats is not None:
+            metrics.inc('aksi_nyata_db_queries_total', {'endpoint': endpoint}, stats.count)
+            metrics.observe('aksi_nyata_db_duration_seconds', {'endpoint': endpoint}, stats.duration)
+
+        if request.mimetype == 'multipart/form-data' and request.content_length:
+            metrics.inc('aksi_nyata_upload_bytes_total', {'endpoint': endpoint}, request.content_length)
+        return response
+
+    @app.route('/metrics')
+    def metrics_endpoint():
+        totals = metrics.collect()
+        gauges = [
+            ('aksi_nyata_pending_donations', 'Donations waiting for verification', [({}, pending_donations())]),
+            ('aksi_nyata_cache_hit_ratio', 'Cache hits / lookups by cache', cache_hit_ratios(totals)),
+        ]
+        return Response(metrics.render(totals, gauges), mimetype='text/plain; version=0.0.4')
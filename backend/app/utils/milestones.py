@@ -0,0 +1,68 @@
+"""
+Milestone evaluation for verified donations.
+
+Campaign.next_milestone_amount caches the target of the campaign's lowest
+pending milestone (NULL when none is pending). verify_donation compares the
+new total with it, so most donations touch no milestone at all; when a
+threshold is crossed, one UPDATE marks every crossed milestone achieved and
+one MIN() query moves the threshold to the next pending milestone.
+
+Milestone writes keep the cached threshold in step (milestone_added,
+refresh_next_milestone), and NEXT_MILESTONE_RANGE_SQL recomputes it for a
+range of campaigns (migration backfill, datagen).
+"""
+from datetime import datetime
+from sqlalchemy import func, select, update
+
+# Recomputes next_milestone_amount for the campaigns with id BETWEEN :start_id AND :end_id
+NEXT_MILESTONE_RANGE_SQL = """
+UPDATE campaign SET next_milestone_amount = (
+    SELECT MIN(milestone.target_amount) FROM milestone
+    WHERE milestone.campaign_id = campaign.id AND milestone.status = 'pending'
+)
+WHERE id BETWEEN :start_id AND :end_id
+"""
+
+def next_milestone_amount(session, campaign_id):
+    """Target of the lowest pending milestone of a campaign, or None"""
+    from app.models.models import Milestone
+
+    return session.execute(
+        select(func.min(Milestone.target_amount))
+        .where(Milestone.campaign_id == campaign_id, Milestone.status == 'pending')
+    ).scalar()
+
+def refresh_next_milestone(session, campaign):
+    campaign.next_milestone_amount = next_milestone_amount(session, campaign.id)
+
+def milestone_added(campaign, milestone):
+    """Lower the cached threshold for a new pending milestone"""
+    if (milestone.status or 'pending') != 'pending':  # status defaults to pending on insert
+        return
+    if campaign.next_milestone_amount is None or milestone.target_amount < campaign.next_milestone_amount:
+        campaign.next_milestone_amount = milestone.target_amount
+
+def record_progress(session, campaign, now=None):
+    """
+    Mark the pending milestones reached by campaign.current_amount as
+    achieved, in the caller's transaction. Returns the achieved milestones'
+    (id, title) rows.
+    """
+    from app.models.models import Milestone
+
+    threshold = campaign.next_milestone_amount
+    if threshold is None or (campaign.current_amount or 0) < threshold:
+        return []
+
+    achieved = session.execute(
+        update(Milestone)
+        .where(
+            Milestone.campaign_id == campaign.id,
+            Milestone.status == 'pending',
+            Milestone.target_amount <= campaign.current_amount
+        )
+        .values(status='achieved', achieved_at=now or datetime.utcnow())
+        .returning(Milestone.id, Milestone.title)
+    ).all()
+    refresh_next_milestone(session, campaign)
+    return achieved
@@ -0,0 +1,157 @@
+"""
+Notifications for campaign followers, fanned out in the background.
+
+Posting a campaign update or achieving a milestone only enqueues a
+notification_job row, in the same transaction as the event (enqueue), so
+the request does not depend on how many followers the campaign has.
+
+A worker then walks the followers in user_id order through
+ix_user_follow_campaign_user, NOTIFICATION_CHUNK_SIZE at a time, one
+transaction per chunk:
+
+- INSERT ... SELECT writes the chunk's notification rows
+- one UPDATE adds 1 to the followers' unread counters
+- the job's last_user_id checkpoint moves past the chunk, guarded by its
+  old value, so an interrupted job resumes after its last committed chunk
+  and two workers never deliver the same chunk twice
+
+Workers: notification_worker.py (a dedicated process), or an in-process
+PeriodicWorker every NOTIFICATION_WORKER_INTERVAL seconds that enqueue
+wakes up right away.
+"""
+from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy import DateTime, bindparam, case, select, text, update
+from app.utils.background import setup_worker
+
+DEFAULT_FANOUT_CHUNK_SIZE = 1000
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+WORKER_NAME = 'notification_worker'
+
+_CHUNK_END_SQL = text("""
+SELECT MAX(user_id) FROM (
+    SELECT user_id FROM user_follow WHERE campaign_id = :campaign_id AND user_id > :after
+    ORDER BY user_id LIMIT :chunk_size
+) AS chunk
+""")
+
+_CHUNK_FOLLOWERS = "SELECT user_id FROM user_follow WHERE campaign_id = :campaign_id AND user_id > :after AND user_id <= :upto"
+
+_INSERT_NOTIFICATIONS_SQL = text(f"""
+INSERT INTO notification (user_id, kind, campaign_id, source_id, title, created_at)
+SELECT user_id, :kind, :campaign_id, :source_id, :title, :created_at FROM ({_CHUNK_FOLLOWERS}) AS followers
+""").bindparams(bindparam('created_at', type_=DateTime))
+
+_ADD_UNREAD_SQL = text(f"""
+UPDATE "user" SET unread_notifications = unread_notifications + 1
+WHERE id IN ({_CHUNK_FOLLOWERS})
+""")
+
+def enqueue(session, kind, campaign_id, source_id, title):
+    """Queue notifications about an event, in the caller's transaction"""
+    from app.models.models import NotificationJob
+
+    session.add(NotificationJob(kind=kind, campaign_id=campaign_id, source_id=source_id, title=title))
+
+def wake_worker():
+    """Start the in-process worker now, if there is one (call after the commit)"""
+    worker = current_app.extensions.get(WORKER_NAME) if has_app_context() else None
+    if worker is not None:
+        worker.wake()
+
+def fan_out_chunk(session, job, chunk_size=DEFAULT_FANOUT_CHUNK_SIZE):
+    """
+    Deliver the job to its next chunk of followers and commit. Returns the
+    number of notifications written; 0 once the job is finished.
+    """
+    from app.models.models import NotificationJob
+
+    after = job.last_user_id or 0
+    params = {'campaign_id': job.campaign_id, 'after': after}
+    upto = session.execute(_CHUNK_END_SQL, {**params, 'chunk_size': chunk_size}).scalar()
+    if upto is None:
+        job.finished_at = datetime.utcnow()
+        session.commit()
+        return 0
+
+    params['upto'] = upto
+    claimed = session.execute(
+        update(NotificationJob)
+        .where(NotificationJob.id == job.id, NotificationJob.last_user_id == after)
+        .values(last_user_id=upto)
+    ).rowcount
+    if not claimed:
+        # Another worker delivered this chunk first
+        session.rollback()
+        return 0
+
+    written = session.execute(_INSERT_NOTIFICATIONS_SQL, {
+        **params, 'kind': job.kind, 'source_id': job.source_id, 'title': job.title, 'created_at': job.created_at,
+    }).rowcount
+    session.execute(_ADD_UNREAD_SQL, params)
+    session.commit()
+    return written
+
+def run_pending(session, chunk_size=None, log=None):
+    """Fan out every pending job. Returns the number of notifications written."""
+    from app.models.models import NotificationJob
+
+    if chunk_size is None:
+        chunk_size = current_app.config.get('NOTIFICATION_CHUNK_SIZE', DEFAULT_FANOUT_CHUNK_SIZE)
+    written = 0
+    while True:
+        job = session.execute(
+            select(NotificationJob).where(NotificationJob.finished_at.is_(None)).order_by(NotificationJob.id).limit(1)
+        ).scalar()
+        if job is None:
+            return written
+        delivered = 0
+        # Committed chunks expire the job, so each pass re-reads the checkpoint
+        while job.finished_at is None:
+            delivered += fan_out_chunk(session, job, chunk_size)
+        written += delivered
+        if log:
+            log(f"Job {job.id} ({job.kind} {job.source_id} of campaign {job.campaign_id}): {delivered} notification(s)")
+
+def notifications_page(session, user_id, before=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    A page of the user's notifications, newest first: (notifications,
+    next cursor). `before` is the next cursor of the previous page.
+    """
+    from app.models.models import Notification
+
+    limit = max(min(limit, MAX_PAGE_SIZE), 1)
+    query = select(Notification).where(Notification.user_id == user_id)
+    if before is not None:
+        query = query.where(Notification.id < before)
+    rows = session.execute(query.order_by(Notification.id.desc()).limit(limit + 1)).scalars().all()
+    return rows[:limit], (rows[limit - 1].id if len(rows) > limit else None)
+
+def mark_read(session, user_id, ids=None):
+    """
+    Mark the user's unread notifications (all, or `ids`) read and lower the
+    unread counter, in the caller's transaction. Returns how many changed.
+    """
+    from app.models.models import Notification, User
+
+    query = update(Notification).where(Notification.user_id == user_id, Notification.read_at.is_(None))
+    if ids is not None:
+        query = query.where(Notification.id.in_(ids))
+    changed = session.execute(
+        query.values(read_at=datetime.utcnow()).execution_options(synchronize_session=False)
+    ).rowcount
+    if changed:
+        session.execute(
+            update(User).where(User.id == user_id)
+            # Never below 0
+            .values(unread_notifications=case(
+                (User.unread_notifications > changed, User.unread_notifications - changed), else_=0
+            ))
+            .execution_options(synchronize_session=False)
+        )
+    return changed
+
+def setup_notification_worker(app):
+    """Opt-in in-process fan-out, every NOTIFICATION_WORKER_INTERVAL seconds (0 disables)"""
+    setup_worker(app, WORKER_NAME, app.config.get('NOTIFICATION_WORKER_INTERVAL', 0), run_pending)
@@ -0,0 +1,116 @@
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from flask import g, request
+
+def frame_label(frame):
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+def collapse(frame):
+    """Stack of `frame` in collapsed format, outermost frame first"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+class StackSampler:
+    """
+    Samples the stacks of the registered request threads every `interval`
+    seconds from one background thread (sys._current_frames), so profiled
+    requests run at full speed instead of under a tracing profiler.
+    """
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._active = {}
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def start(self, thread_id):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Threads do not survive a fork; start one per worker process
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, name='stack-sampler', daemon=True).start()
+            self._active[thread_id] = Counter()
+
+    def stop(self, thread_id):
+        with self._lock:
+            return self._active.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for thread_id, stacks in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[collapse(frame)] += 1
+
+def write_profile(directory, endpoint, duration_ms, stacks, max_files):
+    """
+    Write `stacks` as a collapsed-stack file (flamegraph.pl / speedscope
+    input) tagged with the route, then keep only the newest `max_files`.
+    """
+    os.makedirs(directory, exist_ok=True)
+    now = time.time()
+    timestamp = f'{time.strftime("%Y%m%d-%H%M%S", time.localtime(now))}.{int(now * 1000) % 1000:03d}'
+    filename = f'{timestamp}-{os.getpid()}-{endpoint}-{duration_ms:.0f}ms.collapsed'
+    path = os.path.join(directory, filename)
+    with open(path, 'w') as f:
+        for stack, count in stacks.most_common():
+            f.write(f'{endpoint};{stack} {count}\n')
+
+    profiles = sorted(
+        (os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.collapsed')),
+        key=os.path.getmtime
+    )
+    for old in profiles[:-max_files] if max_files else []:
+        os.remove(old)
+    return path
+
+def setup_profiler(app):
+    """
+    Opt-in sampling profiler (PROFILER_ENABLED=True). Profiles a random
+    PROFILER_SAMPLE_RATE fraction of requests, plus every request slower
+    than PROFILER_THRESHOLD_MS when a threshold is set, and writes them to
+    PROFILER_DIR keeping the newest PROFILER_MAX_FILES. When disabled no
+    hooks are registered at all.
+    """
+    if not app.config.get('PROFILER_ENABLED', False):
+        return
+
+    sample_rate = app.config.get('PROFILER_SAMPLE_RATE', 0.01)
+    threshold_ms = app.config.get('PROFILER_THRESHOLD_MS')
+    directory = app.config.get('PROFILER_DIR') or os.path.join(tempfile.gettempdir(), 'aksi_nyata_profiles')
+    max_files = app.config.get('PROFILER_MAX_FILES', 100)
+    sampler = StackSampler(app.config.get('PROFILER_INTERVAL', 0.005))
+
+    @app.before_request
+    def start_profile():
+        g.profile_sampled = random.random() < sample_rate
+        if g.profile_sampled or threshold_ms is not None:
+            g.profile_started = time.perf_counter()
+            sampler.start(threading.get_ident())
+
+    @app.teardown_request
+    def finish_profile(exc):
+        started = g.pop('profile_started', None)
+        if started is None:
+            return
+        stacks = sampler.stop(threading.get_ident())
+        duration_ms = (time.perf_counter() - started) * 1000
+        slow = threshold_ms is not None and duration_ms >= threshold_ms
+        if stacks and (g.get('profile_sampled') or slow):
+            try:
+                write_profile(directory, request.endpoint or 'unmatched', duration_ms, stacks, max_files)
+            except OSError as e:
+                app.logger.error(f"Could not write profile: {e}")
@@ -0,0 +1,112 @@
+"""
+In-process publish/subscribe for live campaign updates.
+
+Each subscriber gets a small bounded queue; publish() never blocks and
+drops events for subscribers that fall behind (the next event carries the
+full state anyway). queue.Queue is cooperative under gevent monkey
+patching, so one worker can hold many idle subscribers.
+
+Coroutines subscribe with subscribe_async(): publish() hands their
+events to the event loop, so the ASGI entry point holds streams without a
+thread each.
+
+Events only reach subscribers in the same process: run the stream
+endpoint on a single gevent worker, or put a broker in front of it,
+when running several workers.
+"""
+import asyncio
+import json
+import queue
+import threading
+from contextlib import contextmanager
+
+class LoopQueue:
+    """Subscriber queue read by a coroutine; publish() may run on any thread"""
+    def __init__(self, maxsize):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def put_nowait(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:  # the loop is closed
+            raise queue.Full
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self):
+        return await self.queue.get()
+
+class PubSub:
+    def __init__(self, queue_size=16):
+        self.queue_size = queue_size
+        self._topics = {}
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic):
+        """Yields a queue that receives the events published to `topic`"""
+        return self._subscribed(topic, queue.Queue(maxsize=self.queue_size))
+
+    def subscribe_async(self, topic):
+        """subscribe() for a coroutine: yields a queue with an awaitable get()"""
+        return self._subscribed(topic, LoopQueue(self.queue_size))
+
+    @contextmanager
+    def _subscribed(self, topic, subscriber):
+        with self._lock:
+            self._topics.setdefault(topic, set()).add(subscriber)
+            self._count += 1
+        try:
+            yield subscriber
+        finally:
+            with self._lock:
+                subscribers = self._topics.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del self._topics[topic]
+                self._count -= 1
+
+    def publish(self, topic, event):
+        """Deliver `event` to the subscribers of `topic`; returns how many got it"""
+        with self._lock:
+            subscribers = list(self._topics.get(topic, ()))
+        delivered = 0
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+                delivered += 1
+            except queue.Full:
+                pass
+        return delivered
+
+    def subscriber_count(self, topic=None):
+        with self._lock:
+            if topic is None:
+                return self._count
+            return len(self._topics.get(topic, ()))
+
+# Campaign progress events, keyed by campaign id
+campaign_events = PubSub()
+
+# Browsers reconnect this long after a stream ends (the SSE retry field)
+STREAM_RETRY_SECONDS = 3
+
+def progress_message(progress, retry=False):
+    """A progress event in the text/event-stream format"""
+    message = f"event: progress\ndata: {json.dumps(progress)}\n\n"
+    return f"retry: {STREAM_RETRY_SECONDS * 1000}\n{message}" if retry else message
+
+def campaign_progress(campaign):
+    return {
+        'campaign_id': campaign.id,
+        'current_amount': campaign.current_amount,
+        'goal_amount': campaign.goal_amount,
+        'progress_percentage': (campaign.current_amount / campaign.goal_amount * 100) if campaign.goal_amount > 0 else 0,
+        'status': campaign.status,
+    }
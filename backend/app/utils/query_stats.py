@@ -0,0 +1,101 @@
+import re
+import time
+from collections import Counter
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+# Collapse literal lists so "IN (?, ?, ?)" and "IN (?)" have the same shape
+_IN_LIST = re.compile(r'\(\s*(?:\?|%s|:\w+)(?:\s*,\s*(?:\?|%s|:\w+))*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+_NUMBER = re.compile(r'\b\d+\b')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+
+def normalize_sql(statement):
+    """Statement shape: literals and parameter lists replaced, whitespace collapsed"""
+    shape = _STRING.sub('?', statement)
+    shape = _NUMBER.sub('?', shape)
+    shape = _IN_LIST.sub('(?)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+class QueryStats:
+    """SQL statements executed while handling one request"""
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.shapes[normalize_sql(statement)] += 1
+
+    def repeated(self, threshold):
+        """Statement shapes executed at least `threshold` times"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+def current_query_stats():
+    if has_request_context():
+        return g.get('query_stats')
+    return None
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_query_stats() is not None:
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_query_stats()
+    started = conn.info.get('query_started')
+    if stats is not None and started:
+        stats.record(statement, time.perf_counter() - started.pop())
+
+def instrument_engine(engine):
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+def setup_query_stats(app, engines):
+    """
+    Count SQL statements and DB time per request on the given engines.
+
+    Adds a Server-Timing header (db and total time), logs requests slower
+    than SLOW_REQUEST_THRESHOLD_MS, and logs statement shapes repeated at
+    least N_PLUS_ONE_THRESHOLD times in one request as a probable N+1.
+    Disabled with SQL_QUERY_STATS=False.
+    """
+    if not app.config.get('SQL_QUERY_STATS', True):
+        return
+
+    for engine in engines:
+        instrument_engine(engine)
+
+    slow_request_ms = app.config.get('SLOW_REQUEST_THRESHOLD_MS', 500)
+    n_plus_one_threshold = app.config.get('N_PLUS_ONE_THRESHOLD', 5)
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats = QueryStats()
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def report_query_stats(response):
+        stats = g.get('query_stats')
+        if stats is None:
+            return response
+
+        total_ms = (time.perf_counter() - g.request_started) * 1000
+        db_ms = stats.duration * 1000
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={db_ms:.1f};desc="{stats.count} queries", app;dur={total_ms:.1f}'
+        )
+
+        endpoint = request.endpoint or request.path
+        if total_ms > slow_request_ms:
+            app.logger.warning(
+                f"Slow request {request.method} {endpoint}: {total_ms:.1f}ms, "
+                f"{stats.count} queries in {db_ms:.1f}ms"
+            )
+        for shape, count in stats.repeated(n_plus_one_threshold):
+            app.logger.warning(f"Probable N+1 in {endpoint}: {count}x {shape}")
+
+        return response
@@ -0,0 +1,90 @@
+"""
+Recent verified donations per campaign.
+
+The newest RECENT_LIMIT verified donations of a campaign are loaded with
+one indexed query (ix_donation_campaign_status_created, ORDER BY
+created_at DESC LIMIT N) and kept in a bounded per-process deque that
+verify/reject update. Both campaign detail routes (/api/campaigns/<id>
+and /api/donations/campaigns/<id>) serve it, so their cost does not
+depend on how many donations a campaign has.
+
+Entries remember the campaign's current_amount they were loaded at;
+a verification in another worker changes current_amount, so a stale
+deque is detected and reloaded on the next read.
+"""
+import threading
+from collections import OrderedDict, deque
+from sqlalchemy import select
+from app.utils.metrics import record_cache
+
+RECENT_LIMIT = 10
+MAX_CAMPAIGNS = 1000
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+def serialize(donation, full_name=None, username=None):
+    if donation.is_anonymous or donation.donor_id is None:
+        donor_name = 'Anonymous'
+    else:
+        donor_name = full_name or username or 'Anonymous'
+    return {
+        'id': donation.id,
+        'amount': donation.amount,
+        'donor_name': donor_name,
+        'message': donation.message,
+        'created_at': donation.created_at.isoformat() if donation.created_at else None
+    }
+
+def load_recent_donations(session, campaign_id, limit=RECENT_LIMIT):
+    from app.models.models import Donation, User
+
+    rows = session.execute(
+        select(Donation, User.full_name, User.username)
+        .outerjoin(User, User.id == Donation.donor_id)
+        .where(Donation.campaign_id == campaign_id, Donation.status == 'verified')
+        .order_by(Donation.created_at.desc())
+        .limit(limit)
+    )
+    return [serialize(donation, full_name, username) for donation, full_name, username in rows]
+
+def recent_donations(session, campaign):
+    """Newest verified donations of `campaign`, newest first"""
+    with _lock:
+        entry = _cache.get(campaign.id)
+        if entry is not None and entry[0] == campaign.current_amount:
+            _cache.move_to_end(campaign.id)
+            items = list(entry[1])
+        else:
+            items = None
+    record_cache('recent_donations', items is not None)
+    if items is not None:
+        return items
+
+    items = load_recent_donations(session, campaign.id)
+    with _lock:
+        _cache[campaign.id] = (campaign.current_amount, deque(items, maxlen=RECENT_LIMIT))
+        _cache.move_to_end(campaign.id)
+        while len(_cache) > MAX_CAMPAIGNS:
+            _cache.popitem(last=False)
+    return items
+
+def record_verified(donation, campaign, donor=None):
+    """Push a committed verification into the campaign's deque, if cached"""
+    item = serialize(donation, donor.full_name if donor else None, donor.username if donor else None)
+    with _lock:
+        entry = _cache.get(campaign.id)
+        if entry is None:
+            return
+        items = sorted([item, *entry[1]], key=lambda d: d['created_at'] or '', reverse=True)
+        # Newest first: trim the oldest before a bounded deque would drop the newest
+        _cache[campaign.id] = (campaign.current_amount, deque(items[:RECENT_LIMIT], maxlen=RECENT_LIMIT))
+
+def forget(campaign_id):
+    """Drop a campaign's deque, e.g. when one of its donations is rejected"""
+    with _lock:
+        _cache.pop(campaign_id, None)
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,132 @@
+"""
+Daily donation rollup (donation_daily_rollup).
+
+One row per (day, campaign) with the verified total and count; per-day
+and per-category series are sums over these rows. verify_donation adds
+each donation as it is verified, and rebuild_rollups() recomputes the
+table from the donation table.
+
+The rebuild runs next to live verifications, so it replaces whole
+campaigns, a chunk of campaign ids per transaction: the chunk's rows are
+recomputed from all of their verified donations, overwriting what is
+there rather than adding to it. A donation verified during the rebuild
+commits either before its campaign's chunk (and is in the recomputed
+total) or after it (and is added to that total), never both.
+"""
+from datetime import datetime
+from sqlalchemy import Date, DateTime, bindparam, func, select, text
+from app.utils.backfill import run_sql_backfill
+
+ROLLUP_TABLE = 'donation_daily_rollup'
+REBUILD_NAME = 'rebuild_donation_daily_rollup_by_campaign'
+REBUILD_BATCH_SIZE = 100  # campaigns per transaction
+
+_ON_CONFLICT = f"""
+ON CONFLICT (day, campaign_id) DO UPDATE SET
+    category_id = excluded.category_id,
+    total_amount = {ROLLUP_TABLE}.total_amount + excluded.total_amount,
+    donation_count = {ROLLUP_TABLE}.donation_count + excluded.donation_count,
+    updated_at = excluded.updated_at
+"""
+
+def _day(dialect_name, column):
+    """SQL for the calendar day of a timestamp column"""
+    # SQLite has no date type: CAST(... AS DATE) there keeps only the year
+    return f"date({column})" if dialect_name == 'sqlite' else f"CAST({column} AS DATE)"
+
+def _verified_totals(dialect_name, where):
+    """Verified totals per (day, campaign) of the donations matching `where`"""
+    return f"""
+SELECT {_day(dialect_name, 'COALESCE(donation.verified_at, donation.created_at)')}, donation.campaign_id,
+       campaign.category_id, SUM(donation.amount), COUNT(*), CURRENT_TIMESTAMP
+FROM donation JOIN campaign ON campaign.id = donation.campaign_id
+WHERE {where} AND donation.status = 'verified'
+GROUP BY 1, 2, 3
+"""
+
+def add_donation_range_sql(dialect_name):
+    """Adds the verified donations with id BETWEEN :start_id AND :end_id"""
+    return f"""
+INSERT INTO {ROLLUP_TABLE} (day, campaign_id, category_id, total_amount, donation_count, updated_at)
+{_verified_totals(dialect_name, 'donation.id BETWEEN :start_id AND :end_id')}
+{_ON_CONFLICT}
+"""
+
+def replace_campaign_range_sql(dialect_name):
+    """
+    Replaces the rows of the campaigns with id BETWEEN :start_id AND
+    :end_id. The upsert overwrites a row a concurrent verification inserted
+    after the DELETE: the totals selected afterwards already include its
+    donation.
+    """
+    return [
+        f"DELETE FROM {ROLLUP_TABLE} WHERE campaign_id BETWEEN :start_id AND :end_id",
+        f"""
+INSERT INTO {ROLLUP_TABLE} (day, campaign_id, category_id, total_amount, donation_count, updated_at)
+{_verified_totals(dialect_name, 'donation.campaign_id BETWEEN :start_id AND :end_id')}
+ON CONFLICT (day, campaign_id) DO UPDATE SET
+    category_id = excluded.category_id,
+    total_amount = excluded.total_amount,
+    donation_count = excluded.donation_count,
+    updated_at = excluded.updated_at
+""",
+    ]
+
+_ADD_DONATION_SQL = text(f"""
+INSERT INTO {ROLLUP_TABLE} (day, campaign_id, category_id, total_amount, donation_count, updated_at)
+VALUES (:day, :campaign_id, :category_id, :amount, 1, :updated_at)
+{_ON_CONFLICT}
+""").bindparams(bindparam('day', type_=Date), bindparam('updated_at', type_=DateTime))
+
+def record_verified_donation(session, donation, campaign):
+    """Add a just-verified donation to the rollup, in the caller's transaction"""
+    verified_at = donation.verified_at or datetime.utcnow()
+    session.execute(_ADD_DONATION_SQL, {
+        'day': verified_at.date(),
+        'campaign_id': campaign.id,
+        'category_id': campaign.category_id,
+        'amount': donation.amount,
+        'updated_at': datetime.utcnow(),
+    })
+
+def rebuild_rollups(engine, batch_size=REBUILD_BATCH_SIZE, pause=0.0, log=print):
+    """
+    Recompute the rollup from the donation table, campaign by campaign,
+    while donations keep being verified. Resumable; returns the number of
+    campaigns.
+    """
+    with engine.begin() as conn:
+        conn.execute(text(f"DELETE FROM {ROLLUP_TABLE} WHERE campaign_id NOT IN (SELECT id FROM campaign)"))
+    return run_sql_backfill(engine, REBUILD_NAME, 'campaign', replace_campaign_range_sql,
+                            batch_size=batch_size, pause=pause, log=log)
+
+GROUPINGS = ('day', 'category', 'campaign')
+
+def timeseries(session, start, end, group_by='day', campaign_id=None, category_id=None):
+    """Verified totals per day between `start` and `end` (inclusive)"""
+    from app.models.models import DonationDailyRollup as Rollup
+
+    columns = [Rollup.day]
+    if group_by == 'category':
+        columns.append(Rollup.category_id)
+    elif group_by == 'campaign':
+        columns.append(Rollup.campaign_id)
+
+    query = (
+        select(*columns, func.sum(Rollup.total_amount), func.sum(Rollup.donation_count))
+        .where(Rollup.day.between(start, end))
+        .group_by(*columns)
+        .order_by(*columns)
+    )
+    if campaign_id is not None:
+        query = query.where(Rollup.campaign_id == campaign_id)
+    if category_id is not None:
+        query = query.where(Rollup.category_id == category_id)
+
+    series = []
+    for row in session.execute(query):
+        point = {'day': row[0].isoformat(), 'total_amount': row[-2] or 0.0, 'donation_count': row[-1] or 0}
+        if len(columns) == 2:
+            point[f'{group_by}_id'] = row[1]
+        series.append(point)
+    return series
@@ -0,0 +1,130 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from flask import has_request_context, request
+from sqlalchemy import event
+from app.utils.query_stats import normalize_sql
+
+def parameter_shape(parameters):
+    """Types of the bound parameters, without their values"""
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+def explain(conn, statement, parameters):
+    """
+    Query plan of `statement`, run on the raw DBAPI connection so it does
+    not go through the engine events again.
+    """
+    prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    if conn.dialect.name == 'sqlite':
+        return [row[-1] for row in rows]
+    return [' '.join(str(column) for column in row) for row in rows]
+
+class SlowQueryLog:
+    """
+    Appends statements slower than `threshold_ms` to a JSON-lines file.
+    The query plan is captured the first time a statement shape is seen
+    by this process.
+    """
+    def __init__(self, path, threshold_ms):
+        self.path = path
+        self.threshold_ms = threshold_ms
+        self._explained = set()
+        self._lock = threading.Lock()
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('slow_query_started', []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('slow_query_started')
+        if not started:
+            return
+        duration_ms = (time.perf_counter() - started.pop()) * 1000
+        if duration_ms < self.threshold_ms:
+            return
+
+        shape = normalize_sql(statement)
+        entry = {
+            'time': datetime.utcnow().isoformat(),
+            'duration_ms': round(duration_ms, 3),
+            'sql': shape,
+            'params': parameter_shape(parameters),
+            'route': request.endpoint if has_request_context() else None,
+        }
+        with self._lock:
+            first = shape not in self._explained
+            self._explained.add(shape)
+        if first and not executemany:
+            try:
+                entry['plan'] = explain(conn, statement, parameters)
+            except Exception as e:
+                entry['plan_error'] = str(e)
+        self.write(entry)
+
+    def write(self, entry):
+        line = json.dumps(entry) + '\n'
+        with self._lock:
+            # One append per line, so workers sharing the file do not interleave
+            with open(self.path, 'a') as f:
+                f.write(line)
+
+def setup_slow_query_log(app, engines):
+    """
+    Log statements slower than SLOW_QUERY_THRESHOLD_MS to SLOW_QUERY_LOG
+    (default instance/slow_queries.log). Disabled when the threshold is None.
+    """
+    threshold_ms = app.config.get('SLOW_QUERY_THRESHOLD_MS', 200)
+    if threshold_ms is None:
+        return
+
+    path = app.config.get('SLOW_QUERY_LOG') or os.path.join(app.instance_path, 'slow_queries.log')
+    log = app.extensions['slow_query_log'] = SlowQueryLog(path, threshold_ms)
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', log.before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', log.after_cursor_execute)
+
+def read_log(path):
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+def summarize(entries, top=20, sort='total'):
+    """Aggregate log entries by statement shape, worst first"""
+    summary = {}
+    for entry in entries:
+        item = summary.setdefault(entry['sql'], {
+            'sql': entry['sql'], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+            'routes': set(), 'params': [], 'plan': None,
+        })
+        item['count'] += 1
+        item['total_ms'] += entry['duration_ms']
+        item['max_ms'] = max(item['max_ms'], entry['duration_ms'])
+        if entry.get('route'):
+            item['routes'].add(entry['route'])
+        if entry['params'] not in item['params']:
+            item['params'].append(entry['params'])
+        if item['plan'] is None and entry.get('plan'):
+            item['plan'] = entry['plan']
+
+    key = {'total': 'total_ms', 'max': 'max_ms', 'count': 'count'}[sort]
+    ranked = sorted(summary.values(), key=lambda item: item[key], reverse=True)[:top]
+    for item in ranked:
+        item['mean_ms'] = item['total_ms'] / item['count']
+        item['routes'] = sorted(item['routes'])
+    return ranked
@@ -0,0 +1,50 @@
+from sqlalchemy import event
+
+# Named pragma profiles; selected with SQLITE_PRAGMA_PROFILE and
+# individually overridable with the SQLITE_PRAGMAS config dict
+PRAGMA_PROFILES = {
+    # SQLite defaults (rollback journal, readers block on writers)
+    'default': {},
+    'production': {
+        'journal_mode': 'WAL',        # readers no longer block on the writer
+        'busy_timeout': 5000,         # wait (ms) for locks instead of failing with "database is locked"
+        'synchronous': 'NORMAL',      # safe with WAL, fsync only at checkpoints
+        'mmap_size': 268435456,       # 256 MB memory-mapped reads
+        'cache_size': -65536,         # 64 MB page cache (negative = KiB)
+        'temp_store': 'MEMORY',       # temp b-trees for ORDER BY / GROUP BY in memory
+    },
+}
+
+def resolve_pragmas(config):
+    """Build the pragma dict from the app config"""
+    profile_name = config.get('SQLITE_PRAGMA_PROFILE', 'production')
+    if profile_name not in PRAGMA_PROFILES:
+        raise ValueError(f"Unknown SQLite pragma profile: {profile_name}")
+
+    pragmas = dict(PRAGMA_PROFILES[profile_name])
+    pragmas.update(config.get('SQLITE_PRAGMAS') or {})
+    return pragmas
+
+def apply_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    try:
+        # journal_mode first: the other settings do not depend on it, but WAL
+        # needs to be in place before the connection does any real work
+        if 'journal_mode' in pragmas:
+            cursor.execute(f"PRAGMA journal_mode={pragmas['journal_mode']}")
+        for name, value in pragmas.items():
+            if name != 'journal_mode':
+                cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+def setup_sqlite_pragmas(engine, pragmas):
+    """
+    Apply the pragmas to every new DBAPI connection of a SQLite engine
+    """
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
@@ -0,0 +1,246 @@
+"""
+Streaming multipart uploads.
+
+receive_upload() reads the request body in CHUNK_SIZE pieces with
+Werkzeug's MultipartDecoder instead of letting request.files buffer it:
+
+- each file field has its own size limit and accepted content types, and
+  the upload is rejected as soon as a limit is crossed or the first bytes
+  do not match the declared type (magic numbers, not the filename)
+- small files stay in memory up to UPLOAD_SPOOL_THRESHOLD; larger ones
+  are spooled to a .part file next to their final name and renamed into
+  place, so every byte is written once
+- the request as a whole is bounded by MAX_CONTENT_LENGTH
+
+Use it as a context manager; stored files are removed again unless the
+handler calls keep() (typically right after its commit):
+
+    with receive_upload({'transfer_proof': FileField(PROOF_KINDS, MAX_PROOF_SIZE)}) as upload:
+        ...
+        db.session.commit()
+        upload.keep()
+"""
+import os
+import uuid
+from datetime import datetime
+from flask import current_app, request
+from werkzeug.sansio.multipart import NEED_DATA, Data, Epilogue, Field, File, MultipartDecoder
+from werkzeug.utils import secure_filename
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_SPOOL_THRESHOLD = 256 * 1024
+MAX_FORM_FIELD_SIZE = 64 * 1024
+MAX_PARTS = 100
+
+MAX_IMAGE_SIZE = 5 * 1024 * 1024
+MAX_PROOF_SIZE = 10 * 1024 * 1024
+
+MAGIC_NUMBERS = {
+    'png': (b'\x89PNG\r\n\x1a\n',),
+    'jpeg': (b'\xff\xd8\xff',),
+    'gif': (b'GIF87a', b'GIF89a'),
+    'pdf': (b'%PDF-',),
+}
+SNIFF_SIZE = max(len(magic) for magics in MAGIC_NUMBERS.values() for magic in magics)
+EXTENSIONS = {'png': 'png', 'jpg': 'jpeg', 'jpeg': 'jpeg', 'gif': 'gif', 'pdf': 'pdf'}
+
+IMAGE_KINDS = ('png', 'jpeg', 'gif')
+PROOF_KINDS = IMAGE_KINDS + ('pdf',)
+
+class UploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+def sniff(head):
+    """Content type of a file from its first bytes, or None"""
+    for kind, magics in MAGIC_NUMBERS.items():
+        if any(head.startswith(magic) for magic in magics):
+            return kind
+    return None
+
+def unique_name(filename):
+    return f"{uuid.uuid4()}_{secure_filename(filename)}"
+
+def timestamped_name(filename):
+    return datetime.now().strftime('%Y%m%d_%H%M%S_') + secure_filename(filename)
+
+class FileField:
+    """
+    A file field accepted by receive_upload: the content types it may
+    contain, its size limit and where it is stored (a directory under
+    UPLOAD_FOLDER, and a function naming the stored file).
+    """
+    def __init__(self, kinds, max_size, directory='', name=unique_name):
+        self.kinds = kinds
+        self.max_size = max_size
+        self.directory = directory
+        self.name = name
+
+class StoredFile:
+    def __init__(self, filename, path, relative_path, kind):
+        self.filename = filename
+        self.path = path
+        self.relative_path = relative_path
+        self.kind = kind
+        self.size = 0
+
+class FileWriter:
+    """Receives one file part: checks it while it streams and stores it"""
+    def __init__(self, field_name, field, filename, spool_threshold):
+        self.field_name = field_name
+        self.field = field
+        self.spool_threshold = spool_threshold
+        extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+        if EXTENSIONS.get(extension) not in field.kinds:
+            raise UploadError(f"Invalid file type for {field_name}")
+
+        directory = os.path.join(current_app.config['UPLOAD_FOLDER'], field.directory)
+        os.makedirs(directory, exist_ok=True)
+        stored_name = field.name(filename)
+        self.stored = StoredFile(
+            filename, os.path.join(directory, stored_name),
+            '/'.join(part for part in ('uploads', field.directory, stored_name) if part),
+            EXTENSIONS[extension],
+        )
+        self.buffer = bytearray()
+        self.file = None
+        self.checked = False
+
+    def write(self, data):
+        self.stored.size += len(data)
+        if self.stored.size > self.field.max_size:
+            raise UploadError(f"{self.field_name} is larger than {self.field.max_size // (1024 * 1024)} MB", 413)
+
+        if self.file is not None:
+            self.file.write(data)
+            return
+        self.buffer += data
+        if not self.checked and len(self.buffer) >= SNIFF_SIZE:
+            self.check()
+        if len(self.buffer) > self.spool_threshold:
+            self.file = open(self.stored.path + '.part', 'wb')
+            self.file.write(self.buffer)
+            self.buffer = None
+
+    def check(self):
+        head = bytes(self.buffer[:SNIFF_SIZE])
+        if sniff(head) not in self.field.kinds:
+            raise UploadError(f"{self.field_name} is not a valid {'/'.join(self.field.kinds)} file")
+        self.stored.kind = sniff(head)
+        self.checked = True
+
+    def finish(self):
+        if not self.checked:
+            self.check()
+        if self.file is not None:
+            self.file.close()
+            os.replace(self.stored.path + '.part', self.stored.path)
+        else:
+            with open(self.stored.path, 'wb') as file:
+                file.write(self.buffer)
+        return self.stored
+
+    def discard(self):
+        if self.file is not None:
+            self.file.close()
+            os.remove(self.file.name)
+
+class Upload:
+    """The form fields and stored files of a request"""
+    def __init__(self, form, files):
+        self.form = form
+        self.files = files
+        self.kept = False
+
+    def keep(self):
+        self.kept = True
+
+    def discard(self):
+        for stored in self.files.values():
+            if os.path.exists(stored.path):
+                os.remove(stored.path)
+        self.files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if not self.kept:
+            self.discard()
+        return False
+
+def read_chunks(stream, limit):
+    """Request body in chunks, bounded by `limit` also when no Content-Length was sent"""
+    received = 0
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        received += len(chunk)
+        if limit is not None and received > limit:
+            raise UploadError('Request is too large', 413)
+        yield chunk
+
+def receive_upload(fields):
+    """
+    Parse the current request's form, storing the files of `fields`
+    ({field name: FileField}). Files of other fields are skipped. Raises
+    UploadError; the caller answers with its message and status.
+    """
+    if request.mimetype != 'multipart/form-data':
+        return Upload(request.form.to_dict(), {})
+
+    limit = current_app.config.get('MAX_CONTENT_LENGTH')
+    if limit is not None and (request.content_length or 0) > limit:
+        raise UploadError('Request is too large', 413)
+    boundary = request.mimetype_params.get('boundary')
+    if not boundary:
+        raise UploadError('Missing multipart boundary')
+
+    spool_threshold = current_app.config.get('UPLOAD_SPOOL_THRESHOLD', DEFAULT_SPOOL_THRESHOLD)
+    decoder = MultipartDecoder(boundary.encode(), max_parts=MAX_PARTS)
+    upload = Upload({}, {})
+    part = None
+
+    def events():
+        for chunk in read_chunks(request.stream, limit):
+            decoder.receive_data(chunk)
+            yield from iter(decoder.next_event, NEED_DATA)
+        decoder.receive_data(None)
+        yield from iter(decoder.next_event, NEED_DATA)
+
+    try:
+        for event in events():
+            if isinstance(event, Field):
+                part = (event.name, bytearray())
+            elif isinstance(event, File):
+                field = fields.get(event.name)
+                if field is None or not event.filename or event.name in upload.files:
+                    part = None
+                else:
+                    part = FileWriter(event.name, field, event.filename, spool_threshold)
+            elif isinstance(event, Data):
+                if isinstance(part, FileWriter):
+                    part.write(event.data)
+                    if not event.more_data:
+                        upload.files[part.field_name] = part.finish()
+                elif part is not None:
+                    part[1].extend(event.data)
+                    if len(part[1]) > MAX_FORM_FIELD_SIZE:
+                        raise UploadError(f"{part[0]} is too large", 413)
+                    if not event.more_data:
+                        upload.form[part[0]] = part[1].decode('utf-8', 'replace')
+                if not event.more_data:
+                    part = None
+            elif isinstance(event, Epilogue):
+                break
+    except BaseException as exc:
+        if isinstance(part, FileWriter):
+            part.discard()
+        upload.discard()
+        if isinstance(exc, ValueError):
+            raise UploadError('Malformed multipart body') from exc
+        raise
+    return upload
@@ -0,0 +1,20 @@
+"""
+ASGI entry point, for serving many slow clients (uploads, long polls)
+from an event loop instead of one sync worker per connection:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 4
+
+Public read endpoints listed in app/utils/asgi.py use async database
+access and live campaign streams are held on the event loop; all other
+requests run the Flask app in a thread pool (ASGI_WSGI_THREADS) once
+their body has been received. run.py remains the development server.
+"""
+from app import CORS_ORIGINS, create_app
+from app.utils.asgi import create_asgi_app
+
+flask_app = create_app()
+app = create_asgi_app(flask_app, cors_origins=CORS_ORIGINS)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run('asgi:app', host='localhost', port=5000)
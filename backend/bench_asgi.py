@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark slow-client uploads: gunicorn sync workers vs the ASGI mode.
+
+Starts each server on a throwaway database, opens --slow-clients
+connections that upload a transfer proof to /api/donations/donate in
+small chunks over --upload-seconds, and meanwhile measures the latency
+of fast GET requests. Sync workers are held by the slow uploads; under
+ASGI the bodies are received on the event loop.
+
+    python bench_asgi.py --workers 2 --slow-clients 8
+"""
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+PNG_HEADER = b'\x89PNG\r\n\x1a\n'
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))]
+
+def seed(database_uri):
+    from app import create_app, db
+    from app.migrations import upgrade
+    from app.models.models import Campaign
+    from app.utils.datagen import generate
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database_uri, 'REGISTER_BLUEPRINTS': False})
+    with app.app_context():
+        upgrade(db.engine, log=lambda message: None)
+        generate(db.engine, users=200, campaigns=50, donations=2000, log=lambda message: None)
+        campaign_id = Campaign.query.filter_by(status='active').first().id
+        for engine in db.engines.values():
+            engine.dispose()
+    return campaign_id
+
+def wait_for_port(port, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'server on port {port} did not start')
+
+def slow_upload(port, campaign_id, size, seconds, results):
+    boundary = 'benchboundary'
+    head = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="campaign_id"\r\n\r\n{campaign_id}\r\n'
+        f'--{boundary}\r\nContent-Disposition: form-data; name="amount"\r\n\r\n50000\r\n'
+        f'--{boundary}\r\nContent-Disposition: form-data; name="donor_name"\r\n\r\nBench\r\n'
+        f'--{boundary}\r\nContent-Disposition: form-data; name="transfer_proof"; filename="proof.png"\r\n'
+        f'Content-Type: image/png\r\n\r\n'
+    ).encode()
+    tail = f'\r\n--{boundary}--\r\n'.encode()
+    body = head + PNG_HEADER + b'\0' * (size - len(PNG_HEADER)) + tail
+
+    started = time.perf_counter()
+    sock = socket.create_connection(('127.0.0.1', port))
+    sock.sendall((
+        f'POST /api/donations/donate HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n'
+        f'Content-Type: multipart/form-data; boundary={boundary}\r\nContent-Length: {len(body)}\r\n\r\n'
+    ).encode())
+    chunks = 20
+    step = len(body) // chunks + 1
+    for offset in range(0, len(body), step):
+        sock.sendall(body[offset:offset + step])
+        time.sleep(seconds / chunks)
+    response = sock.recv(65536)
+    sock.close()
+    results.append((response.split(b' ', 2)[1].decode() if response else 'none', time.perf_counter() - started))
+
+def fast_requests(port, stop, latencies):
+    while not stop.is_set():
+        started = time.perf_counter()
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        conn.request('GET', '/api/campaigns/leaderboards')
+        conn.getresponse().read()
+        conn.close()
+        latencies.append((time.perf_counter() - started) * 1000)
+        time.sleep(0.02)
+
+def run_scenario(name, command, port, env, campaign_id, args):
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        latencies, uploads = [], []
+        stop = threading.Event()
+        fast = threading.Thread(target=fast_requests, args=(port, stop, latencies))
+        fast.start()
+        time.sleep(0.5)
+        slow = [threading.Thread(target=slow_upload, args=(port, campaign_id, args.upload_size, args.upload_seconds, uploads))
+                for _ in range(args.slow_clients)]
+        started = time.perf_counter()
+        for thread in slow:
+            thread.start()
+        for thread in slow:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        stop.set()
+        fast.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    statuses = sorted({status for status, _ in uploads})
+    print(f"{name:<28} uploads {len(uploads)} in {elapsed:5.2f}s {statuses}  "
+          f"fast GET p50 {percentile(latencies, 0.5):7.1f}ms  p95 {percentile(latencies, 0.95):7.1f}ms  "
+          f"max {max(latencies):7.1f}ms  ({len(latencies)} requests)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Slow-client upload benchmark: sync workers vs ASGI')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--slow-clients', type=int, default=8)
+    parser.add_argument('--upload-size', type=int, default=256 * 1024, help='bytes per transfer proof')
+    parser.add_argument('--upload-seconds', type=float, default=2.0, help='time each client takes to upload')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_uri = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+        campaign_id = seed(database_uri)
+        env = {**os.environ, 'DATABASE_URI': database_uri, 'UPLOAD_FOLDER': os.path.join(tmp, 'uploads'),
+               'PYTHONPATH': BACKEND_DIR}
+
+        print(f"{args.slow_clients} clients uploading {args.upload_size // 1024} KB over {args.upload_seconds}s, "
+              f"{args.workers} worker(s)\n")
+        run_scenario('gunicorn sync', [
+            sys.executable, '-m', 'gunicorn', '-w', str(args.workers), '-b', '127.0.0.1:5101', 'run:app'
+        ], 5101, env, campaign_id, args)
+        run_scenario('uvicorn ASGI', [
+            sys.executable, '-m', 'uvicorn', '--workers', str(args.workers), '--host', '127.0.0.1',
+            '--port', '5102', '--log-level', 'warning', 'asgi:app'
+        ], 5102, env, campaign_id, args)
+
+if __name__ == '__main__':
+    main()
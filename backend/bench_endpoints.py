@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Endpoint benchmark suite.
+
+Seeds a throwaway database with a synthetic dataset (app/utils/datagen.py),
+calls every blueprint endpoint through app.test_client() and records
+p50/p95/p99 latency and the number of SQL statements per request.
+Results are written as JSON and compared with a stored baseline:
+
+    python bench_endpoints.py --save-baseline          # record a baseline
+    python bench_endpoints.py                          # compare against it
+
+Exits with status 1 when an endpoint issues more SQL statements than in
+the baseline, its p95 latency grew beyond the allowed tolerance, or there
+is no baseline. bench_baseline.json is the baseline for the default
+dataset; re-record it when a change is expected to move the numbers.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, func, select
+from app import create_app, db
+from app.migrations import upgrade
+from app.utils.datagen import generate
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class StatementCounter:
+    """Counts statements executed on all engines between resets"""
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def seed(app, users, campaigns, donations):
+    """Generate the dataset and pick the ids the endpoints are called with"""
+    from app.models.models import User, Campaign, CampaignUpdate, Donation, Category, UserFollow
+    from app.utils import notifications
+
+    with app.app_context():
+        upgrade(db.engine, log=lambda message: None)
+        generate(db.engine, users=users, campaigns=campaigns, donations=donations,
+                 follows=users * 2, updates=campaigns, log=lambda message: None)
+
+        admin = User(username='bench_admin', email='bench_admin@example.com', full_name='Bench Admin', role='admin')
+        admin.set_password('password123')
+        db.session.add(admin)
+        db.session.commit()
+
+        # The most donated-to active campaign exercises the worst case
+        campaign_id = db.session.execute(
+            select(Donation.campaign_id)
+            .join(Campaign, Campaign.id == Donation.campaign_id)
+            .where(Campaign.status == 'active')
+            .group_by(Donation.campaign_id)
+            .order_by(func.count().desc())
+            .limit(1)
+        ).scalar()
+        campaign = db.session.get(Campaign, campaign_id)
+        organizer = db.session.get(User, campaign.creator_id)
+        organizer.role = 'organizer'
+        donor_id = db.session.execute(
+            select(Donation.donor_id).group_by(Donation.donor_id).order_by(func.count().desc()).limit(1)
+        ).scalar()
+        db.session.commit()
+
+        # The user following the most campaigns has the largest feed; notify
+        # the followers of every generated update
+        follower_id = db.session.execute(
+            select(UserFollow.user_id).group_by(UserFollow.user_id).order_by(func.count().desc()).limit(1)
+        ).scalar()
+        for update in db.session.execute(select(CampaignUpdate)).scalars():
+            notifications.enqueue(db.session, 'update', update.campaign_id, update.id, update.title)
+        db.session.commit()
+        notifications.run_pending(db.session)
+
+        return {
+            'campaign_id': campaign_id,
+            'category_id': db.session.execute(select(Category.id).limit(1)).scalar(),
+            'user_id': donor_id,
+            'follower_id': follower_id,
+            'admin_id': admin.id,
+            'organizer_id': organizer.id,
+            'organizer_username': organizer.username,
+            'tokens': {
+                'admin': create_access_token(identity=str(admin.id)),
+                'organizer': create_access_token(identity=str(organizer.id)),
+                'user': create_access_token(identity=str(donor_id)),
+                'follower': create_access_token(identity=str(follower_id)),
+            },
+        }
+
+def pending_donation_id(app, ctx):
+    """A fresh pending donation for each verify call"""
+    from app.models.models import Donation
+
+    with app.app_context():
+        donation = Donation(amount=50000, status='pending', campaign_id=ctx['campaign_id'], donor_id=ctx['user_id'])
+        db.session.add(donation)
+        db.session.commit()
+        return donation.id
+
+def uncached_feed_path(ctx):
+    """The feed path, after dropping the follower's cached feed"""
+    from app.utils import feed
+
+    feed.forget(ctx['follower_id'])
+    return '/api/users/feed'
+
+def endpoints(app):
+    """
+    (name, role, request builder) for every endpoint. The builder gets the
+    context and the iteration number and returns (method, path, kwargs).
+    """
+    return [
+        # auth
+        ('auth.register', None, lambda ctx, i: ('POST', '/api/auth/register', {'json': {
+            'username': f'bench_{i}_{time.time_ns()}', 'email': f'bench_{i}_{time.time_ns()}@example.com',
+            'password': 'password123', 'full_name': 'Bench User'}})),
+        ('auth.login', None, lambda ctx, i: ('POST', '/api/auth/login', {'json': {
+            'username': ctx['organizer_username'], 'password': 'password123'}})),
+        ('auth.me', 'user', lambda ctx, i: ('GET', '/api/auth/me', {})),
+        # campaigns
+        ('campaigns.get_campaigns', None, lambda ctx, i: ('GET', '/api/campaigns', {})),
+        ('campaigns.get_campaigns_search', None, lambda ctx, i: ('GET', '/api/campaigns?search=Kampanye&per_page=20', {})),
+        ('campaigns.get_campaigns_category', None, lambda ctx, i: ('GET', f"/api/campaigns?category_id={ctx['category_id']}", {})),
+        ('campaigns.get_campaign', None, lambda ctx, i: ('GET', f"/api/campaigns/{ctx['campaign_id']}", {})),
+        ('campaigns.get_top_donors', None, lambda ctx, i: ('GET', f"/api/campaigns/{ctx['campaign_id']}/top-donors", {})),
+        ('campaigns.get_leaderboards', None, lambda ctx, i: ('GET', '/api/campaigns/leaderboards', {})),
+        ('campaigns.get_my_campaigns', 'organizer', lambda ctx, i: ('GET', '/api/campaigns/my-campaigns', {})),
+        ('campaigns.get_categories', None, lambda ctx, i: ('GET', '/api/campaigns/categories', {})),
+        ('campaigns.create_campaign', 'organizer', lambda ctx, i: ('POST', '/api/campaigns', {'json': {
+            'title': f'Bench campaign {i}', 'description': 'Benchmark', 'goal_amount': 1000000}})),
+        ('campaigns.follow_campaign', 'user', lambda ctx, i: ('POST', f"/api/campaigns/{ctx['campaign_id']}/follow", {})),
+        # donations
+        ('donations.get_campaigns', None, lambda ctx, i: ('GET', '/api/donations/campaigns', {})),
+        ('donations.get_campaign', None, lambda ctx, i: ('GET', f"/api/donations/campaigns/{ctx['campaign_id']}", {})),
+        ('donations.create_donation', 'user', lambda ctx, i: ('POST', '/api/donations/donate', {'data': {
+            'campaign_id': ctx['campaign_id'], 'amount': '50000'}})),
+        ('donations.verify_donation', 'admin', lambda ctx, i: ('PUT', f"/api/donations/{pending_donation_id(app, ctx)}/verify", {'json': {
+            'status': 'verified'}})),
+        ('donations.get_all_donations', 'admin', lambda ctx, i: ('GET', f"/api/donations?campaign_id={ctx['campaign_id']}", {})),
+        ('donations.get_campaign_donations', 'organizer', lambda ctx, i: ('GET', f"/api/donations/campaigns/{ctx['campaign_id']}/donations", {})),
+        # users
+        ('users.get_profile', 'user', lambda ctx, i: ('GET', '/api/users/profile', {})),
+        ('users.get_user', None, lambda ctx, i: ('GET', f"/api/users/{ctx['user_id']}", {})),
+        ('users.get_dashboard_donor', 'user', lambda ctx, i: ('GET', '/api/users/dashboard', {})),
+        ('users.get_dashboard_organizer', 'organizer', lambda ctx, i: ('GET', '/api/users/dashboard', {})),
+        ('users.get_feed', 'follower', lambda ctx, i: ('GET', '/api/users/feed', {})),
+        ('users.get_feed_uncached', 'follower', lambda ctx, i: ('GET', uncached_feed_path(ctx), {})),
+        ('users.get_notifications', 'follower', lambda ctx, i: ('GET', '/api/users/notifications', {})),
+        ('users.read_notifications', 'follower', lambda ctx, i: ('PUT', '/api/users/notifications/read', {'json': {}})),
+        # admin
+        ('admin.get_pending_campaigns', 'admin', lambda ctx, i: ('GET', '/api/admin/campaigns/pending', {})),
+        ('admin.admin_dashboard', 'admin', lambda ctx, i: ('GET', '/api/admin/dashboard', {})),
+        ('admin.get_donation_timeseries', 'admin', lambda ctx, i: ('GET', '/api/admin/stats/timeseries?start=2000-01-01&group_by=category', {})),
+        ('admin.get_all_users', 'admin', lambda ctx, i: ('GET', '/api/admin/users?search=gen_user_1', {})),
+        ('admin.manage_categories', 'admin', lambda ctx, i: ('GET', '/api/admin/categories', {})),
+    ]
+
+def run_benchmark(users=1000, campaigns=200, donations=20000, iterations=20, warmup=2, only=None, log=print):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmp, 'bench.db')})
+        with app.app_context():
+            ctx = seed(app, users, campaigns, donations)
+
+            counter = StatementCounter()
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', counter)
+
+        client = app.test_client()
+        results = {}
+        for name, role, build in endpoints(app):
+            if only and not any(part in name for part in only):
+                continue
+
+            headers = {'Authorization': f"Bearer {ctx['tokens'][role]}"} if role else {}
+            timings = []
+            statements = []
+            statuses = set()
+            for i in range(warmup + iterations):
+                method, path, kwargs = build(ctx, i)
+                counter.count = 0
+                started = time.perf_counter()
+                response = client.open(path, method=method, headers=headers, **kwargs)
+                elapsed = (time.perf_counter() - started) * 1000
+                if i >= warmup:
+                    timings.append(elapsed)
+                    statements.append(counter.count)
+                    statuses.add(response.status_code)
+
+            results[name] = {
+                'p50_ms': round(percentile(timings, 0.50), 3),
+                'p95_ms': round(percentile(timings, 0.95), 3),
+                'p99_ms': round(percentile(timings, 0.99), 3),
+                'statements': max(statements),
+                'status': sorted(statuses),
+            }
+            log(f"  {name:<36} p50 {results[name]['p50_ms']:8.2f}  p95 {results[name]['p95_ms']:8.2f}  "
+                f"p99 {results[name]['p99_ms']:8.2f} ms  {results[name]['statements']:5d} stmts  {results[name]['status']}")
+
+        with app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+
+    return {
+        'dataset': {'users': users, 'campaigns': campaigns, 'donations': donations},
+        'iterations': iterations,
+        'endpoints': results,
+    }
+
+def compare(results, baseline, latency_tolerance=0.5, latency_slack_ms=5.0):
+    """List regressions of `results` against `baseline`"""
+    regressions = []
+    if results['dataset'] != baseline.get('dataset'):
+        regressions.append(f"dataset differs from baseline ({baseline.get('dataset')}), latencies are not comparable")
+        return regressions
+
+    for name, current in results['endpoints'].items():
+        previous = baseline['endpoints'].get(name)
+        if not previous:
+            continue
+        if current['statements'] > previous['statements']:
+            regressions.append(f"{name}: {previous['statements']} -> {current['statements']} SQL statements")
+        allowed = previous['p95_ms'] * (1 + latency_tolerance) + latency_slack_ms
+        if current['p95_ms'] > allowed:
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every API endpoint through the Flask test client')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--campaigns', type=int, default=200)
+    parser.add_argument('--donations', type=int, default=20000)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--only', nargs='*', help='only endpoints whose name contains one of these')
+    parser.add_argument('--output', default=os.path.join(BACKEND_DIR, 'bench_results.json'))
+    parser.add_argument('--baseline', default=os.path.join(BACKEND_DIR, 'bench_baseline.json'))
+    parser.add_argument('--save-baseline', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed relative p95 growth')
+    args = parser.parse_args()
+
+    print(f"Benchmarking with {args.users} users, {args.campaigns} campaigns, {args.donations} donations")
+    results = run_benchmark(args.users, args.campaigns, args.donations, args.iterations, only=args.only)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"❌ No baseline at {args.baseline} (record one with --save-baseline)")
+        sys.exit(1)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, latency_tolerance=args.tolerance)
+    if regressions:
+        print("❌ Regressions against baseline:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        sys.exit(1)
+    print("✅ No regressions against baseline")
+
+if __name__ == '__main__':
+    main()
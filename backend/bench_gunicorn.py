@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Smoke benchmark: throughput of gunicorn.conf.py versus the development
+server, on a throwaway database.
+
+Runs --clients concurrent keep-alive-less clients against a mix of public
+GET endpoints for --seconds per server and reports requests/second and
+latency percentiles.
+
+    python bench_gunicorn.py --clients 16 --seconds 10
+"""
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_asgi import BACKEND_DIR, percentile, seed, wait_for_port
+
+def paths(campaign_id):
+    return [
+        '/api/campaigns/',
+        '/api/campaigns/categories',
+        f'/api/campaigns/{campaign_id}',
+        f'/api/campaigns/{campaign_id}/top-donors',
+        '/api/campaigns/leaderboards',
+    ]
+
+def client(port, targets, deadline, latencies, errors):
+    i = 0
+    while time.perf_counter() < deadline:
+        path = targets[i % len(targets)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+        except OSError:
+            errors.append(path)
+            continue
+        if response.status >= 500:
+            errors.append(path)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+def run_scenario(name, command, port, env, campaign_id, args):
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        latencies, errors = [], []
+        # Warm up caches and connection pools
+        client(port, paths(campaign_id), time.perf_counter() + 1, [], [])
+        deadline = time.perf_counter() + args.seconds
+        threads = [threading.Thread(target=client, args=(port, paths(campaign_id), deadline, latencies, errors))
+                   for _ in range(args.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{name:<24} {len(latencies) / args.seconds:8.1f} req/s  p50 {percentile(latencies, 0.5):7.1f}ms  "
+          f"p95 {percentile(latencies, 0.95):7.1f}ms  p99 {percentile(latencies, 0.99):7.1f}ms  errors {len(errors)}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Throughput of gunicorn.conf.py vs the development server')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--workers', type=int, help='WEB_CONCURRENCY for gunicorn (default: from CPU count)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_uri = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+        campaign_id = seed(database_uri)
+        env = {**os.environ, 'DATABASE_URI': database_uri, 'PYTHONPATH': BACKEND_DIR}
+        if args.workers:
+            env['WEB_CONCURRENCY'] = str(args.workers)
+
+        print(f"{args.clients} clients for {args.seconds}s, {os.cpu_count()} CPUs\n")
+        run_scenario('flask dev server', [
+            sys.executable, '-m', 'flask', '--app', 'wsgi', 'run', '--port', '5201', '--with-threads'
+        ], 5201, env, campaign_id, args)
+        run_scenario('gunicorn.conf.py', [
+            sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-b', '127.0.0.1:5202', 'wsgi:app'
+        ], 5202, env, campaign_id, args)
+
+if __name__ == '__main__':
+    main()
@@ -4,59 +4,76 @@ Script untuk mengosongkan semua data di database AksiNyata
 Hanya menghapus data, tidak menghapus struktur tabel
 """
 
-import os
+import argparse
 import sys
-import sqlite3
 from pathlib import Path
 
 # Add the project root to Python path
 project_root = Path(__file__).parent
 sys.path.append(str(project_root))
 
-def clear_database():
+from sqlalchemy import inspect, text
+from app import create_app, db
+from app.migrations import MIGRATIONS_TABLE, PROGRESS_TABLE as MIGRATION_PROGRESS_TABLE
+from app.utils.backfill import DEFAULT_BATCH_SIZE, PROGRESS_TABLE, run_backfill
+
+# Bookkeeping tables that describe the schema, not data
+KEEP_TABLES = {MIGRATIONS_TABLE, MIGRATION_PROGRESS_TABLE, PROGRESS_TABLE}
+
+def clear_database(batch_size=DEFAULT_BATCH_SIZE, pause=0.05):
     """Mengosongkan semua data dari database"""
-    db_path = project_root / 'instance' / 'aksi_nyata.db'
-    
-    if not db_path.exists():
-        print(f"Database tidak ditemukan di: {db_path}")
-        return False
+    app = create_app({'REGISTER_BLUEPRINTS': False})
     
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        print("🗑️  Mengosongkan database...")
-        
-        # Disable foreign key constraints temporarily
-        cursor.execute("PRAGMA foreign_keys = OFF")
-        
-        # Get all table names
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = cursor.fetchall()
+    with app.app_context():
+        engine = db.engine
         
-        # Clear all tables
-        for table in tables:
-            table_name = table[0]
-            if table_name != 'sqlite_sequence':  # Skip sqlite internal table
+        try:
+            inspector = inspect(engine)
+            tables = [
+                name for name in inspector.get_table_names()
+                if name not in KEEP_TABLES and not name.startswith('sqlite_')
+            ]
+            
+            if not tables:
+                print(f"Database kosong atau tidak ditemukan di: {engine.url.database}")
+                return False
+            
+            print("🗑️  Mengosongkan database...")
+            
+            # Clear all tables, in chunks so large tables do not hold the
+            # write lock for the whole run
+            for table_name in tables:
                 print(f"   - Menghapus data dari tabel: {table_name}")
-                cursor.execute(f"DELETE FROM {table_name}")
-        
-        # Reset auto-increment counters
-        cursor.execute("DELETE FROM sqlite_sequence")
-        
-        # Re-enable foreign key constraints
-        cursor.execute("PRAGMA foreign_keys = ON")
-        
-        conn.commit()
-        conn.close()
-        
-        print("✅ Database berhasil dikosongkan!")
-        print("📊 Semua data telah dihapus, struktur tabel tetap ada")
-        return True
-        
-    except Exception as e:
-        print(f"❌ Error saat mengosongkan database: {e}")
-        return False
+                columns = {column['name'] for column in inspector.get_columns(table_name)}
+                
+                if 'id' not in columns:
+                    with engine.begin() as conn:
+                        conn.execute(text(f"DELETE FROM {table_name}"))
+                    continue
+                
+                def delete_batch(conn, rows, table_name=table_name):
+                    conn.execute(
+                        text(f"DELETE FROM {table_name} WHERE id BETWEEN :start_id AND :end_id"),
+                        {'start_id': rows[0][0], 'end_id': rows[-1][0]}
+                    )
+                
+                run_backfill(
+                    engine, f'clear_database:{table_name}', table_name, delete_batch,
+                    batch_size=batch_size, pause=pause, log=lambda message: None
+                )
+            
+            # Reset auto-increment counters
+            if inspector.has_table('sqlite_sequence'):
+                with engine.begin() as conn:
+                    conn.execute(text("DELETE FROM sqlite_sequence"))
+            
+            print("✅ Database berhasil dikosongkan!")
+            print("📊 Semua data telah dihapus, struktur tabel tetap ada")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Error saat mengosongkan database: {e}")
+            return False
 
 def confirm_action():
     """Meminta konfirmasi sebelum menghapus data"""
@@ -72,11 +89,16 @@ def confirm_action():
     return response.upper() == 'YA'
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Hapus semua data di database AksiNyata')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='baris per transaksi')
+    parser.add_argument('--pause', type=float, default=0.05, help='jeda (detik) antar batch')
+    args = parser.parse_args()
+    
     print("🧹 Script Pembersihan Database AksiNyata")
     print("=" * 50)
     
     if confirm_action():
-        if clear_database():
+        if clear_database(batch_size=args.batch_size, pause=args.pause):
             print("\n🎉 Proses selesai! Database sudah kosong.")
             print("💡 Anda bisa menjalankan script seeding untuk membuat data sample baru.")
         else:
@@ -0,0 +1,93 @@
+"""
+Shared fixtures for the in-process test suite: apps on throwaway,
+migrated SQLite databases, synthetic data, users and auth headers.
+
+The scripts that call a running server (test_api_*.py, test_auth.py, ...)
+are run by hand.
+"""
+import re
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.migrations import upgrade
+from app.models.models import User
+from app.utils import campaign_queries, feed, leaderboards, recent_donations
+from app.utils.datagen import generate
+
+def quiet(message):
+    pass
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    """The per-process caches are keyed by ids, which every test database reuses"""
+    for module in (campaign_queries, feed, leaderboards, recent_donations):
+        module.clear_cache()
+
+@pytest.fixture
+def make_app(tmp_path):
+    """
+    Builds apps on a SQLite database in tmp_path, migrated unless
+    migrate=False. Their engines are disposed after the test.
+    """
+    apps = []
+
+    def make(config=None, migrate=True, database='test.db'):
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / database}',
+            'METRICS_ENABLED': False,
+            **(config or {}),
+        })
+        if migrate:
+            with app.app_context():
+                upgrade(db.engine, log=quiet)
+        apps.append(app)
+        return app
+
+    yield make
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def populate():
+    """Fills an app's database with the synthetic data generator"""
+    def populate(app, **counts):
+        with app.app_context():
+            generate(db.engine, log=quiet, **counts)
+    return populate
+
+@pytest.fixture
+def create_user():
+    """Adds a user with password 'password123'; call inside an app context"""
+    def create_user(username, role='user', full_name=None):
+        user = User(username=username, email=f'{username}@example.com',
+                    full_name=full_name or username.title(), role=role)
+        user.set_password('password123')
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return create_user
+
+@pytest.fixture
+def auth_headers():
+    """Authorization headers for a user id; call inside an app context"""
+    def auth_headers(user_id):
+        return {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+    return auth_headers
+
+@pytest.fixture
+def query_count():
+    """SQL statements a response reports in its Server-Timing header"""
+    def query_count(response):
+        return int(re.search(r'desc="(\d+) queries"', response.headers['Server-Timing']).group(1))
+    return query_count
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Generate a large synthetic dataset (users, categories, campaigns,
+donations, milestones, campaign updates and follows) for local
+performance work. Run migrate.py first.
+
+    python generate_data.py --users 10000 --campaigns 2000 --donations 500000
+"""
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from app.utils.datagen import DEFAULT_PASSWORD, generate
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk-insert a synthetic AksiNyata dataset')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--campaigns', type=int, default=200)
+    parser.add_argument('--donations', type=int, default=20000)
+    parser.add_argument('--follows', type=int, default=5000)
+    parser.add_argument('--updates', type=int, default=500, help='campaign updates')
+    parser.add_argument('--milestones', type=int, default=3, help='milestones per campaign')
+    parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent of campaign popularity')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=5000, help='rows per executemany batch')
+    args = parser.parse_args()
+
+    app = create_app({'REGISTER_BLUEPRINTS': False})
+
+    with app.app_context():
+        print(f"Generating data into {db.engine.url.database}")
+        generate(
+            db.engine,
+            users=args.users,
+            campaigns=args.campaigns,
+            donations=args.donations,
+            follows=args.follows,
+            updates=args.updates,
+            milestones_per_campaign=args.milestones,
+            skew=args.skew,
+            seed=args.seed,
+            batch_size=args.batch_size,
+        )
+        print(f"✅ Done. Generated users log in with password: {DEFAULT_PASSWORD}")
+
+if __name__ == '__main__':
+    main()
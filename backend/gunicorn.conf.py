@@ -0,0 +1,66 @@
+"""
+Gunicorn settings for production (run.py is the development server):
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Every setting can be overridden on the command line or through the
+GUNICORN_CMD_ARGS environment variable; worker and thread counts also
+follow WEB_CONCURRENCY and GUNICORN_THREADS.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Requests mostly wait on SQLite and disk, so each worker runs a few
+# threads; the workers give CPU parallelism past the GIL.
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# A live campaign stream (/api/campaigns/<id>/stream) holds a thread until
+# it ends (SSE_STREAM_SECONDS) and the browser reconnects. Leave at least
+# half of each worker's threads to the other routes; beyond that, streams
+# are refused with a 503 and the page retries later. The ASGI entry point
+# (asgi.py) holds streams on its event loop instead.
+os.environ.setdefault('SSE_MAX_SUBSCRIBERS', str(threads // 2))
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+
+# Import the app once in the master and fork it into the workers (faster
+# startup, shared memory). Safe because post_fork() drops the database
+# connections inherited from the master.
+preload_app = True
+
+# Recycle workers to bound slow memory growth; the jitter keeps them from
+# all restarting at once.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+
+# The worker heartbeat file is touched constantly; keep it off the disk
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = '-'
+errorlog = '-'
+
+def on_starting(server):
+    # Counters of a previous run would be summed into /metrics
+    from app.utils.metrics import clear_metrics_dir
+
+    if not server.cfg.preload_app:
+        return
+    metrics = server.app.wsgi().extensions.get('metrics')
+    if metrics is not None:
+        clear_metrics_dir(metrics.directory)
+
+def post_fork(server, worker):
+    # A pooled connection shared between processes corrupts both sides.
+    # close=False leaves the master's connections to the master.
+    from app import db
+
+    if not server.cfg.preload_app:
+        return
+    with server.app.wsgi().app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
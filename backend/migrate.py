@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Apply pending versioned migrations (app/migrations/versions) to the database.
+
+Safe to run against the live database: each batch of a data backfill is
+its own short transaction, and an interrupted run resumes where it stopped.
+"""
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from app.migrations import load_migrations, pending_migrations, upgrade
+
+def main():
+    parser = argparse.ArgumentParser(description='AksiNyata database migrations')
+    parser.add_argument('--status', action='store_true', help='list migrations and whether they are applied')
+    parser.add_argument('--target', type=int, help='only apply migrations up to this version')
+    parser.add_argument('--batch-size', type=int, help='rows per backfill transaction')
+    args = parser.parse_args()
+
+    app = create_app({'REGISTER_BLUEPRINTS': False})
+
+    with app.app_context():
+        if args.status:
+            pending = {module.VERSION for module in pending_migrations(db.engine)}
+            for module in load_migrations():
+                state = 'pending' if module.VERSION in pending else 'applied'
+                print(f"  {module.VERSION:04d} {module.NAME:<40} {state}")
+            return
+
+        applied = upgrade(db.engine, target=args.target, batch_size=args.batch_size)
+        if applied:
+            print(f"✅ Applied {len(applied)} migration(s)")
+        else:
+            print("✓ Database is up to date")
+
+if __name__ == '__main__':
+    main()
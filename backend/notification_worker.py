@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Fan out pending follower notifications (campaign updates and milestones).
+
+Run it once, e.g. from cron:
+
+    * * * * * cd /path/to/backend && python notification_worker.py
+
+or keep it running as a dedicated worker process:
+
+    python notification_worker.py --loop 5
+
+or set NOTIFICATION_WORKER_INTERVAL to fan out inside the web processes instead.
+"""
+import argparse
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from app.utils.notifications import run_pending
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fan out pending follower notifications')
+    parser.add_argument('--chunk-size', type=int, default=None, help='followers per transaction')
+    parser.add_argument('--loop', type=float, default=0, metavar='SECONDS', help='keep polling every SECONDS')
+    args = parser.parse_args()
+
+    app = create_app({'REGISTER_BLUEPRINTS': False})
+    with app.app_context():
+        print(f"Fanning out notifications in database at {db.engine.url.database}")
+        while True:
+            count = run_pending(db.session, chunk_size=args.chunk_size, log=print)
+            if not args.loop:
+                print(f"✅ Wrote {count} notification(s)")
+                break
+            db.session.remove()
+            time.sleep(args.loop)
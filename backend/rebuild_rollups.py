@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Rebuild the daily donation rollup (donation_daily_rollup) and the donor
+totals behind the leaderboards (campaign_donor_total) from the donation
+table, e.g. after bulk imports or manual data fixes, then refill this
+week's campaign board (campaign_weekly_board) from the new rollup.
+
+Both are rebuilt a chunk of campaigns per transaction, so they can run
+next to live donation verifications; an interrupted run resumes after
+the last committed chunk.
+"""
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from app.utils.leaderboards import rebuild_donor_totals, rebuild_weekly_board
+from app.utils.rollups import REBUILD_BATCH_SIZE, rebuild_rollups
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Recompute the daily donation rollup and donor totals')
+    parser.add_argument('--batch-size', type=int, default=REBUILD_BATCH_SIZE, help='campaigns per transaction')
+    parser.add_argument('--pause', type=float, default=0.05, help='seconds to sleep between chunks')
+    args = parser.parse_args()
+
+    app = create_app({'REGISTER_BLUEPRINTS': False})
+    with app.app_context():
+        print(f"Rebuilding donation rollup in database at {db.engine.url.database}")
+        count = rebuild_rollups(db.engine, batch_size=args.batch_size, pause=args.pause)
+        print(f"✅ Rollup rebuilt for {count} campaign(s)")
+        count = rebuild_donor_totals(db.engine, batch_size=args.batch_size, pause=args.pause)
+        print(f"✅ Donor totals rebuilt for {count} campaign(s)")
+        rebuild_weekly_board(db.engine)
+        print("✅ Weekly campaign board refilled")
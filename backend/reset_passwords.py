@@ -1,57 +1,56 @@
 #!/usr/bin/env python3
 """
 Script to reset passwords for existing users with incompatible hashes
+
+Walks the user table in primary-key chunks, one transaction per chunk,
+so it scales to large tables and can be resumed if interrupted.
 """
-import sqlite3
+import argparse
 import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
 from werkzeug.security import generate_password_hash
-from app import create_app
-
-def reset_user_passwords():
-    app = create_app()
-    
-    # Path to the database
-    db_path = os.path.join(app.instance_path, 'aksi_nyata.db')
-    
-    if not os.path.exists(db_path):
-        print(f"Database not found at {db_path}")
-        return
-    
-    print(f"Resetting user passwords in database at {db_path}")
-    
-    # Connect to the database
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    try:
-        # Get all users
-        cursor.execute("SELECT id, username, email FROM user")
-        users = cursor.fetchall()
-        
-        print(f"Found {len(users)} users")
-        
+from app import create_app, db
+from app.utils.backfill import DEFAULT_BATCH_SIZE, run_backfill
+
+def reset_user_passwords(batch_size=DEFAULT_BATCH_SIZE, pause=0.05):
+    app = create_app({'REGISTER_BLUEPRINTS': False})
+
+    with app.app_context():
+        engine = db.engine
+        print(f"Resetting user passwords in database at {engine.url.database}")
+
         # Reset password for each user
         default_password = "password123"  # Default password
+        # Hashing is slow on purpose, so hash once and reuse it for every user
         hashed_password = generate_password_hash(default_password)
-        
-        for user_id, username, email in users:
-            cursor.execute(
-                "UPDATE user SET password_hash = ? WHERE id = ?",
-                (hashed_password, user_id)
+
+        def reset_batch(conn, rows):
+            conn.execute(
+                text("UPDATE user SET password_hash = :password_hash WHERE id BETWEEN :start_id AND :end_id"),
+                {'password_hash': hashed_password, 'start_id': rows[0].id, 'end_id': rows[-1].id}
+            )
+            print(f"Reset passwords for users {rows[0].username} .. {rows[-1].username}")
+
+        try:
+            count = run_backfill(
+                engine, 'reset_passwords', 'user', reset_batch,
+                columns=('username',), batch_size=batch_size, pause=pause
             )
-            print(f"Reset password for user: {username} ({email})")
-        
-        # Commit changes
-        conn.commit()
-        print(f"\n✅ Reset passwords for {len(users)} users")
+        except Exception as e:
+            print(f"❌ Error during password reset: {e}")
+            print("Run the script again to resume after the last completed chunk.")
+            return
+
+        print(f"\n✅ Reset passwords for {count} users")
         print(f"Default password: {default_password}")
         print("Users can now login with this password and should change it later.")
-        
-    except Exception as e:
-        print(f"❌ Error during password reset: {e}")
-        conn.rollback()
-    finally:
-        conn.close()
 
 if __name__ == '__main__':
-    reset_user_passwords()
+    parser = argparse.ArgumentParser(description='Reset every user password to the default')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='rows per transaction')
+    parser.add_argument('--pause', type=float, default=0.05, help='seconds to sleep between chunks')
+    args = parser.parse_args()
+    reset_user_passwords(batch_size=args.batch_size, pause=args.pause)
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Top-N report of the slow-query log (instance/slow_queries.log).
+
+    python slow_queries.py --top 10 --sort max
+"""
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.slow_queries import read_log, summarize
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize the slow-query log')
+    parser.add_argument('--log', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'slow_queries.log'))
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--sort', choices=['total', 'max', 'count'], default='total')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.log):
+        print(f"No slow-query log at {args.log}")
+        return
+
+    report = summarize(read_log(args.log), top=args.top, sort=args.sort)
+    if not report:
+        print("No slow queries logged")
+        return
+
+    for rank, item in enumerate(report, 1):
+        print(f"\n#{rank}  {item['count']}x  total {item['total_ms']:.1f}ms  "
+              f"mean {item['mean_ms']:.1f}ms  max {item['max_ms']:.1f}ms")
+        print(f"    routes: {', '.join(item['routes']) or '-'}")
+        print(f"    params: {item['params'][0] if item['params'] else '-'}"
+              + (f" (+{len(item['params']) - 1} other shapes)" if len(item['params']) > 1 else ''))
+        print(f"    {item['sql']}")
+        for line in item['plan'] or []:
+            marker = '⚠️ ' if line.startswith('SCAN ') and 'USING' not in line else ''
+            print(f"      plan: {marker}{line}")
+
+if __name__ == '__main__':
+    main()
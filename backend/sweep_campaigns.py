@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Close public campaigns whose end_date has passed (status 'completed').
+
+Meant to run from cron, e.g. every five minutes:
+
+    */5 * * * * cd /path/to/backend && python sweep_campaigns.py
+
+or set CAMPAIGN_SWEEP_INTERVAL to sweep inside the web processes instead.
+"""
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from app.utils.lifecycle import DEFAULT_SWEEP_BATCH_SIZE, sweep_expired_campaigns
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Close campaigns past their end date')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_SWEEP_BATCH_SIZE, help='campaigns per transaction')
+    args = parser.parse_args()
+
+    app = create_app({'REGISTER_BLUEPRINTS': False})
+    with app.app_context():
+        print(f"Sweeping expired campaigns in database at {db.engine.url.database}")
+        count = sweep_expired_campaigns(db.session, batch_size=args.batch_size)
+        print(f"✅ Closed {count} expired campaign(s)")
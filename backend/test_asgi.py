@@ -0,0 +1,210 @@
+"""
+Test the ASGI serving mode: native async reads and streams, and the proxied Flask app
+"""
+import asyncio
+import json
+import threading
+import pytest
+from app import CORS_ORIGINS, db
+from app.models.models import Campaign, Donation
+from app.utils.asgi import create_asgi_app
+from app.utils.pubsub import campaign_events
+
+ORIGIN = [(b'origin', b'http://localhost:3000')]
+
+def http_scope(path, method='GET', headers=()):
+    path, _, query = path.partition('?')
+    return {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'scheme': 'http',
+        'method': method, 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+        'root_path': '', 'headers': [(b'host', b'localhost'), *headers],
+        'server': ('localhost', 80), 'client': ('127.0.0.1', 12345),
+    }
+
+async def call(app, path, method='GET', headers=(), body=b''):
+    """Run one HTTP request through the ASGI app, return (status, headers, body)"""
+    if body:
+        headers = [*headers, (b'content-length', str(len(body)).encode())]
+    scope = http_scope(path, method, headers)
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start = messages[0]
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return start['status'], dict(start['headers']), body
+
+class Stream:
+    """A streaming request through the ASGI app, read message by message"""
+    def __init__(self, app, path):
+        self.messages = asyncio.Queue()
+        self.gone = asyncio.Event()
+        requested = []
+
+        async def receive():
+            if not requested:
+                requested.append(True)
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await self.gone.wait()
+            return {'type': 'http.disconnect'}
+
+        self.task = asyncio.ensure_future(app(http_scope(path), receive, self.messages.put))
+
+    async def next(self):
+        return await asyncio.wait_for(self.messages.get(), timeout=5)
+
+    async def body(self):
+        """The next chunk of the stream that is not a keep-alive"""
+        body = (await self.next())['body'].decode()
+        while body.startswith(': keep-alive'):
+            body = (await self.next())['body'].decode()
+        return body
+
+    async def close(self):
+        self.gone.set()
+        await asyncio.wait_for(self.task, timeout=5)
+
+def run(asgi, scenario):
+    """Run a scenario on its own event loop, the async engine is disposed on it"""
+    async def main():
+        try:
+            await scenario
+        finally:
+            await asgi.engine.dispose()
+    asyncio.run(main())
+
+@pytest.fixture
+def app(make_app):
+    return make_app({'SSE_STREAM_SECONDS': 1, 'SSE_KEEPALIVE_SECONDS': 0.2})
+
+@pytest.fixture
+def asgi(app):
+    asgi = create_asgi_app(app, cors_origins=CORS_ORIGINS)
+    yield asgi
+    asgi.executor.shutdown()
+
+@pytest.fixture
+def campaign_id(app, populate):
+    """An active campaign of generated data"""
+    populate(app, users=30, campaigns=10, donations=300)
+    with app.app_context():
+        return Campaign.query.filter_by(status='active').first().id
+
+def test_native_reads_match_the_flask_routes(app, asgi, campaign_id):
+    path = f'/api/campaigns/{campaign_id}/top-donors?limit=3'
+
+    async def scenario():
+        status, headers, body = await call(asgi, path, headers=ORIGIN)
+        assert status == 200
+        assert headers[b'access-control-allow-origin'] == b'http://localhost:3000'
+        native = json.loads(body)['top_donors']
+        assert len(native) <= 3
+        assert app.test_client().get(path).get_json()['top_donors'] == native
+
+        status, _, body = await call(asgi, '/api/campaigns/leaderboards')
+        assert status == 200 and set(json.loads(body)) >= {'most_funded_this_week', 'fastest_growing'}
+
+        status, _, body = await call(asgi, '/api/campaigns/999999/top-donors')
+        assert status == 404 and json.loads(body)['error'] == 'Campaign not found'
+
+    run(asgi, scenario())
+
+def test_everything_else_runs_in_flask(asgi, campaign_id):
+    async def scenario():
+        status, _, body = await call(asgi, '/api/campaigns/categories')
+        assert status == 200 and 'categories' in json.loads(body)
+        status, _, _ = await call(asgi, f'/api/campaigns/{campaign_id}/top-donors', method='POST')
+        assert status == 405
+
+    run(asgi, scenario())
+
+def test_flask_requests_run_concurrently(app):
+    # A Flask request that only returns once a second one has run
+    released = threading.Event()
+    app.add_url_rule('/test/wait', 'wait', lambda: 'released' if released.wait(5) else 'timed out')
+    app.add_url_rule('/test/release', 'release', lambda: released.set() or 'ok')
+    asgi = create_asgi_app(app, cors_origins=CORS_ORIGINS)
+
+    async def scenario():
+        waiting = asyncio.ensure_future(call(asgi, '/test/wait'))
+        assert (await asyncio.wait_for(call(asgi, '/test/release'), timeout=5))[0] == 200
+        assert (await asyncio.wait_for(waiting, timeout=5))[2] == b'released'
+
+    try:
+        run(asgi, scenario())
+    finally:
+        asgi.executor.shutdown()
+
+@pytest.fixture
+def live(app, create_user, auth_headers):
+    """An active campaign with a pending donation, and an admin to verify it"""
+    with app.app_context():
+        admin = create_user('admin', role='admin')
+        campaign = Campaign(title='Live', description='-', target_amount=100000, status='active',
+                            organizer_id=admin.id, creator_id=admin.id)
+        db.session.add(campaign)
+        db.session.commit()
+        donation = Donation(amount=25000, status='pending', campaign_id=campaign.id, donor_id=admin.id)
+        db.session.add(donation)
+        db.session.commit()
+        token = auth_headers(admin.id)['Authorization']
+        return {'campaign_id': campaign.id, 'donation_id': donation.id, 'authorization': token.encode()}
+
+def test_stream_starts_with_a_snapshot(asgi, live):
+    async def scenario():
+        stream = Stream(asgi, f"/api/campaigns/{live['campaign_id']}/stream")
+        start = await stream.next()
+        assert start['status'] == 200 and dict(start['headers'])[b'content-type'].startswith(b'text/event-stream')
+        first = (await stream.next())['body'].decode()
+        assert first.startswith('retry: ') and '"current_amount": 0' in first
+        assert campaign_events.subscriber_count(live['campaign_id']) == 1
+        await stream.close()
+
+        status, _, _ = await call(asgi, '/api/campaigns/999999/stream')
+        assert status == 404
+
+    run(asgi, scenario())
+
+def test_stream_pushes_while_flask_answers(asgi, live):
+    async def scenario():
+        stream = Stream(asgi, f"/api/campaigns/{live['campaign_id']}/stream")
+        await stream.next()
+        await stream.next()
+
+        status, _, _ = await asyncio.wait_for(call(
+            asgi, f"/api/donations/{live['donation_id']}/verify", method='PUT',
+            headers=[(b'authorization', live['authorization']), (b'content-type', b'application/json')],
+            body=json.dumps({'status': 'verified'}).encode()), timeout=5)
+        assert status == 200
+
+        body = await stream.body()
+        assert body.startswith('event: progress') and '"current_amount": 25000' in body
+        await stream.close()
+
+    run(asgi, scenario())
+
+def test_stream_ends_after_its_lifetime(asgi, live):
+    async def scenario():
+        stream = Stream(asgi, f"/api/campaigns/{live['campaign_id']}/stream")
+        await stream.next()
+        # Keep-alives until SSE_STREAM_SECONDS, then the last body message
+        while (await stream.next()).get('more_body'):
+            pass
+        await stream.close()
+        assert campaign_events.subscriber_count(live['campaign_id']) == 0
+
+    run(asgi, scenario())
+
+def test_stream_ends_when_the_client_goes_away(asgi, live):
+    async def scenario():
+        stream = Stream(asgi, f"/api/campaigns/{live['campaign_id']}/stream")
+        await stream.next()
+        await stream.close()
+        assert campaign_events.subscriber_count(live['campaign_id']) == 0
+
+    run(asgi, scenario())
@@ -0,0 +1,87 @@
+"""
+Test the chunked, resumable backfill utility
+"""
+import pytest
+from sqlalchemy import create_engine, text
+from app.utils.backfill import PROGRESS_TABLE, run_backfill, run_sql_backfill, save_checkpoint
+
+COPY_RANGE_SQL = "UPDATE item SET copy = value WHERE id BETWEEN :start_id AND :end_id"
+
+def quiet(message):
+    pass
+
+@pytest.fixture
+def make_engine(tmp_path):
+    """An `item` table with `rows` sparse ids, like a table that has seen deletes"""
+    engines = []
+
+    def make_engine(rows=10):
+        engine = create_engine(f'sqlite:///{tmp_path / "backfill.db"}')
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE item (id INTEGER PRIMARY KEY, value INTEGER, copy INTEGER)"))
+            for item_id in range(1, rows * 3 + 1, 3):
+                conn.execute(text("INSERT INTO item (id, value) VALUES (:id, :id)"), {'id': item_id})
+        engines.append(engine)
+        return engine
+
+    yield make_engine
+    for engine in engines:
+        engine.dispose()
+
+def count(engine, sql):
+    with engine.connect() as conn:
+        return conn.execute(text(sql)).scalar()
+
+def test_walks_table_in_chunks_and_clears_checkpoint(make_engine):
+    engine = make_engine(rows=10)
+    batches = []
+
+    def handle(conn, rows):
+        batches.append([row.id for row in rows])
+        conn.execute(text(COPY_RANGE_SQL), {'start_id': rows[0].id, 'end_id': rows[-1].id})
+
+    assert run_backfill(engine, 'copy', 'item', handle, columns=('value',), batch_size=4, log=quiet) == 10
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+    assert count(engine, "SELECT COUNT(*) FROM item WHERE copy IS NULL") == 0
+    assert count(engine, f"SELECT COUNT(*) FROM {PROGRESS_TABLE}") == 0
+
+def test_resumes_after_last_committed_chunk(make_engine):
+    engine = make_engine(rows=10)
+    calls = []
+
+    def fail_on_second_chunk(conn, rows):
+        calls.append(rows[0].id)
+        if len(calls) == 2:
+            raise RuntimeError('interrupted')
+        conn.execute(text(COPY_RANGE_SQL), {'start_id': rows[0].id, 'end_id': rows[-1].id})
+
+    with pytest.raises(RuntimeError):
+        run_backfill(engine, 'copy', 'item', fail_on_second_chunk, batch_size=3, log=quiet)
+
+    # First chunk (ids 1, 4, 7) committed with its checkpoint, second rolled back
+    assert count(engine, "SELECT COUNT(*) FROM item WHERE copy IS NOT NULL") == 3
+
+    assert run_sql_backfill(engine, 'copy', 'item', COPY_RANGE_SQL, batch_size=3, log=quiet) == 7
+    assert count(engine, "SELECT COUNT(*) FROM item WHERE copy IS NULL") == 0
+
+def test_checkpoint_skips_done_rows(make_engine):
+    engine = make_engine(rows=5)
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE TABLE {PROGRESS_TABLE} (name VARCHAR(200) PRIMARY KEY, last_id INTEGER NOT NULL, updated_at DATETIME NOT NULL)"))
+        save_checkpoint(conn, 'copy', 7)
+
+    seen = []
+    run_backfill(engine, 'copy', 'item', lambda conn, rows: seen.extend(row.id for row in rows), log=quiet)
+    assert seen == [10, 13]
+
+def test_statements_can_depend_on_the_dialect(make_engine):
+    engine = make_engine(rows=4)
+    dialects = []
+
+    def copy_range_sql(dialect_name):
+        dialects.append(dialect_name)
+        return [COPY_RANGE_SQL, "UPDATE item SET copy = copy + 1 WHERE id BETWEEN :start_id AND :end_id"]
+
+    assert run_sql_backfill(engine, 'copy', 'item', copy_range_sql, batch_size=3, log=quiet) == 4
+    assert dialects == ['sqlite']
+    assert count(engine, "SELECT COUNT(*) FROM item WHERE copy = value + 1") == 4
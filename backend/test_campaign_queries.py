@@ -0,0 +1,156 @@
+"""
+Test that both campaign APIs share one query service: same campaigns,
+constant query count per page, cache invalidation and permissions
+"""
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+import pytest
+from flask_jwt_extended import create_access_token
+from app import db
+from app.models.models import Campaign
+from app.utils import campaign_queries, recent_donations
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# First requests of a new worker process: no other ORM query ran before them
+FIRST_REQUEST_SNIPPET = """
+from app import create_app
+client = create_app({'METRICS_ENABLED': False}).test_client()
+print(client.get('/api/campaigns').status_code, client.get('/api/donations/campaigns').status_code)
+"""
+
+@pytest.fixture
+def app(make_app, populate, tmp_path):
+    app = make_app({'UPLOAD_FOLDER': str(tmp_path / 'uploads')})
+    populate(app, users=50, campaigns=40, donations=500, follows=200)
+    return app
+
+@pytest.fixture
+def headers(app, create_user, auth_headers):
+    """Authorization headers of a campaign creator, another user and an admin"""
+    with app.app_context():
+        users = [create_user('creator'), create_user('other'), create_user('root', role='admin')]
+        return {user.username: auth_headers(user.id) for user in users}
+
+@pytest.fixture
+def campaign_id(client, headers):
+    """A new campaign, pending approval"""
+    response = client.post('/api/campaigns', json={
+        'title': 'Sumur Desa', 'description': 'Air bersih', 'goal_amount': 1000000, 'category_id': 1,
+    }, headers=headers['creator'])
+    assert response.status_code == 201
+    return response.get_json()['campaign']['id']
+
+def test_both_apis_list_the_same_campaigns(client):
+    # In the same order and shape
+    json_api = client.get('/api/campaigns?per_page=10').get_json()['campaigns']
+    form_api = client.get('/api/donations/campaigns?per_page=10').get_json()['campaigns']
+    assert json_api == form_api and len(json_api) == 10
+
+def test_page_cost_does_not_depend_on_its_size(app, client, query_count):
+    app.config['CAMPAIGN_LIST_CACHE_SECONDS'] = 0
+    small = query_count(client.get('/api/campaigns?per_page=2'))
+    large = query_count(client.get('/api/campaigns?per_page=30'))
+    searched = query_count(client.get('/api/campaigns?per_page=30&search=a'))
+    assert small == large == searched
+
+def test_cached_pages_skip_the_database(client, query_count):
+    first = client.get('/api/campaigns?per_page=5')
+    assert query_count(client.get('/api/campaigns?per_page=5')) < query_count(first)
+
+def test_both_apis_show_the_same_recent_donations(app, client):
+    with app.app_context():
+        campaign_id = Campaign.query.filter_by(status='active').order_by(Campaign.current_amount.desc()).first().id
+    json_api = client.get(f'/api/campaigns/{campaign_id}').get_json()['recent_donations']
+    form_api = client.get(f'/api/donations/campaigns/{campaign_id}').get_json()['donations']
+    assert json_api == form_api and len(form_api) == recent_donations.RECENT_LIMIT
+
+def test_pending_campaigns_are_visible_to_their_creator_only(client, headers, campaign_id):
+    assert client.get(f'/api/campaigns/{campaign_id}').status_code == 404
+    assert client.get(f'/api/campaigns/{campaign_id}', headers=headers['other']).status_code == 404
+    assert client.get(f'/api/campaigns/{campaign_id}', headers=headers['creator']).status_code == 200
+    assert client.get(f'/api/campaigns/{campaign_id}', headers=headers['root']).status_code == 200
+
+def test_bad_tokens_view_campaigns_anonymously(app, client, headers, campaign_id):
+    with app.app_context():
+        active_id = Campaign.query.filter_by(status='active').first().id
+        expired = create_access_token(identity='1', expires_delta=timedelta(seconds=-1))
+    for token in [expired, 'garbage']:
+        bad = {'Authorization': f'Bearer {token}'}
+        assert client.get(f'/api/campaigns/{active_id}', headers=bad).status_code == 200
+        assert client.get(f'/api/campaigns/{campaign_id}', headers=bad).status_code == 404
+
+def test_creators_cannot_activate_their_campaigns(client, headers, campaign_id):
+    response = client.put(f'/api/campaigns/{campaign_id}', json={'status': 'active'}, headers=headers['creator'])
+    assert response.status_code == 200
+    response = client.get(f'/api/campaigns/{campaign_id}', headers=headers['creator'])
+    assert response.get_json()['status'] == 'pending'
+    assert client.get('/api/campaigns?search=Sumur').get_json()['campaigns'] == []
+
+    response = client.put(f'/api/donations/campaigns/{campaign_id}', data={'title': 'x'}, headers=headers['other'])
+    assert response.status_code == 403
+
+def test_admin_approval_clears_cached_pages(client, headers, campaign_id):
+    assert client.get('/api/campaigns?search=Sumur').get_json()['campaigns'] == []
+    response = client.put(f'/api/donations/campaigns/{campaign_id}', data={'status': 'active'},
+                          headers=headers['root'])
+    assert response.status_code == 200 and response.get_json()['campaign']['status'] == 'active'
+
+    response = client.get('/api/campaigns?search=Sumur')
+    assert [campaign['id'] for campaign in response.get_json()['campaigns']] == [campaign_id]
+
+def test_same_validation_on_both_apis(client, headers, campaign_id):
+    for response in (
+        client.put(f'/api/campaigns/{campaign_id}', json={'deadline': '2000-01-01'}, headers=headers['creator']),
+        client.put(f'/api/donations/campaigns/{campaign_id}', data={'end_date': '2000-01-01'},
+                   headers=headers['creator']),
+    ):
+        assert response.status_code == 400 and response.get_json()['error'] == 'Deadline must be in the future'
+
+def test_creator_organizes_new_campaigns(app, campaign_id):
+    with app.app_context():
+        campaign = db.session.get(Campaign, campaign_id)
+        assert campaign.organizer_id == campaign.creator_id
+
+def test_campaign_lists_cost_the_same_for_more_campaigns(app, client, create_user, auth_headers, query_count):
+    with app.app_context():
+        creator = create_user('maker', role='creator')
+        headers = auth_headers(creator.id)
+
+    def add_campaigns(count):
+        with app.app_context():
+            db.session.add_all(Campaign(title='Desa', description='-', target_amount=1000, status='active',
+                                        organizer_id=creator.id, creator_id=creator.id, category_id=1)
+                               for index in range(count))
+            db.session.commit()
+
+    add_campaigns(1)
+    few = query_count(client.get('/api/users/profile', headers=headers))
+    add_campaigns(5)
+    response = client.get('/api/users/profile', headers=headers)
+    assert len(response.get_json()['campaigns']) == 6
+    assert query_count(response) == few
+
+def test_deadlines_are_stored_in_utc():
+    deadline = campaign_queries.parse_deadline('2099-06-01T10:00:00+07:00')
+    assert deadline == datetime(2099, 6, 1, 3, 0)
+    assert campaign_queries.parse_deadline('2099-06-01T03:00:00Z') == deadline
+    assert campaign_queries.parse_deadline('2099-06-01T03:00:00') == deadline
+
+    # Compared with the UTC clock, whatever the offset
+    soon = datetime.now(timezone(timedelta(hours=-10))) + timedelta(minutes=5)
+    assert campaign_queries.parse_deadline(soon.isoformat()) > datetime.utcnow()
+    with pytest.raises(campaign_queries.CampaignError):
+        campaign_queries.parse_deadline((soon - timedelta(minutes=10)).isoformat())
+
+def test_campaign_list_is_the_first_request(make_app, populate):
+    app = make_app()
+    populate(app, users=10, campaigns=5, donations=20, follows=0, updates=0)
+
+    output = subprocess.check_output(
+        [sys.executable, '-c', FIRST_REQUEST_SNIPPET], cwd=BACKEND_DIR,
+        env=dict(os.environ, DATABASE_URI=app.config['SQLALCHEMY_DATABASE_URI']), stderr=subprocess.DEVNULL
+    )
+    assert output.decode().split() == ['200', '200']
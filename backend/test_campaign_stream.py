@@ -0,0 +1,78 @@
+"""
+Test the campaign progress Server-Sent Events stream
+"""
+import json
+import pytest
+from app import db
+from app.models.models import Campaign, Donation
+from app.utils.pubsub import PubSub, campaign_events
+
+def parse_event(chunk):
+    lines = [line for line in chunk.decode().strip().splitlines() if not line.startswith('retry: ')]
+    assert lines[0] == 'event: progress'
+    return json.loads(lines[1][len('data: '):])
+
+def test_pubsub_drops_events_for_slow_subscribers():
+    pubsub = PubSub(queue_size=2)
+    with pubsub.subscribe('a') as subscriber:
+        assert [pubsub.publish('a', index) for index in range(3)] == [1, 1, 0]
+        assert pubsub.publish('b', 'nobody') == 0
+        assert subscriber.get_nowait() == 0
+    assert pubsub.subscriber_count() == 0
+
+@pytest.fixture
+def app(make_app):
+    return make_app({
+        'SSE_MAX_SUBSCRIBERS': 1,
+        'SSE_STREAM_SECONDS': 0.5,
+        'SSE_KEEPALIVE_SECONDS': 0.1,
+    })
+
+@pytest.fixture
+def live(app, create_user, auth_headers):
+    """An active campaign with a pending donation, and an admin to verify it"""
+    with app.app_context():
+        admin = create_user('admin', role='admin')
+        campaign = Campaign(title='Live', description='-', target_amount=100000, status='active',
+                            organizer_id=admin.id, creator_id=admin.id)
+        db.session.add(campaign)
+        db.session.commit()
+        donation = Donation(amount=25000, status='pending', campaign_id=campaign.id, donor_id=admin.id)
+        db.session.add(donation)
+        db.session.commit()
+        return {'campaign_id': campaign.id, 'donation_id': donation.id, 'admin': auth_headers(admin.id)}
+
+@pytest.fixture
+def stream(client, live):
+    """The chunks of an open stream of the campaign"""
+    response = client.get(f"/api/campaigns/{live['campaign_id']}/stream", buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    yield iter(response.response)
+    response.close()
+
+def test_stream_starts_with_a_snapshot(live, stream):
+    first = next(stream)
+    assert first.startswith(b'retry: ')
+    assert parse_event(first)['current_amount'] == 0
+    assert campaign_events.subscriber_count(live['campaign_id']) == 1
+
+def test_streams_over_the_limit_are_refused(client, live, stream):
+    next(stream)
+    # Over SSE_MAX_SUBSCRIBERS the stream is refused and the page retries later
+    assert client.get(f"/api/campaigns/{live['campaign_id']}/stream").status_code == 503
+
+def test_stream_pushes_verified_donations(client, live, stream):
+    next(stream)
+    verified = client.put(f"/api/donations/{live['donation_id']}/verify", json={'status': 'verified'},
+                          headers=live['admin'])
+    assert verified.status_code == 200
+
+    event = parse_event(next(stream))
+    assert event['current_amount'] == 25000 and event['progress_percentage'] == 25
+
+def test_stream_ends_after_its_lifetime(live, stream):
+    next(stream)
+    # Keep-alives until SSE_STREAM_SECONDS, then the stream ends
+    assert set(stream) == {b': keep-alive\n\n'}
+    assert campaign_events.subscriber_count(live['campaign_id']) == 0
@@ -0,0 +1,94 @@
+"""
+Test the followed campaigns feed: merge order, keyset pages and the head page cache
+"""
+import pytest
+from sqlalchemy import select
+from app import db
+from app.models.models import Campaign, CampaignUpdate, Milestone, UserFollow
+from app.utils.follows import follow
+
+def expected_feed(campaign_ids):
+    """The whole feed, sorted the slow way"""
+    updates = CampaignUpdate.query.filter(CampaignUpdate.campaign_id.in_(campaign_ids)).all()
+    milestones = Milestone.query.filter(Milestone.campaign_id.in_(campaign_ids), Milestone.achieved_at.isnot(None)).all()
+    items = [(u.created_at, 'update', u.id) for u in updates] + [(m.achieved_at, 'milestone', m.id) for m in milestones]
+    return [(kind, item_id) for _, kind, item_id in sorted(items, reverse=True)]
+
+@pytest.fixture
+def app(make_app, populate):
+    app = make_app()
+    populate(app, users=30, campaigns=300, donations=3000, follows=0, updates=2000)
+    return app
+
+@pytest.fixture
+def reader(app, create_user, auth_headers):
+    """A user following 250 campaigns"""
+    with app.app_context():
+        user = create_user('reader')
+        followed = [campaign_id for campaign_id, in db.session.execute(
+            select(Campaign.id).order_by(Campaign.id).limit(250)
+        ).all()]
+        for campaign_id in followed:
+            follow(db.session, user.id, campaign_id)
+        db.session.commit()
+        assert UserFollow.query.filter_by(user_id=user.id).count() == 250
+        return {
+            'followed': followed,
+            'headers': auth_headers(user.id),
+            'creator': auth_headers(db.session.get(Campaign, followed[0]).creator_id),
+        }
+
+def test_pages_walk_the_whole_feed_in_order(app, client, reader, query_count):
+    with app.app_context():
+        expected = expected_feed(reader['followed'])
+    # Achieved milestones share their timestamp, so ties are exercised
+    assert len(expected) > 100
+
+    app.config['FEED_CACHE_SECONDS'] = 0
+    seen = []
+    cursor = None
+    costs = set()
+    while True:
+        response = client.get('/api/users/feed?limit=25' + (f'&cursor={cursor}' if cursor else ''),
+                              headers=reader['headers'])
+        assert response.status_code == 200
+        page = response.get_json()
+        seen.extend((item['type'], item['id']) for item in page['items'])
+        costs.add(query_count(response))
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert seen == expected
+    # 250 campaigns: the follows, three UNION ALL batches and the titles
+    assert max(costs) <= 5
+
+def test_items_and_cursors(client, reader):
+    items = client.get('/api/users/feed', headers=reader['headers']).get_json()['items']
+    assert {'type', 'id', 'campaign_id', 'campaign_title', 'title', 'content', 'created_at'} <= set(items[0])
+    assert client.get('/api/users/feed?cursor=garbage', headers=reader['headers']).status_code == 400
+
+def test_head_page_is_cached(client, reader, query_count):
+    head = client.get('/api/users/feed', headers=reader['headers'])
+    cached = client.get('/api/users/feed', headers=reader['headers'])
+    assert cached.get_json() == head.get_json() and query_count(cached) < query_count(head)
+
+def test_new_updates_drop_the_cached_head_page(client, reader):
+    campaign_id = reader['followed'][0]
+    client.get('/api/users/feed', headers=reader['headers'])
+    response = client.post(f'/api/campaigns/{campaign_id}/updates', headers=reader['creator'],
+                           json={'title': 'Kabar baru', 'content': 'Pembangunan dimulai'})
+    assert response.status_code == 201
+    update_id = response.get_json()['update']['id']
+    items = client.get('/api/users/feed', headers=reader['headers']).get_json()['items']
+    assert (items[0]['type'], items[0]['id'], items[0]['campaign_id']) == ('update', update_id, campaign_id)
+
+def test_unfollowing_drops_the_cached_head_page(client, reader):
+    campaign_id = reader['followed'][0]
+    client.post(f'/api/campaigns/{campaign_id}/updates', headers=reader['creator'],
+                json={'title': 'Kabar baru', 'content': 'Pembangunan dimulai'})
+    items = client.get('/api/users/feed', headers=reader['headers']).get_json()['items']
+    assert items[0]['campaign_id'] == campaign_id
+    response = client.post(f'/api/campaigns/{campaign_id}/follow', headers=reader['headers'])
+    assert response.get_json()['is_following'] is False
+    items = client.get('/api/users/feed', headers=reader['headers']).get_json()['items']
+    assert campaign_id not in {item['campaign_id'] for item in items}
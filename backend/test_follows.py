@@ -0,0 +1,82 @@
+"""
+Test following campaigns: toggles, the unique index and the follower counter
+"""
+from datetime import datetime
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.models import Campaign, UserFollow
+
+@pytest.fixture
+def app(make_app, populate):
+    app = make_app()
+    populate(app, users=50, campaigns=1500, donations=100, follows=2000, updates=0)
+    return app
+
+@pytest.fixture
+def follows(app, create_user, auth_headers):
+    """A user following every campaign but the target (an active one) and a user following none"""
+    with app.app_context():
+        heavy = create_user('heavy')
+        light = create_user('light')
+        campaign_ids = [campaign_id for campaign_id, in db.session.execute(
+            select(Campaign.id).order_by(Campaign.status != 'active', Campaign.id)
+        ).all()]
+        db.session.execute(UserFollow.__table__.insert(), [
+            {'user_id': heavy.id, 'campaign_id': campaign_id, 'created_at': datetime.utcnow()}
+            for campaign_id in campaign_ids[1:]
+        ])
+        db.session.commit()
+        target = campaign_ids[0]
+        return {
+            'heavy_id': heavy.id,
+            'target': target,
+            'url': f'/api/campaigns/{target}/follow',
+            'followers': db.session.get(Campaign, target).followers_count,
+            'heavy': auth_headers(heavy.id),
+            'light': auth_headers(light.id),
+        }
+
+def test_generated_follows_are_counted(app):
+    with app.app_context():
+        counts = dict(db.session.execute(
+            select(UserFollow.campaign_id, func.count()).group_by(UserFollow.campaign_id)
+        ).all())
+        for campaign in Campaign.query.all():
+            assert campaign.followers_count == counts.get(campaign.id, 0)
+
+def test_one_follow_per_user_and_campaign(app, follows):
+    with app.app_context():
+        followed = db.session.execute(
+            select(UserFollow.campaign_id).filter_by(user_id=follows['heavy_id']).limit(1)
+        ).scalar()
+        db.session.add(UserFollow(user_id=follows['heavy_id'], campaign_id=followed))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+def test_toggle_updates_the_counter(app, client, follows):
+    followers = follows['followers']
+    response = client.post(follows['url'], headers=follows['light'])
+    assert response.status_code == 200
+    assert response.get_json()['is_following'] is True
+    assert response.get_json()['followers_count'] == followers + 1
+
+    response = client.post(follows['url'], headers=follows['light'])
+    assert response.get_json()['is_following'] is False
+    assert response.get_json()['followers_count'] == followers
+
+    assert client.post(follows['url'], headers=follows['heavy']).get_json()['followers_count'] == followers + 1
+    assert client.get(f"/api/campaigns/{follows['target']}").get_json()['followers_count'] == followers + 1
+    with app.app_context():
+        assert UserFollow.query.filter_by(campaign_id=follows['target']).count() == followers + 1
+
+def test_toggle_cost_does_not_depend_on_follow_count(client, follows, query_count):
+    light = client.post(follows['url'], headers=follows['light'])
+    heavy = client.post(follows['url'], headers=follows['heavy'])
+    assert heavy.get_json()['followers_count'] == follows['followers'] + 2
+    assert query_count(heavy) == query_count(light)
+
+def test_following_a_missing_campaign(client, follows):
+    assert client.post('/api/campaigns/999999/follow', headers=follows['light']).status_code == 404
@@ -0,0 +1,158 @@
+"""
+Test the top donors and weekly campaign leaderboards
+"""
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import select, text
+from app import db
+from app.models.models import Campaign, CampaignDonorTotal, CampaignWeeklyBoard, Donation
+from app.utils import backfill
+from app.utils.leaderboards import (
+    compute_weekly_leaderboards, fill_weekly_board, read_weekly_board, rebuild_donor_totals
+)
+from app.utils.rollups import rebuild_rollups
+
+def quiet(message):
+    pass
+
+def donor_totals():
+    return sorted((row.campaign_id, row.donor_id, round(row.total_amount, 2), row.donation_count)
+                  for row in CampaignDonorTotal.query.all())
+
+@pytest.fixture
+def admin_headers(app, create_user, auth_headers):
+    with app.app_context():
+        return auth_headers(create_user('admin', role='admin').id)
+
+@pytest.fixture
+def whale(app, client, populate, create_user, admin_headers):
+    """A donor whose donation to an active campaign has just been verified"""
+    populate(app, users=30, campaigns=10, donations=300, follows=10, updates=5)
+    with app.app_context():
+        campaign = Campaign.query.filter_by(status='active').first()
+        donor = create_user('whale', full_name='Big Donor')
+        big = Donation(amount=10 ** 9, status='pending', campaign_id=campaign.id, donor_id=donor.id)
+        db.session.add(big)
+        db.session.commit()
+        big_id, campaign_id, donor_id = big.id, campaign.id, donor.id
+
+    response = client.put(f'/api/donations/{big_id}/verify', json={'status': 'verified'}, headers=admin_headers)
+    assert response.status_code == 200
+    return {'campaign_id': campaign_id, 'donor_id': donor_id}
+
+def test_top_donors_follow_verifications(client, whale):
+    top = client.get(f"/api/campaigns/{whale['campaign_id']}/top-donors?limit=3").get_json()['top_donors']
+    assert top[0]['donor_id'] == whale['donor_id'] and top[0]['donor_name'] == 'Big Donor'
+    assert [entry['total_amount'] for entry in top] == sorted((entry['total_amount'] for entry in top), reverse=True)
+
+def test_leaderboards_follow_verifications(client, whale):
+    boards = client.get('/api/campaigns/leaderboards?limit=3').get_json()
+    assert boards['most_funded_this_week'][0]['campaign_id'] == whale['campaign_id']
+    assert boards['fastest_growing'][0]['campaign_id'] == whale['campaign_id']
+
+def test_first_verification_fills_the_weekly_board(app, whale):
+    with app.app_context():
+        today = datetime.utcnow().date()
+        boards = read_weekly_board(db.session, limit=20, today=today)
+        assert boards == compute_weekly_leaderboards(db.session, limit=20, today=today)
+        # Campaigns with donations verified before today are on it too
+        assert len(boards['most_funded_this_week']) > 1
+
+def test_verifications_refresh_their_campaign(app, client, whale, admin_headers):
+    with app.app_context():
+        campaign = Campaign.query.filter(Campaign.id != whale['campaign_id']).first()
+        donation = Donation(amount=2 * 10 ** 9, status='pending', campaign_id=campaign.id, is_anonymous=True)
+        db.session.add(donation)
+        db.session.commit()
+        campaign_id, donation_id = campaign.id, donation.id
+
+    response = client.put(f'/api/donations/{donation_id}/verify', json={'status': 'verified'}, headers=admin_headers)
+    assert response.status_code == 200
+
+    boards = client.get('/api/campaigns/leaderboards?limit=3').get_json()
+    assert [entry['campaign_id'] for entry in boards['most_funded_this_week'][:2]] == \
+        [campaign_id, whale['campaign_id']]
+    with app.app_context():
+        today = datetime.utcnow().date()
+        assert read_weekly_board(db.session, limit=20, today=today) == \
+            compute_weekly_leaderboards(db.session, limit=20, today=today)
+
+def test_weekly_boards_are_read_from_their_indexes(app, client, whale, query_count):
+    assert query_count(client.get('/api/campaigns/leaderboards')) == 2
+    board = CampaignWeeklyBoard
+    with app.app_context():
+        for order in [board.amount.desc(), board.growth.desc()]:
+            query = select(board).where(board.week_end == datetime.utcnow().date()).order_by(order).limit(10)
+            compiled = query.compile(db.engine, compile_kwargs={'literal_binds': True})
+            plan = ' '.join(row[-1] for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {compiled}')))
+            assert 'USING INDEX ix_campaign_weekly_board_week_' in plan and 'TEMP B-TREE' not in plan
+
+def test_a_new_day_replaces_the_board(app, whale):
+    with app.app_context():
+        tomorrow = datetime.utcnow().date() + timedelta(days=1)
+        fill_weekly_board(db.session, tomorrow)
+        db.session.commit()
+        assert {row.week_end for row in CampaignWeeklyBoard.query.all()} == {tomorrow}
+        assert read_weekly_board(db.session, limit=20, today=tomorrow) == \
+            compute_weekly_leaderboards(db.session, limit=20, today=tomorrow)
+
+def test_incremental_totals_match_a_rebuild(app, whale):
+    with app.app_context():
+        incremental = donor_totals()
+        rebuild_donor_totals(db.engine, batch_size=50, log=quiet)
+        assert donor_totals() == incremental
+
+def test_rebuild_counts_donations_verified_meanwhile(app, client, populate, admin_headers, monkeypatch):
+    populate(app, users=30, campaigns=12, donations=300, follows=0, updates=0)
+    with app.app_context():
+        campaign_ids = [campaign.id for campaign in Campaign.query.order_by(Campaign.id)]
+        # One donation in the first chunk of the rebuild, one in a later chunk
+        pending = [Donation(amount=777, status='pending', campaign_id=campaign_id, donor_id=1)
+                   for campaign_id in (campaign_ids[0], campaign_ids[-1])]
+        db.session.add_all(pending)
+        db.session.commit()
+        pending_ids = [donation.id for donation in pending]
+
+    class VerifyBetweenChunks:
+        """Stands in for the time module: verifies the donations after the first chunk"""
+        @staticmethod
+        def sleep(seconds):
+            while pending_ids:
+                response = client.put(f'/api/donations/{pending_ids.pop()}/verify',
+                                      json={'status': 'verified'}, headers=admin_headers)
+                assert response.status_code == 200
+
+    monkeypatch.setattr(backfill, 'time', VerifyBetweenChunks)
+    with app.app_context():
+        assert rebuild_donor_totals(db.engine, batch_size=5, pause=1, log=quiet) == len(campaign_ids)
+        assert not pending_ids
+        rebuilt = donor_totals()
+
+        # Same totals as a rebuild with nothing verified meanwhile
+        rebuild_donor_totals(db.engine, log=quiet)
+        assert donor_totals() == rebuilt
+
+def test_fastest_growing_compares_with_previous_week(make_app, create_user):
+    app = make_app({'REGISTER_BLUEPRINTS': False})
+    with app.app_context():
+        donor = create_user('donor')
+        steady = Campaign(title='Steady', description='-', target_amount=1e9, status='active',
+                          organizer_id=donor.id, creator_id=donor.id)
+        rising = Campaign(title='Rising', description='-', target_amount=1e9, status='active',
+                          organizer_id=donor.id, creator_id=donor.id)
+        db.session.add_all([steady, rising])
+        db.session.commit()
+
+        today = datetime.utcnow()
+        for campaign, last_week, this_week in [(steady, 900, 1000), (rising, 0, 500)]:
+            for amount, when in [(last_week, today - timedelta(days=10)), (this_week, today)]:
+                if amount:
+                    db.session.add(Donation(amount=amount, status='verified', campaign_id=campaign.id,
+                                            donor_id=donor.id, created_at=when, verified_at=when))
+        db.session.commit()
+        rebuild_rollups(db.engine, log=quiet)
+
+        boards = compute_weekly_leaderboards(db.session, limit=5, today=today.date())
+        assert [entry['title'] for entry in boards['most_funded_this_week']] == ['Steady', 'Rising']
+        assert [entry['title'] for entry in boards['fastest_growing']] == ['Rising', 'Steady']
+        assert boards['fastest_growing'][0]['growth'] == 500
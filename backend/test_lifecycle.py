@@ -0,0 +1,72 @@
+"""
+Test the expired campaigns sweep and the in-process sweeper
+"""
+import time
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models.models import Campaign
+from app.utils.lifecycle import sweep_expired_campaigns
+from app.utils.pubsub import campaign_events
+
+def make_campaign(creator, title, status, end_date):
+    return Campaign(title=title, description='-', target_amount=100000, status=status, end_date=end_date,
+                    organizer_id=creator.id, creator_id=creator.id)
+
+@pytest.fixture
+def campaigns(app, create_user):
+    """Six expired campaigns and four the sweep leaves alone: (expired ids, {kept id: status})"""
+    now = datetime.utcnow()
+    with app.app_context():
+        creator = create_user('creator')
+        expired = [make_campaign(creator, f'Expired {index}', status, now - timedelta(days=index + 1))
+                   for index, status in enumerate(['active', 'approved'] * 3)]
+        kept = [
+            make_campaign(creator, 'Future', 'active', now + timedelta(days=1)),
+            make_campaign(creator, 'Open ended', 'active', None),
+            make_campaign(creator, 'Pending', 'pending', now - timedelta(days=1)),
+            make_campaign(creator, 'Cancelled', 'cancelled', now - timedelta(days=1)),
+        ]
+        db.session.add_all(expired + kept)
+        db.session.commit()
+        return {c.id for c in expired}, {c.id: c.status for c in kept}
+
+def test_expired_campaigns_are_closed_in_batches(app, campaigns):
+    expired_ids, kept = campaigns
+    with app.app_context(), campaign_events.subscribe(min(expired_ids)) as subscriber:
+        assert sweep_expired_campaigns(db.session, batch_size=4) == 6
+        assert subscriber.get_nowait()['status'] == 'completed'
+        assert sweep_expired_campaigns(db.session) == 0
+
+        db.session.expire_all()
+        for c in Campaign.query.all():
+            assert c.status == ('completed' if c.id in expired_ids else kept[c.id])
+
+def test_sweep_clears_cached_list_pages(app, client, campaigns):
+    assert client.get('/api/campaigns?per_page=50').get_json()['pagination']['total'] == 8
+    with app.app_context():
+        sweep_expired_campaigns(db.session)
+    campaigns = client.get('/api/campaigns?per_page=50').get_json()['campaigns']
+    assert [c['title'] for c in campaigns] == ['Open ended', 'Future']
+
+def test_in_process_sweeper(make_app, create_user):
+    app = make_app({'CAMPAIGN_SWEEP_INTERVAL': 0.05})
+    with app.app_context():
+        campaign = make_campaign(create_user('creator'), 'Expired', 'active', datetime.utcnow() - timedelta(hours=1))
+        db.session.add(campaign)
+        db.session.commit()
+        campaign_id = campaign.id
+
+    # The thread starts with the first request
+    app.test_client().get('/api/campaigns/categories')
+    try:
+        deadline = time.monotonic() + 5
+        status = 'active'
+        while status == 'active' and time.monotonic() < deadline:
+            time.sleep(0.05)
+            with app.app_context():
+                status = db.session.get(Campaign, campaign_id).status
+                db.session.remove()
+        assert status == 'completed'
+    finally:
+        app.extensions['campaign_sweeper'].stop()
@@ -0,0 +1,52 @@
+"""
+Test the multi-process metrics store and the /metrics endpoint
+"""
+import multiprocessing
+import pytest
+from app.utils.metrics import Metrics, sample_key
+
+def increment_in_child(directory):
+    Metrics(directory).inc('aksi_nyata_requests_total', {'endpoint': 'child'}, 5)
+
+def test_counters_are_summed_across_processes(tmp_path):
+    metrics = Metrics(str(tmp_path))
+    metrics.inc('aksi_nyata_requests_total', {'endpoint': 'child'}, 2)
+    # Enough distinct keys to grow the file past its initial size
+    for index in range(2000):
+        metrics.inc('aksi_nyata_requests_total', {'endpoint': f'e{index}'})
+
+    process = multiprocessing.get_context('fork').Process(target=increment_in_child, args=(str(tmp_path),))
+    process.start()
+    process.join()
+
+    totals = metrics.collect()
+    assert totals[sample_key('aksi_nyata_requests_total', {'endpoint': 'child'})] == 7
+    assert totals[sample_key('aksi_nyata_requests_total', {'endpoint': 'e1999'})] == 1
+
+def test_histogram_buckets_are_cumulative(tmp_path):
+    metrics = Metrics(str(tmp_path))
+    metrics.observe('aksi_nyata_request_duration_seconds', {'endpoint': 'x'}, 0.03)
+    metrics.observe('aksi_nyata_request_duration_seconds', {'endpoint': 'x'}, 3.0)
+    text = metrics.render()
+    assert 'aksi_nyata_request_duration_seconds_bucket{endpoint="x",le="0.025"} 0' not in text
+    assert 'aksi_nyata_request_duration_seconds_bucket{endpoint="x",le="0.05"} 1' in text
+    assert 'aksi_nyata_request_duration_seconds_bucket{endpoint="x",le="5"} 2' in text
+    assert 'aksi_nyata_request_duration_seconds_bucket{endpoint="x",le="+Inf"} 2' in text
+    assert 'aksi_nyata_request_duration_seconds_count{endpoint="x"} 2' in text
+
+@pytest.fixture
+def app(make_app, populate, tmp_path):
+    app = make_app({'METRICS_ENABLED': True, 'METRICS_DIR': str(tmp_path / 'metrics')})
+    populate(app, users=20, campaigns=10, donations=50, follows=10, updates=5)
+    return app
+
+def test_metrics_endpoint(client):
+    assert client.get('/api/campaigns/categories').status_code == 200
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    text = response.get_data(as_text=True)
+    assert '# TYPE aksi_nyata_request_duration_seconds histogram' in text
+    assert 'aksi_nyata_requests_total{endpoint="campaigns.get_categories",method="GET",status="200"} 1' in text
+    assert 'aksi_nyata_db_queries_total{endpoint="campaigns.get_categories"}' in text
+    assert 'aksi_nyata_pending_donations ' in text
@@ -0,0 +1,91 @@
+"""
+Test the versioned migration runner against a legacy database
+"""
+import pytest
+from sqlalchemy import create_engine, text
+from app.migrations import (
+    PROGRESS_TABLE, load_migrations, pending_migrations, table_columns, upgrade
+)
+
+# Tables as created by early versions of the app, before the migrate_*.py scripts
+LEGACY_SCHEMA = [
+    "CREATE TABLE user (id INTEGER PRIMARY KEY, username VARCHAR(80) NOT NULL, email VARCHAR(120) NOT NULL, "
+    "password_hash VARCHAR(255) NOT NULL, full_name VARCHAR(100) NOT NULL, role VARCHAR(20) NOT NULL, "
+    "profile_picture VARCHAR(255), created_at DATETIME)",
+    "CREATE TABLE campaign (id INTEGER PRIMARY KEY, title VARCHAR(100) NOT NULL, description TEXT NOT NULL, "
+    "target_amount FLOAT NOT NULL, current_amount FLOAT, image VARCHAR(255), start_date DATETIME, "
+    "end_date DATETIME, status VARCHAR(20), organizer_id INTEGER NOT NULL, created_at DATETIME)",
+    "CREATE TABLE donation (id INTEGER PRIMARY KEY, amount FLOAT NOT NULL, message TEXT, "
+    "transfer_proof VARCHAR(255), status VARCHAR(20), donor_id INTEGER NOT NULL, "
+    "campaign_id INTEGER NOT NULL, created_at DATETIME, verified_at DATETIME)",
+]
+
+def quiet(message):
+    pass
+
+@pytest.fixture
+def make_legacy_engine(make_app, tmp_path):
+    make_app({'REGISTER_BLUEPRINTS': False}, migrate=False)  # registers the models
+    engines = []
+
+    def make_legacy_engine(campaigns=5):
+        engine = create_engine(f'sqlite:///{tmp_path / "legacy.db"}')
+        with engine.begin() as conn:
+            for statement in LEGACY_SCHEMA:
+                conn.execute(text(statement))
+            conn.execute(text(
+                "INSERT INTO user (id, username, email, password_hash, full_name, role) "
+                "VALUES (1, 'old', 'old@test.com', 'x', 'Old User', 'user')"
+            ))
+            for campaign_id in range(1, campaigns + 1):
+                conn.execute(text(
+                    "INSERT INTO campaign (id, title, description, target_amount, status, organizer_id, created_at) "
+                    "VALUES (:id, 'Old', 'Old campaign', 1000, 'active', 1, CURRENT_TIMESTAMP)"
+                ), {'id': campaign_id})
+        engines.append(engine)
+        return engine
+
+    yield make_legacy_engine
+    for engine in engines:
+        engine.dispose()
+
+@pytest.fixture
+def upgraded(make_legacy_engine):
+    engine = make_legacy_engine()
+    assert upgrade(engine, batch_size=2, log=quiet) == [module.VERSION for module in load_migrations()]
+    return engine
+
+def test_upgrade_legacy_database(upgraded):
+    assert not pending_migrations(upgraded)
+    with upgraded.connect() as conn:
+        assert {'creator_id', 'category_id', 'is_featured', 'updated_at'} <= table_columns(conn, 'campaign')
+        assert {'payment_method', 'is_anonymous', 'verified_by'} <= table_columns(conn, 'donation')
+        assert {'phone_number', 'is_active', 'updated_at'} <= table_columns(conn, 'user')
+        assert conn.execute(text("SELECT COUNT(*) FROM campaign WHERE creator_id IS NULL")).scalar() == 0
+        assert conn.execute(text(f"SELECT COUNT(*) FROM {PROGRESS_TABLE}")).scalar() == 0
+        indexes = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+        assert 'ix_campaign_creator_created' in indexes
+
+def test_upgrade_again_is_a_no_op(upgraded):
+    assert upgrade(upgraded, log=quiet) == []
+
+def test_backfill_resumes_from_checkpoint(make_legacy_engine):
+    engine = make_legacy_engine(campaigns=6)
+    upgrade(engine, target=1, log=quiet)
+
+    # Simulate a run of 0002 that committed its schema step and the
+    # first batch (ids 1-2) before being interrupted
+    from app.migrations.versions.v0002_legacy_columns import upgrade as legacy_columns_schema
+    with engine.begin() as conn:
+        legacy_columns_schema(conn)
+        conn.execute(text(
+            f"INSERT INTO {PROGRESS_TABLE} (name, last_id, updated_at) VALUES "
+            "('0002:schema', 0, CURRENT_TIMESTAMP), ('0002:campaign_creator_id', 2, CURRENT_TIMESTAMP)"
+        ))
+
+    assert upgrade(engine, target=2, batch_size=2, log=quiet) == [2]
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, creator_id FROM campaign ORDER BY id")).fetchall()
+    # Rows before the checkpoint were not visited again
+    assert [creator_id for _, creator_id in rows] == [None, None, 1, 1, 1, 1]
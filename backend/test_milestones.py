@@ -0,0 +1,111 @@
+"""
+Test the cached next milestone threshold and bulk milestone achievement
+"""
+from datetime import datetime
+import pytest
+from sqlalchemy import text
+from app import db
+from app.migrations import upgrade
+from app.models.models import Campaign, Donation, Milestone
+from app.utils.leaderboards import fill_weekly_board
+from app.utils.milestones import next_milestone_amount
+
+def quiet(message):
+    pass
+
+@pytest.fixture
+def app(make_app, populate):
+    app = make_app()
+    populate(app, users=20, campaigns=15, donations=300, follows=10, updates=5)
+    return app
+
+def cached_thresholds_are_exact():
+    return all(campaign.next_milestone_amount == next_milestone_amount(db.session, campaign.id)
+               for campaign in Campaign.query.all())
+
+def test_generated_campaigns_carry_their_threshold(app):
+    with app.app_context():
+        assert cached_thresholds_are_exact()
+
+def test_migration_backfill_recomputes_the_threshold(app):
+    with app.app_context():
+        db.session.execute(text("UPDATE campaign SET next_milestone_amount = NULL"))
+        db.session.execute(text("DELETE FROM schema_migrations WHERE version = 5"))
+        db.session.commit()
+        assert upgrade(db.engine, log=quiet) == [5]
+        db.session.expire_all()
+        assert cached_thresholds_are_exact()
+
+@pytest.fixture
+def campaign(app, client, create_user, auth_headers):
+    """A campaign with milestones at 100000, 200000 and 500000, and pending donations of 50000, 200000 and 10000"""
+    with app.app_context():
+        creator = create_user('creator')
+        admin = create_user('root', role='admin')
+        campaign = Campaign(title='Jembatan', description='-', target_amount=1000000, status='active',
+                            organizer_id=creator.id, creator_id=creator.id)
+        db.session.add(campaign)
+        db.session.commit()
+        donations = [Donation(amount=amount, status='pending', campaign_id=campaign.id, donor_id=creator.id)
+                     for amount in (50000, 200000, 10000)]
+        db.session.add_all(donations)
+        # The first verification of a day fills the weekly board; fill it now
+        # so that every verification below takes the same statements
+        fill_weekly_board(db.session, datetime.utcnow().date())
+        db.session.commit()
+        campaign = {
+            'id': campaign.id,
+            'donation_ids': [donation.id for donation in donations],
+            'creator': auth_headers(creator.id),
+            'admin': auth_headers(admin.id),
+        }
+
+    for target in (500000, 100000, 200000):
+        response = client.post(f"/api/donations/campaigns/{campaign['id']}/milestones", headers=campaign['creator'],
+                               json={'title': f'Tahap {target}', 'description': '-', 'target_amount': target})
+        assert response.status_code == 201
+    return campaign
+
+@pytest.fixture
+def threshold(app, campaign):
+    def threshold():
+        with app.app_context():
+            return db.session.get(Campaign, campaign['id']).next_milestone_amount
+    return threshold
+
+@pytest.fixture
+def verify(client, campaign, query_count):
+    """Verifies the campaign's nth donation, returns the statements it took"""
+    def verify(index):
+        response = client.put(f"/api/donations/{campaign['donation_ids'][index]}/verify",
+                              json={'status': 'verified'}, headers=campaign['admin'])
+        assert response.status_code == 200
+        return query_count(response)
+    return verify
+
+def test_adding_milestones_sets_the_threshold(threshold):
+    assert threshold() == 100000
+
+def test_donations_below_the_threshold_skip_milestones(threshold, verify):
+    below = verify(0)
+    assert threshold() == 100000
+    verify(1)
+    assert verify(2) == below
+    assert threshold() == 500000
+
+def test_crossed_thresholds_are_achieved_by_one_update(app, campaign, threshold, verify):
+    below = verify(0)
+    assert verify(1) > below
+    assert threshold() == 500000
+    with app.app_context():
+        milestones = Milestone.query.filter_by(campaign_id=campaign['id']).all()
+        assert {m.target_amount: m.status for m in milestones} == \
+            {100000: 'achieved', 200000: 'achieved', 500000: 'pending'}
+        assert all(m.achieved_at for m in milestones if m.status == 'achieved')
+
+def test_reached_milestones_do_not_lower_the_threshold(client, campaign, threshold, verify):
+    verify(1)
+    response = client.post(f"/api/donations/campaigns/{campaign['id']}/milestones", headers=campaign['creator'],
+                           json={'title': 'Awal', 'description': '-', 'target_amount': 1000})
+    assert response.get_json()['milestone']['status'] == 'achieved'
+    assert threshold() == 500000
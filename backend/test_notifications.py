@@ -0,0 +1,128 @@
+"""
+Test follower notifications: chunked fan-out, resuming jobs, the unread counter and pages
+"""
+import pytest
+from sqlalchemy import func, select
+from app import db
+from app.models.models import Campaign, Notification, NotificationJob, User
+from app.utils import notifications
+from app.utils.follows import follow
+
+def notified_users(job):
+    return db.session.execute(
+        select(Notification.user_id, func.count())
+        .where(Notification.kind == job.kind, Notification.source_id == job.source_id)
+        .group_by(Notification.user_id)
+    ).all()
+
+@pytest.fixture
+def app(make_app, populate):
+    app = make_app()
+    populate(app, users=300, campaigns=20, donations=200, follows=0, updates=0)
+    return app
+
+@pytest.fixture
+def campaign(app, auth_headers):
+    """A campaign followed by every user but its creator"""
+    with app.app_context():
+        campaign = Campaign.query.order_by(Campaign.id).first()
+        follower_ids = [user_id for user_id, in db.session.execute(
+            select(User.id).where(User.id != campaign.creator_id).order_by(User.id)
+        ).all()]
+        for user_id in follower_ids:
+            follow(db.session, user_id, campaign.id)
+        campaign.current_amount = (campaign.current_amount or 0) + 1000
+        db.session.commit()
+        return {
+            'id': campaign.id,
+            'creator_id': campaign.creator_id,
+            'follower_ids': follower_ids,
+            'reader': auth_headers(follower_ids[0]),
+            'creator': auth_headers(campaign.creator_id),
+        }
+
+@pytest.fixture
+def post_update(client, campaign):
+    def post_update(title='Kabar baru'):
+        response = client.post(f"/api/campaigns/{campaign['id']}/updates", headers=campaign['creator'],
+                               json={'title': title, 'content': 'Pembangunan dimulai'})
+        assert response.status_code == 201
+        return response.get_json()['update']['id']
+    return post_update
+
+def test_posting_an_update_only_queues_a_job(app, post_update):
+    update_id = post_update()
+    with app.app_context():
+        job = NotificationJob.query.one()
+        assert (job.kind, job.source_id, job.finished_at) == ('update', update_id, None)
+        assert Notification.query.count() == 0
+
+def test_jobs_are_delivered_to_every_follower_once_in_chunks(app, campaign, post_update):
+    post_update()
+    follower_ids = campaign['follower_ids']
+    with app.app_context():
+        assert notifications.run_pending(db.session, chunk_size=40) == len(follower_ids)
+        job = NotificationJob.query.one()
+        assert job.finished_at is not None and job.last_user_id == follower_ids[-1]
+        assert notified_users(job) == [(user_id, 1) for user_id in follower_ids]
+        assert {count for count, in db.session.execute(
+            select(User.unread_notifications).where(User.id.in_(follower_ids))
+        ).all()} == {1}
+        assert db.session.get(User, campaign['creator_id']).unread_notifications == 0
+        assert notifications.run_pending(db.session, chunk_size=40) == 0
+
+def test_interrupted_jobs_resume_after_their_last_chunk(app, campaign):
+    follower_ids = campaign['follower_ids']
+    with app.app_context():
+        notifications.enqueue(db.session, 'update', campaign['id'], 999, 'Lanjutan')
+        db.session.commit()
+        job = NotificationJob.query.one()
+        assert notifications.fan_out_chunk(db.session, job, chunk_size=100) == 100
+        assert notifications.run_pending(db.session, chunk_size=70) == len(follower_ids) - 100
+        assert notified_users(job) == [(user_id, 1) for user_id in follower_ids]
+
+def test_milestones_reached_when_added_are_queued(app, client, campaign):
+    response = client.post(f"/api/donations/campaigns/{campaign['id']}/milestones", headers=campaign['creator'],
+                           json={'title': 'Tahap awal', 'description': 'Sudah tercapai', 'target_amount': 500})
+    assert response.status_code == 201
+    with app.app_context():
+        assert notifications.run_pending(db.session) == len(campaign['follower_ids'])
+
+@pytest.fixture
+def inbox(app, client, campaign, post_update):
+    """Three notifications for the reader: two updates, then a milestone"""
+    post_update('Kabar baru')
+    post_update('Lanjutan')
+    client.post(f"/api/donations/campaigns/{campaign['id']}/milestones", headers=campaign['creator'],
+                json={'title': 'Tahap awal', 'description': 'Sudah tercapai', 'target_amount': 500})
+    with app.app_context():
+        notifications.run_pending(db.session)
+    return campaign['reader']
+
+def test_pages_are_newest_first(client, inbox):
+    response = client.get('/api/users/notifications?limit=2', headers=inbox)
+    assert response.status_code == 200
+    page = response.get_json()
+    assert page['unread_count'] == 3
+    assert [n['type'] for n in page['notifications']] == ['milestone', 'update']
+    assert page['notifications'][1]['title'] == 'Lanjutan'
+    rest = client.get(f"/api/users/notifications?limit=2&before={page['next_cursor']}", headers=inbox).get_json()
+    assert [n['title'] for n in rest['notifications']] == ['Kabar baru'] and rest['next_cursor'] is None
+    assert client.get('/api/users/profile', headers=inbox).get_json()['user']['unread_notifications'] == 3
+
+def test_reading_lowers_the_counter_once_per_notification(client, inbox):
+    first = client.get('/api/users/notifications', headers=inbox).get_json()['notifications'][0]['id']
+    response = client.put('/api/users/notifications/read', headers=inbox, json={'ids': [first]})
+    assert response.get_json()['unread_count'] == 2
+    assert client.put('/api/users/notifications/read', headers=inbox, json={'ids': [first]}).get_json()['unread_count'] == 2
+    assert client.put('/api/users/notifications/read', headers=inbox, json={'ids': 'all'}).status_code == 400
+    assert client.put('/api/users/notifications/read', headers=inbox).get_json()['unread_count'] == 0
+    page = client.get('/api/users/notifications', headers=inbox).get_json()
+    assert page['unread_count'] == 0 and all(n['is_read'] for n in page['notifications'])
+
+def test_counter_never_goes_below_zero(app, client, campaign, inbox):
+    with app.app_context():
+        # A counter that fell behind
+        db.session.get(User, campaign['follower_ids'][0]).unread_notifications = 1
+        db.session.commit()
+    assert client.put('/api/users/notifications/read', headers=inbox).get_json()['unread_count'] == 0
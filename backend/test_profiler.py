@@ -0,0 +1,53 @@
+"""
+Test the opt-in sampling profiler
+"""
+import os
+import time
+import pytest
+
+@pytest.fixture
+def make_profiled_app(make_app, tmp_path):
+    def make_profiled_app(**config):
+        app = make_app({
+            'REGISTER_BLUEPRINTS': False,
+            'PROFILER_DIR': str(tmp_path / 'profiles'),
+            'PROFILER_INTERVAL': 0.001,
+            **config,
+        }, migrate=False)
+
+        def busy_wait_for_slow_endpoint():
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                pass
+            return 'ok'
+
+        def fast_endpoint():
+            return 'ok'
+
+        app.add_url_rule('/slow', 'slow', busy_wait_for_slow_endpoint)
+        app.add_url_rule('/fast', 'fast', fast_endpoint)
+        return app
+    return make_profiled_app
+
+def test_disabled_profiler_registers_no_hooks(make_profiled_app, tmp_path):
+    app = make_profiled_app()
+    hooks = [f.__name__ for f in app.before_request_funcs.get(None, [])]
+    assert 'start_profile' not in hooks
+    app.test_client().get('/slow')
+    assert not os.path.exists(tmp_path / 'profiles')
+
+def test_slow_requests_are_profiled_and_rotated(make_profiled_app, tmp_path):
+    app = make_profiled_app(PROFILER_ENABLED=True, PROFILER_SAMPLE_RATE=0.0,
+                            PROFILER_THRESHOLD_MS=20, PROFILER_MAX_FILES=2)
+    client = app.test_client()
+    client.get('/fast')
+    for _ in range(3):
+        client.get('/slow')
+        time.sleep(0.01)
+
+    profiles = sorted(os.listdir(tmp_path / 'profiles'))
+    assert len(profiles) == 2
+    assert all('-slow-' in name for name in profiles)
+    lines = (tmp_path / 'profiles' / profiles[-1]).read_text().splitlines()
+    assert lines and all(line.startswith('slow;') for line in lines)
+    assert any('busy_wait_for_slow_endpoint' in line for line in lines)
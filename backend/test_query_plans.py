@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test that the hot campaign/donation queries are served by indexes.
+
+Runs EXPLAIN QUERY PLAN on each query against a throwaway database that
+has been migrated, and fails if any of them does a full table scan.
+"""
+from sqlalchemy import desc, func, text
+from app import db
+from app.models.models import Campaign, Donation
+
+def hot_queries():
+    """The filter/sort shapes used by the route handlers"""
+    return {
+        'get_campaigns (active)': Campaign.query
+            .filter(Campaign.status.in_(['active', 'approved']))
+            .order_by(desc(Campaign.is_featured), desc(Campaign.is_urgent), desc(Campaign.created_at))
+            .limit(10),
+        'get_campaigns (category)': Campaign.query
+            .filter(Campaign.status.in_(['active', 'approved']), Campaign.category_id == 1)
+            .order_by(desc(Campaign.is_featured), desc(Campaign.is_urgent), desc(Campaign.created_at))
+            .limit(10),
+        'get_categories count': db.session.query(func.count(Campaign.id))
+            .filter(Campaign.category_id == 1),
+        'get_my_campaigns': Campaign.query
+            .filter_by(creator_id=1)
+            .order_by(desc(Campaign.created_at))
+            .limit(10),
+        'admin pending campaigns': Campaign.query
+            .filter_by(status='pending')
+            .order_by(Campaign.created_at.desc()),
+        'expired campaigns sweep': Campaign.query
+            .filter(Campaign.status.in_(['active', 'approved']), Campaign.end_date <= '2024-01-01')
+            .order_by(Campaign.end_date)
+            .limit(500),
+        'admin recent campaigns': Campaign.query
+            .order_by(Campaign.created_at.desc())
+            .limit(5),
+        'campaign verified donations': Donation.query
+            .filter_by(campaign_id=1, status='verified'),
+        'campaign donations by date': Donation.query
+            .filter_by(campaign_id=1)
+            .order_by(Donation.created_at.desc()),
+        'donations by status': Donation.query
+            .filter_by(status='pending')
+            .order_by(Donation.created_at.desc()),
+        'pending donations count': db.session.query(func.count(Donation.id))
+            .filter(Donation.status == 'pending'),
+        'donor donations': Donation.query
+            .filter_by(donor_id=1),
+        'admin recent donations': Donation.query
+            .order_by(Donation.created_at.desc())
+            .limit(5),
+    }
+
+def explain(query):
+    compiled = query.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+    rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).fetchall()
+    return [row[-1] for row in rows]
+
+def is_full_scan(detail):
+    # "SCAN donation" is a full scan; "SCAN donation USING INDEX ..." walks an index in order
+    return detail.startswith('SCAN ') and 'USING' not in detail
+
+def test_hot_queries_use_indexes(app):
+    failures = []
+    with app.app_context():
+        for name, query in hot_queries().items():
+            plan = explain(query)
+            if any(is_full_scan(detail) for detail in plan):
+                failures.append(f"{name}: {plan}")
+
+    assert not failures, "Full table scans:\n" + "\n".join(failures)
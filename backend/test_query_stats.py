@@ -0,0 +1,42 @@
+"""
+Test the per-request SQL statement counter and N+1 detector
+"""
+import logging
+import pytest
+from app.utils.query_stats import normalize_sql
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+@pytest.fixture
+def app(make_app, populate):
+    app = make_app({'N_PLUS_ONE_THRESHOLD': 3})
+    populate(app, users=20, campaigns=10, donations=50, follows=10, updates=5)
+    return app
+
+def test_normalize_sql():
+    assert normalize_sql("SELECT * FROM campaign WHERE id IN (?, ?, ?)") == \
+        normalize_sql("SELECT * FROM campaign\n WHERE id IN (?)")
+    assert normalize_sql("SELECT * FROM user WHERE name = 'a' LIMIT 10") == \
+        "SELECT * FROM user WHERE name = ? LIMIT ?"
+
+def test_server_timing_header(client):
+    response = client.get('/api/campaigns/categories')
+    assert response.status_code == 200
+    timing = response.headers['Server-Timing']
+    assert timing.startswith('db;dur=') and 'queries' in timing and 'app;dur=' in timing
+
+def test_n_plus_one_warning(app, client):
+    handler = ListHandler()
+    app.logger.addHandler(handler)
+    try:
+        # get_categories counts campaigns once per category
+        assert client.get('/api/campaigns/categories').status_code == 200
+    finally:
+        app.logger.removeHandler(handler)
+    assert any('Probable N+1 in campaigns.get_categories' in message for message in handler.messages)
@@ -0,0 +1,63 @@
+"""
+Test the per-campaign recent donations buffer on the campaign detail page
+"""
+from datetime import datetime
+import pytest
+from app import db
+from app.models.models import Campaign, Donation
+from app.utils import recent_donations
+
+@pytest.fixture
+def campaigns(app, create_user, auth_headers):
+    """A campaign with 2 verified donations, one with 500 and a pending one"""
+    with app.app_context():
+        admin = create_user('admin', role='admin')
+        donor = create_user('donor')
+        small = Campaign(title='Small', description='-', target_amount=1e12, status='active',
+                         organizer_id=donor.id, creator_id=donor.id)
+        large = Campaign(title='Large', description='-', target_amount=1e12, status='active',
+                         organizer_id=donor.id, creator_id=donor.id)
+        db.session.add_all([small, large])
+        db.session.commit()
+        for campaign, count in [(small, 2), (large, 500)]:
+            for index in range(count):
+                db.session.add(Donation(amount=1000, status='verified', campaign_id=campaign.id, donor_id=donor.id,
+                                        created_at=datetime(2024, 1, 1, 0, 0, index % 60, index)))
+            campaign.current_amount = count * 1000.0
+        pending = Donation(amount=5000, status='pending', campaign_id=large.id, donor_id=donor.id)
+        db.session.add(pending)
+        db.session.commit()
+        return {'small': small.id, 'large': large.id, 'pending': pending.id, 'admin': auth_headers(admin.id)}
+
+@pytest.mark.parametrize('path, key', [('/api/campaigns/{}', 'recent_donations'),
+                                       ('/api/donations/campaigns/{}', 'donations')])
+def test_detail_cost_does_not_depend_on_donation_count(client, campaigns, query_count, path, key):
+    small_response = client.get(path.format(campaigns['small']))
+    large_response = client.get(path.format(campaigns['large']))
+    assert len(small_response.get_json()[key]) == 2
+    assert len(large_response.get_json()[key]) == recent_donations.RECENT_LIMIT
+    assert query_count(large_response) == query_count(small_response)
+
+def test_both_detail_routes_share_the_buffer(client, campaigns, query_count):
+    cold = client.get(f"/api/donations/campaigns/{campaigns['large']}")
+    recent_donations.clear_cache()
+    json_api = client.get(f"/api/campaigns/{campaigns['large']}")
+    warm = client.get(f"/api/donations/campaigns/{campaigns['large']}")
+    assert warm.get_json()['donations'] == json_api.get_json()['recent_donations']
+    assert query_count(warm) == query_count(cold) - 1
+
+def test_second_read_skips_the_recent_donations_query(client, campaigns, query_count):
+    first = client.get(f"/api/campaigns/{campaigns['large']}")
+    assert query_count(client.get(f"/api/campaigns/{campaigns['large']}")) == query_count(first) - 1
+
+def test_verified_donations_join_the_cached_list(client, campaigns, query_count):
+    first = client.get(f"/api/campaigns/{campaigns['large']}")
+    response = client.put(f"/api/donations/{campaigns['pending']}/verify", json={'status': 'verified'},
+                          headers=campaigns['admin'])
+    assert response.status_code == 200
+
+    response = client.get(f"/api/campaigns/{campaigns['large']}")
+    recent = response.get_json()['recent_donations']
+    assert recent[0]['id'] == campaigns['pending'] and recent[0]['donor_name'] == 'Donor'
+    assert len(recent) == recent_donations.RECENT_LIMIT
+    assert query_count(response) == query_count(first) - 1
@@ -0,0 +1,34 @@
+"""
+Test the slow-query log and its top-N summary
+"""
+import pytest
+from app.utils.slow_queries import read_log, summarize
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / 'slow.log')
+
+@pytest.fixture
+def app(make_app, populate, log_path):
+    app = make_app({'SLOW_QUERY_THRESHOLD_MS': 0, 'SLOW_QUERY_LOG': log_path})
+    populate(app, users=20, campaigns=10, donations=50, follows=10, updates=5)
+    return app
+
+@pytest.fixture
+def counts(client, log_path):
+    """The logged COUNT statements of one get_categories request"""
+    assert client.get('/api/campaigns/categories').status_code == 200
+    entries = [entry for entry in read_log(log_path) if entry['route'] == 'campaigns.get_categories']
+    return [entry for entry in entries if 'count(' in entry['sql'].lower()]
+
+def test_plan_is_captured_on_first_occurrence(counts):
+    assert len(counts) > 1
+    assert counts[0]['plan'] and all('plan' not in entry for entry in counts[1:])
+    assert counts[0]['params'] == ['int']
+
+def test_summary_groups_statements(counts):
+    report = summarize(counts, top=3, sort='count')
+    assert report[0]['sql'] == counts[0]['sql']
+    assert report[0]['count'] == len(counts)
+    assert report[0]['routes'] == ['campaigns.get_categories']
+    assert report[0]['plan'] == counts[0]['plan']
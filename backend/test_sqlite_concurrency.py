@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Load test for SQLite read/write concurrency under the pragma profiles.
+
+One writer thread inserts donations in small transactions through the
+primary engine while several reader threads run dashboard-style aggregate
+queries through the read-only engine. Run directly to compare the
+'default' profile (rollback journal) with 'production' (WAL):
+
+    python test_sqlite_concurrency.py
+"""
+import os
+import tempfile
+import threading
+import time
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app import create_app, db
+from app.migrations import upgrade
+from app.utils.db_routing import READ_BIND_KEY
+
+READERS = 4
+DURATION = 1.5
+
+def prepare(app):
+    """Migrate the app's database and add the campaign the load writes to"""
+    with app.app_context():
+        upgrade(db.engine, log=lambda message: None)
+        with db.engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO user (id, username, email, password_hash, full_name, role) "
+                "VALUES (1, 'load', 'load@test.com', 'x', 'Load Test', 'user')"
+            ))
+            conn.execute(text(
+                "INSERT INTO campaign (id, title, description, target_amount, current_amount, status, organizer_id, creator_id) "
+                "VALUES (1, 'Load', 'Load test campaign', 1000000, 0, 'active', 1, 1)"
+            ))
+    return app
+
+def run_load(app, duration=DURATION, readers=READERS):
+    """Run the mixed workload and return counters for the app's pragma profile"""
+    with app.app_context():
+        engine = db.engine
+        read_engine = db.engines[READ_BIND_KEY]
+        with engine.connect() as conn:
+            journal_mode = conn.execute(text("PRAGMA journal_mode")).scalar()
+
+        stats = {'reads': 0, 'writes': 0, 'lock_errors': 0, 'max_read_ms': 0.0}
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def writer():
+            while not stop.is_set():
+                try:
+                    with engine.begin() as conn:
+                        for _ in range(20):
+                            conn.execute(text(
+                                "INSERT INTO donation (amount, status, campaign_id, donor_id, created_at) "
+                                "VALUES (10000, 'verified', 1, 1, CURRENT_TIMESTAMP)"
+                            ))
+                        conn.execute(text("UPDATE campaign SET current_amount = current_amount + 200000 WHERE id = 1"))
+                    with lock:
+                        stats['writes'] += 1
+                except OperationalError:
+                    with lock:
+                        stats['lock_errors'] += 1
+
+        def reader():
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    with read_engine.connect() as conn:
+                        conn.execute(text(
+                            "SELECT COUNT(*), SUM(amount) FROM donation WHERE campaign_id = 1 AND status = 'verified'"
+                        )).fetchone()
+                    elapsed = (time.perf_counter() - started) * 1000
+                    with lock:
+                        stats['reads'] += 1
+                        stats['max_read_ms'] = max(stats['max_read_ms'], elapsed)
+                except OperationalError:
+                    with lock:
+                        stats['lock_errors'] += 1
+
+        threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    stats['journal_mode'] = journal_mode
+    return stats
+
+def test_production_profile_handles_concurrent_reads_and_writes(make_app):
+    stats = run_load(prepare(make_app({'SQLITE_PRAGMA_PROFILE': 'production'}, migrate=False)))
+
+    assert stats['journal_mode'] == 'wal'
+    assert stats['lock_errors'] == 0, stats
+    assert stats['reads'] > 0 and stats['writes'] > 0, stats
+
+def test_default_profile_keeps_rollback_journal(make_app):
+    stats = run_load(prepare(make_app({'SQLITE_PRAGMA_PROFILE': 'default'}, migrate=False)), duration=0.3, readers=1)
+
+    assert stats['journal_mode'] == 'delete'
+
+if __name__ == '__main__':
+    print(f"{READERS} readers + 1 writer for {DURATION}s per profile\n")
+    print(f"{'profile':<12}{'journal':<10}{'reads':>8}{'writes':>8}{'locked':>8}{'max read ms':>14}")
+    for profile in ['default', 'production']:
+        with tempfile.TemporaryDirectory() as tmp:
+            app = prepare(create_app({
+                'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmp, 'load.db'),
+                'SQLITE_PRAGMA_PROFILE': profile,
+            }))
+            stats = run_load(app)
+            with app.app_context():
+                for engine in db.engines.values():
+                    engine.dispose()
+        print(f"{profile:<12}{stats['journal_mode']:<10}{stats['reads']:>8}{stats['writes']:>8}"
+              f"{stats['lock_errors']:>8}{stats['max_read_ms']:>14.1f}")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for worker boot.
+
+Each gunicorn worker (and every maintenance script) builds the app with
+create_app(), so the factory must not touch the database. Run directly to
+time a cold boot in a fresh interpreter:
+
+    python test_startup_time.py
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+from app import create_app
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+RUNS = 5
+
+BOOT_SNIPPET = """
+import time
+started = time.perf_counter()
+from app import create_app
+create_app({config})
+print(time.perf_counter() - started)
+"""
+
+def boot_time(database_uri, config='', runs=RUNS):
+    """Median seconds to import the app package and build the app in a new interpreter"""
+    env = dict(os.environ, DATABASE_URI=database_uri)
+    timings = []
+    for _ in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, '-c', BOOT_SNIPPET.format(config=config)],
+            cwd=BACKEND_DIR, env=env, stderr=subprocess.DEVNULL
+        )
+        timings.append(float(output.decode().strip().splitlines()[-1]))
+    return statistics.median(timings)
+
+def test_create_app_does_no_db_io(tmp_path):
+    connections = []
+
+    def on_connect(dbapi_connection, connection_record):
+        connections.append(dbapi_connection)
+
+    event.listen(Pool, 'connect', on_connect)
+    try:
+        db_path = tmp_path / 'boot.db'
+        create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}'})
+
+        assert not connections, 'create_app() opened a database connection'
+        assert not db_path.exists(), 'create_app() created the database file'
+    finally:
+        event.remove(Pool, 'connect', on_connect)
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp:
+        database_uri = 'sqlite:///' + os.path.join(tmp, 'boot.db')
+        started = time.perf_counter()
+        full = boot_time(database_uri)
+        no_routes = boot_time(database_uri, config="{'REGISTER_BLUEPRINTS': False}")
+        total = time.perf_counter() - started
+
+    print(f"Worker boot (median of {RUNS}, fresh interpreter)")
+    print(f"  create_app()                          {full * 1000:8.1f} ms")
+    print(f"  create_app(REGISTER_BLUEPRINTS=False) {no_routes * 1000:8.1f} ms")
+    print(f"  ({total:.1f}s wall time including interpreter start-up)")
@@ -0,0 +1,86 @@
+"""
+Test streaming multipart uploads: limits, magic bytes and spooling
+"""
+import io
+import os
+import pytest
+from app.models.models import Campaign, Donation, User
+from app.utils.uploads import MAX_PROOF_SIZE
+
+PNG = b'\x89PNG\r\n\x1a\n'
+
+@pytest.fixture
+def uploads(tmp_path):
+    return tmp_path / 'uploads'
+
+@pytest.fixture
+def app(make_app, populate, uploads):
+    app = make_app({'UPLOAD_FOLDER': str(uploads), 'UPLOAD_SPOOL_THRESHOLD': 1024})
+    populate(app, users=10, campaigns=5, donations=20)
+    return app
+
+@pytest.fixture
+def campaign_id(app):
+    with app.app_context():
+        return Campaign.query.filter_by(status='active').first().id
+
+@pytest.fixture
+def stored_files(uploads):
+    def stored_files():
+        return sorted(
+            os.path.relpath(os.path.join(root, name), uploads)
+            for root, _, names in os.walk(uploads) for name in names
+        )
+    return stored_files
+
+def donate(client, campaign_id, proof, filename='proof.png'):
+    return client.post('/api/donations/donate', content_type='multipart/form-data', data={
+        'campaign_id': str(campaign_id),
+        'amount': '50000',
+        'donor_name': 'Tester',
+        'transfer_proof': (io.BytesIO(proof), filename),
+    })
+
+def test_large_proofs_are_spooled_and_renamed_into_place(app, client, campaign_id, tmp_path, stored_files):
+    proof = PNG + os.urandom(200 * 1024)
+    response = donate(client, campaign_id, proof)
+    assert response.status_code == 201, response.get_json()
+    path = response.get_json()['donation']['transfer_proof']
+    assert path.startswith('uploads/') and path.endswith('_proof.png')
+    assert (tmp_path / path).read_bytes() == proof
+    assert stored_files() == [os.path.basename(path)]
+
+def test_small_proofs_are_kept_in_memory(app, client, campaign_id, stored_files):
+    response = donate(client, campaign_id, b'%PDF-1.4 small', filename='proof.pdf')
+    assert response.status_code == 201
+    assert len(stored_files()) == 1
+    with app.app_context():
+        assert Donation.query.filter_by(donor_name='Tester').count() == 1
+
+def test_content_must_match_an_accepted_type(client, campaign_id, stored_files):
+    # Whatever the filename says
+    response = donate(client, campaign_id, b'<html>not an image</html>' * 100)
+    assert response.status_code == 400 and 'not a valid' in response.get_json()['error']
+    assert donate(client, campaign_id, PNG, filename='proof.exe').status_code == 400
+    assert stored_files() == []
+
+def test_field_and_request_limits(app, client, campaign_id, stored_files):
+    assert donate(client, campaign_id, PNG + b'\0' * MAX_PROOF_SIZE).status_code == 413
+    app.config['MAX_CONTENT_LENGTH'] = 64 * 1024
+    assert donate(client, campaign_id, PNG + b'\0' * 100 * 1024).status_code == 413
+    assert stored_files() == []
+
+def test_rejected_request_leaves_no_file(client, stored_files):
+    assert donate(client, 999999, PNG + b'\0' * 4096).status_code == 404
+    assert stored_files() == []
+
+def test_campaign_image_upload(app, client, uploads, stored_files, auth_headers):
+    with app.app_context():
+        headers = auth_headers(User.query.first().id)
+    response = client.post('/api/campaigns/upload-image', content_type='multipart/form-data', headers=headers,
+                           data={'file': (io.BytesIO(b'GIF89a' + b'\0' * 2048), 'cover.gif')})
+    assert response.status_code == 200
+    image_url = response.get_json()['image_url']
+    assert image_url.startswith('/static/uploads/campaigns/') and image_url.endswith('_cover.gif')
+    assert (uploads / 'campaigns' / os.path.basename(image_url)).exists()
+    assert not [name for name in stored_files() if name.endswith('.part')]
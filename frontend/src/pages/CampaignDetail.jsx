@@ -2,7 +2,7 @@ import React, { useState, useEffect, useCallback } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { useAuth } from '../contexts/AuthContext';
 import { campaignService, donationService } from '../services/api';
-import { getImageUrl } from '../utils/apiConfig';
+import { API_BASE_URL, getImageUrl } from '../utils/apiConfig';
 
 const CampaignDetail = () => {
   const { id } = useParams();
@@ -44,6 +44,42 @@ const CampaignDetail = () => {
     fetchCampaignDetails();
   }, [fetchCampaignDetails]);
 
+  // Live progress: the server pushes an event whenever a donation is verified.
+  // Streams end after a minute and EventSource reconnects by itself; when the
+  // server refuses a stream (too many live connections) try again later.
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') return undefined;
+
+    let source = null;
+    let retryTimer = null;
+    let retryDelay = 15000;
+
+    const connect = () => {
+      source = new EventSource(`${API_BASE_URL}/campaigns/${id}/stream`);
+      source.addEventListener('progress', (event) => {
+        retryDelay = 15000;
+        const progress = JSON.parse(event.data);
+        setCampaign(prev => prev && ({
+          ...prev,
+          current_amount: progress.current_amount,
+          progress_percentage: progress.progress_percentage,
+          status: progress.status
+        }));
+      });
+      source.onerror = () => {
+        if (source.readyState !== EventSource.CLOSED) return;
+        retryTimer = setTimeout(connect, retryDelay);
+        retryDelay = Math.min(retryDelay * 2, 300000);
+      };
+    };
+
+    connect();
+    return () => {
+      clearTimeout(retryTimer);
+      if (source) source.close();
+    };
+  }, [id]);
+
   const handleFollowCampaign = async () => {
     if (!currentUser) {
       navigate('/login');
@@ -1,7 +1,7 @@
 import axios from 'axios';
 
 // Configure axios instance with base URL
-const API_BASE_URL = 'http://localhost:5000/api';
+export const API_BASE_URL = 'http://localhost:5000/api';
 
 const apiClient = axios.create({
   baseURL: API_BASE_URL,